@@ -1,14 +1,15 @@
 """
 FastAPI backend for property search API
 """
+import json
 import re
-from fastapi import FastAPI, Query, HTTPException, Depends, Body
+from fastapi import FastAPI, Query, HTTPException, Depends, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, JSONResponse
 from typing import Optional, List
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, nullslast, func
+from sqlalchemy.orm import Session, load_only, selectinload, joinedload
+from sqlalchemy import and_, or_, func
 import requests
 from datetime import datetime, timedelta
 
@@ -39,12 +40,17 @@ else:
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.models import get_engine, get_session, Property, PropertyMedia, AppMetadata, init_database
-from services.property_transformer import transform_for_frontend, _normalize_address, _expand_address_abbreviations, _get_address_unit_variants
+from database.models import get_engine, get_session, Property, PropertyDetail, PropertyMedia, AppMetadata, init_database, PROPERTY_DETAIL_COLUMNS
+from database.models import DEFAULT_SEARCH_SORT, search_order_by, media_entries
+from database.bulk import clear_listing_state
+from database.routing import ReplicaRouter
+from services.property_transformer import transform_for_frontend, parse_fields, columns_for_fields, _normalize_address, _expand_address_abbreviations, _get_address_unit_variants
 from scripts.populate_database import populate_database
 from services.r2_storage import R2Storage
 from services.image_processor import ImageProcessor
 from services.email_sender import is_email_configured, send_disclosures_email, send_tour_request_email, send_offer_email
+from services import request_timing
+from services.request_timing import phase
 
 # In-memory image cache: {cache_key: (image_data, content_type, expires_at)}
 image_cache = {}
@@ -58,6 +64,48 @@ def _looks_like_mls_id(s: str) -> bool:
     if t.upper().startswith("NWM"):
         t = t[3:]
     return len(t) >= 6 and t.isdigit()
+
+
+def _sparse_fieldset(fields: Optional[str], extra: tuple = ()):
+    """Parse a fields= query value (None when absent); 400 on unknown fields."""
+    if fields is None:
+        return None
+    try:
+        return parse_fields(fields, extra)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _property_media(db: Session, property_obj: Property) -> List[dict]:
+    """Ordered media entries of a listing: its media_json copy (loaded with the row), or built from
+    property_media for listings whose media_json hasn't been written yet."""
+    if property_obj.media_json is not None:
+        return json.loads(property_obj.media_json)
+    return media_entries(
+        db.query(PropertyMedia).filter_by(property_id=property_obj.id).order_by(PropertyMedia.order).all()
+    )
+
+
+def _property_load_options(fieldset, single: bool = False) -> list:
+    """Loader options for Property rows serialized with fieldset (None: every field). property_details is
+    joined for a single row and selectin-loaded for a page (one IN query after the narrow search scan);
+    a sparse fieldset loads only the columns it is built from, and skips property_details if it needs none.
+    media_json is only loaded for a single row whose images are requested (pages show the primary image)."""
+    if fieldset is None:
+        if single:
+            return [joinedload(Property.details)]
+        return [selectinload(Property.details).defer(PropertyDetail.media_json)]
+    load_details = joinedload if single else selectinload
+    columns = columns_for_fields(fieldset)
+    detail_columns = [column for column in columns if column in PROPERTY_DETAIL_COLUMNS]
+    if single and "images" in dict(fieldset):
+        detail_columns.append("media_json")
+    options = [load_only(*(getattr(Property, column) for column in columns if column not in PROPERTY_DETAIL_COLUMNS))]
+    if detail_columns:
+        options.append(load_details(Property.details).load_only(*(getattr(PropertyDetail, column) for column in detail_columns)))
+    return options
+
+
 CACHE_DURATION_HOURS = 24  # Cache images for 24 hours
 
 LAST_POPULATE_RUN_FILE = os.path.join(backend_dir, "last_populate_run.txt")
@@ -105,8 +153,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Time every SQL statement (Server-Timing "db" bucket) and capture slow ones with EXPLAIN plans
+request_timing.install_query_profiler()
+
+
+@app.middleware("http")
+async def server_timing_middleware(request: Request, call_next):
+    """Emit a Server-Timing header (db, count, page, transform, serialize, total) on every response"""
+    timings, token = request_timing.start_request(request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        request_timing.finish_request(token)
+    response.headers["Server-Timing"] = timings.header_value()
+    return response
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -133,23 +197,55 @@ async def startup_event():
         print("   (This is normal if tables already exist)")
 
 
-# Database dependency
-def get_db():
-    """Get database session"""
-    # Get database URL from environment variable, fallback to SQLite for local development
+def _get_database_url() -> str:
+    """Primary database URL from DATABASE_URL, fallback to SQLite for local development"""
     database_url = os.getenv("DATABASE_URL")
     
     if not database_url:
         # Fallback to SQLite for local development
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        database_url = f"sqlite:///{os.path.join(project_root, 'properties.db')}"
-    else:
-        # Railway/Heroku provide postgres:// but SQLAlchemy needs postgresql://
-        if database_url.startswith("postgres://"):
-            database_url = database_url.replace("postgres://", "postgresql://", 1)
-    
-    engine = get_engine(database_url)
-    session = get_session(engine)
+        return f"sqlite:///{os.path.join(project_root, 'properties.db')}"
+    # Railway/Heroku provide postgres:// but SQLAlchemy needs postgresql://
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    return database_url
+
+
+def _get_read_database_urls() -> List[str]:
+    """Read replica URLs from DATABASE_READ_URLS (comma-separated) or DATABASE_READ_URL; empty if unset"""
+    raw = os.getenv("DATABASE_READ_URLS") or os.getenv("DATABASE_READ_URL") or ""
+    urls = []
+    for url in raw.split(","):
+        url = url.strip()
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        if url:
+            urls.append(url)
+    return urls
+
+
+# Engines are created once per process; read-only endpoints go to replicas when configured
+db_router = ReplicaRouter(
+    _get_database_url(),
+    _get_read_database_urls(),
+    unhealthy_cooldown=float(os.getenv("DATABASE_READ_RETRY_SECONDS", "30")),
+    read_your_writes_seconds=float(os.getenv("DATABASE_READ_YOUR_WRITES_SECONDS", "0")),
+)
+
+
+# Database dependencies
+def get_db():
+    """Get primary database session (writes, ingest, admin and lead endpoints)"""
+    session = db_router.write_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def get_read_db():
+    """Get read-only database session (replica when configured, else primary)"""
+    session = db_router.read_session()
     try:
         yield session
     finally:
@@ -174,7 +270,9 @@ async def root():
 @app.post("/api/admin/populate")
 async def populate_database_endpoint(
     limit: Optional[int] = Query(None, ge=1, description="Number of properties to populate (omit for no limit)"),
-    clear: bool = Query(False, description="Clear existing data before populating")
+    clear: bool = Query(False, description="Clear existing data before populating"),
+    incremental: bool = Query(False, description="Only sync records modified since the last completed sync"),
+    resume: bool = Query(False, description="Continue an interrupted run from its last checkpoint")
 ):
     """
     Admin endpoint to populate the database with properties from NWMLS API.
@@ -183,6 +281,9 @@ async def populate_database_endpoint(
     Parameters:
     - limit: Optional cap on number of properties (omit to transform and insert all)
     - clear: If True, deletes all existing properties and media before populating
+    - incremental: If True, only records modified since the stored ModificationTimestamp high-water mark
+      are fetched and upserted; off-market / MlgCanView=false listings are deleted
+    - resume: If True, continue the last unfinished run from its checkpoint (its mode is reused)
     
     Note: This is an admin endpoint. Consider adding authentication in production.
     """
@@ -206,10 +307,13 @@ async def populate_database_endpoint(
                 old_property_count = session.query(Property).count()
                 old_media_count = session.query(PropertyMedia).count()
                 
-                # Delete media first (due to foreign key constraints)
+                # Delete media and details first (due to foreign key constraints; SQLite doesn't enforce them)
                 deleted_media = session.query(PropertyMedia).delete()
+                session.query(PropertyDetail).delete()
                 # Delete properties
                 deleted_properties = session.query(Property).delete()
+                # Forget sync state so an incremental or resumed populate fetches the full feed again
+                clear_listing_state(session)
                 session.commit()
                 
                 print(f"✓ Cleared {old_property_count} properties and {old_media_count} media items")
@@ -224,7 +328,8 @@ async def populate_database_endpoint(
         
         # Call populate function (runs synchronously)
         # Output will be logged to Railway logs
-        populate_database(database_url=database_url, limit=limit)
+        populate_database(database_url=database_url, limit=limit, incremental=incremental, resume=resume)
+        db_router.mark_write()
         
         # Get final counts to return
         engine = get_engine(database_url)
@@ -245,7 +350,9 @@ async def populate_database_endpoint(
             "properties_inserted": property_count,
             "media_items": media_count,
             "limit_requested": limit,
-            "cleared": clear
+            "cleared": clear,
+            "incremental": incremental,
+            "resume": resume
         }
     except HTTPException:
         raise
@@ -256,6 +363,38 @@ async def populate_database_endpoint(
         )
 
 
+@app.get("/api/admin/slow-queries")
+async def get_slow_queries():
+    """
+    Admin endpoint listing recently captured slow SQL statements (newest first).
+    Each entry has the statement, its bound parameters (both truncated), duration and EXPLAIN plan.
+    Threshold and buffer size come from SLOW_QUERY_THRESHOLD_MS and SLOW_QUERY_BUFFER_SIZE;
+    set SLOW_QUERY_EXPLAIN_ANALYZE=true for EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL.
+    
+    Note: This is an admin endpoint. Consider adding authentication in production.
+    """
+    queries = request_timing.get_slow_queries()
+    return {
+        "threshold_ms": request_timing.SLOW_QUERY_THRESHOLD_MS,
+        "buffer_size": request_timing.SLOW_QUERY_BUFFER_SIZE,
+        "explain_analyze": request_timing.SLOW_QUERY_EXPLAIN_ANALYZE,
+        "count": len(queries),
+        "queries": queries,
+    }
+
+
+@app.delete("/api/admin/slow-queries")
+async def clear_slow_queries():
+    """Admin endpoint to empty the slow-query ring buffer"""
+    return {"success": True, "cleared": request_timing.clear_slow_queries()}
+
+
+@app.get("/api/admin/db-routing")
+async def get_db_routing():
+    """Admin endpoint showing read replica health and whether reads currently go to the primary"""
+    return db_router.status()
+
+
 @app.get("/api/properties")
 async def get_properties(
     page: int = Query(1, ge=1, description="Page number"),
@@ -273,7 +412,8 @@ async def get_properties(
     home_type: Optional[str] = Query(None, description="Home type: Single Family, Multi Family, Condo, Land, Manufactured, Other"),
     status: Optional[str] = Query(None, description="Listing status"),
     internet_address_display: Optional[bool] = Query(None, description="Filter by internet address display (true/false)"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Sparse fieldset, e.g. id,price,address,images[0] (default: all fields)"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get properties with pagination and filters
@@ -289,7 +429,11 @@ async def get_properties(
     - home_type
     - status
     - internet_address_display
+    
+    fields= returns only the listed keys (address.city, propertyDetails.bedrooms and images[0] pick
+    nested keys / list elements); only the columns they need are loaded.
     """
+    fieldset = _sparse_fieldset(fields)
     try:
         # Build query
         query = db.query(Property)
@@ -342,44 +486,36 @@ async def get_properties(
 
         
         # Get total count (before applying sorting)
-        total = query.count()
-        
-        # Apply sorting - normalize the sort_by parameter
-        sort_by_normalized = sort_by.lower().strip() if sort_by else "newest"
+        with phase("count"):
+            total = query.count()
         
-        if sort_by_normalized == "price_asc":
-            query = query.order_by(nullslast(Property.list_price.asc()))
-        elif sort_by_normalized == "price_desc":
-            query = query.order_by(nullslast(Property.list_price.desc()))
-        elif sort_by_normalized == "sqft_desc":
-            query = query.order_by(nullslast(Property.living_area.desc()))
-        elif sort_by_normalized == "lot_size_desc":
-            query = query.order_by(nullslast(Property.lot_size_square_feet.desc()))
-        elif sort_by_normalized == "beds_desc":
-            query = query.order_by(nullslast(Property.bedrooms_total.desc()))
-        elif sort_by_normalized == "baths_desc":
-            query = query.order_by(nullslast(Property.bathrooms_total_integer.desc()))
-        elif sort_by_normalized == "newest":
-            query = query.order_by(nullslast(Property.on_market_date.desc()))
-        else:
-            # Default to newest if invalid sort_by
-            query = query.order_by(nullslast(Property.on_market_date.desc()))
+        # Sort by the column NULLS LAST, then id (stable pages); each mode is served by its idx_sort_* index
+        sort_by_normalized = sort_by.lower().strip() if sort_by else DEFAULT_SEARCH_SORT
+        query = query.order_by(*search_order_by(sort_by_normalized))
         
         # Apply pagination
         offset = (page - 1) * page_size
-        properties = query.offset(offset).limit(page_size).all()
+        with phase("page"):
+            if offset >= total:
+                # Nothing to return; an index-ordered scan would otherwise walk the whole index looking for rows
+                properties = []
+            else:
+                properties = query.options(*_property_load_options(fieldset)).offset(offset).limit(page_size).all()
         
         # Transform for frontend
-        transformed_properties = [transform_for_frontend(prop) for prop in properties]
+        with phase("transform"):
+            transformed_properties = [transform_for_frontend(prop, fields=fieldset) for prop in properties]
         
-        return {
-            "properties": transformed_properties,
-            "total": total,
-            "page": page,
-            "pageSize": page_size,
-            "hasMore": offset + page_size < total,
-            "totalPages": (total + page_size - 1) // page_size
-        }
+        # Render JSON here (instead of in FastAPI) so serialization shows up in Server-Timing
+        with phase("serialize"):
+            return JSONResponse({
+                "properties": transformed_properties,
+                "total": total,
+                "page": page,
+                "pageSize": page_size,
+                "hasMore": offset + page_size < total,
+                "totalPages": (total + page_size - 1) // page_size
+            })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching properties: {str(e)}")
@@ -389,7 +525,7 @@ async def get_properties(
 async def autocomplete(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(10, ge=1, le=20, description="Max results"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Smart autocomplete that prioritizes:
@@ -745,23 +881,36 @@ async def autocomplete(
 @app.get("/api/properties/{property_id}")
 async def get_property_by_id(
     property_id: str,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Sparse fieldset, e.g. id,price,address,images[0],lastPopulateRun (default: all fields)"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get a single property by ID with all media images"""
+    """Get a single property by ID with all media images (or only the fields= keys)"""
+    fieldset = _sparse_fieldset(fields, extra=("lastPopulateRun",))
+    selected = dict(fieldset) if fieldset is not None else None
     try:
-        property_obj = db.query(Property).filter_by(id=property_id).first()
+        with phase("page"):
+            property_obj = (
+                db.query(Property)
+                .options(*_property_load_options(fieldset, single=True))
+                .filter_by(id=property_id)
+                .first()
+            )
         
         if not property_obj:
             raise HTTPException(status_code=404, detail="Property not found")
         
-        # Query all media items for this property
-        media_items = db.query(PropertyMedia).filter_by(
-            property_id=property_id
-        ).order_by(PropertyMedia.order).all()
+        # All media for this property (skipped when a fieldset leaves out images)
+        media_items = None
+        if selected is None or "images" in selected:
+            with phase("media"):
+                media_items = _property_media(db, property_obj)
         
-        result = transform_for_frontend(property_obj, media_items)
-        result["lastPopulateRun"] = _read_last_populate_run(db)
-        return result
+        with phase("transform"):
+            result = transform_for_frontend(property_obj, media_items, fields=fieldset)
+        if selected is None or "lastPopulateRun" in selected:
+            result["lastPopulateRun"] = _read_last_populate_run(db)
+        with phase("serialize"):
+            return JSONResponse(result)
     
     except HTTPException:
         raise
@@ -983,6 +1132,7 @@ async def process_property_images(
             db=db,
             force_reprocess=force
         )
+        db_router.mark_write()
         return results
     except Exception as e:
         raise HTTPException(
@@ -995,7 +1145,7 @@ async def process_property_images(
 async def get_property_image(
     property_id: str,
     image_index: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get property image URL (R2 CDN or fallback to original).
@@ -1003,42 +1153,39 @@ async def get_property_image(
     Falls back to proxying from NWMLS if not yet stored in R2.
     """
     try:
-        property_obj = db.query(Property).filter_by(id=property_id).first()
+        property_obj = db.query(Property).options(joinedload(Property.details)).filter_by(id=property_id).first()
         if not property_obj:
             raise HTTPException(status_code=404, detail="Property not found")
         
-        r2_key = None
         r2_url = None
         fallback_url = None
         
-        # Get R2 key based on image index
+        # Get R2 URL based on image index (only set once the image is stored in R2)
         if image_index == 0:
             # Primary image
-            r2_key = property_obj.primary_image_r2_key
-            r2_url = property_obj.primary_image_r2_url
+            if property_obj.primary_image_r2_key:
+                r2_url = property_obj.primary_image_r2_url
             fallback_url = property_obj.primary_image_url
         else:
             # Media images
-            media_items = db.query(PropertyMedia).filter_by(
-                property_id=property_id
-            ).order_by(PropertyMedia.order).all()
+            media_items = _property_media(db, property_obj)
             
             # Filter out primary image duplicates
             primary_url = property_obj.primary_image_url
             filtered_media = [
                 m for m in media_items 
-                if m.media_url and m.media_url != primary_url
+                if m.get("url") and m["url"] != primary_url
             ]
             
             media_index = image_index - 1
             if media_index < len(filtered_media):
                 media_item = filtered_media[media_index]
-                r2_key = media_item.r2_key
-                r2_url = media_item.r2_url
-                fallback_url = media_item.media_url
+                # media_json keeps the R2 URL, which the image pipeline writes together with the key
+                r2_url = media_item.get("r2Url")
+                fallback_url = media_item["url"]
         
         # If stored in R2, return R2 URL in JSON response
-        if r2_key and r2_url and R2_ENABLED:
+        if r2_url and R2_ENABLED:
             return {
                 "url": r2_url,
                 "source": "r2",
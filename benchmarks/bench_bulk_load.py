@@ -0,0 +1,136 @@
+"""
+Initial-load benchmark: the populate_database insert path (bulk_insert_mappings per batch) against
+COPY through a staging table (database/bulk.copy_insert, populate_database --copy).
+
+Each method loads the same synthetic listings into emptied properties/property_media tables, one
+commit per batch. Payload generation and transform run outside the timed section, so the numbers
+are write throughput only. COPY needs PostgreSQL with psycopg2; on other databases only the
+current path runs.
+
+Examples:
+  python benchmarks/bench_bulk_load.py --database postgresql://localhost/allode_bench --records 50000
+  python benchmarks/bench_bulk_load.py --database postgresql://localhost/allode_bench --records 100000 --copy-batch-size 5000 --output copy.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from database.models import init_database, get_session, Property, PropertyDetail, PropertyMedia
+from database.bulk import copy_insert, insert_properties, supports_copy
+from services.property_transformer import transform_property, transform_media
+from benchmarks.synthetic import generate_properties
+
+
+def _bulk_insert(session, property_rows, media_rows) -> None:
+    insert_properties(session, property_rows, media_rows)
+
+
+def _copy(session, property_rows, media_rows) -> None:
+    copy_insert(session, property_rows, media_rows)
+
+
+def _empty_tables(session) -> None:
+    session.query(PropertyMedia).delete(synchronize_session=False)
+    session.query(PropertyDetail).delete(synchronize_session=False)
+    session.query(Property).delete(synchronize_session=False)
+    session.commit()
+
+
+def run_method(
+    session,
+    write: Callable[[Any, list, list], None],
+    records: int,
+    batch_size: int,
+    seed: int,
+    max_media: int,
+) -> Dict[str, Any]:
+    """Load `records` listings in batches of batch_size with write(); returns timing stats."""
+    _empty_tables(session)
+    write_seconds = 0.0
+    media_total = 0
+    for start in range(0, records, batch_size):
+        count = min(batch_size, records - start)
+        raws = list(generate_properties(count, seed=seed, start=start, max_media=max_media))
+        property_rows = [transform_property(raw) for raw in raws]
+        media_rows = [media for raw in raws for media in transform_media(raw)]
+        media_total += len(media_rows)
+
+        begin = time.perf_counter()
+        write(session, property_rows, media_rows)
+        session.commit()
+        write_seconds += time.perf_counter() - begin
+        if (start // batch_size) % 50 == 0:
+            print(f"    {start + count}/{records} listings ({write_seconds:.1f}s writing)")
+
+    loaded = session.query(Property).count()
+    return {
+        "batch_size": batch_size,
+        "listings": loaded,
+        "media_rows": media_total,
+        "write_seconds": round(write_seconds, 2),
+        "listings_per_sec": round(loaded / write_seconds, 1) if write_seconds > 0 else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark initial-load write paths (bulk inserts vs COPY)")
+    parser.add_argument("--database", required=True, help="Database URL to load into (its properties tables are emptied)")
+    parser.add_argument("--records", type=int, default=50_000, help="Listings to load per method (default: 50000)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Batch size for the current path (default: 100, as populate)")
+    parser.add_argument("--copy-batch-size", type=int, default=1000, help="Batch size for COPY (default: 1000)")
+    parser.add_argument("--max-media", type=int, default=25, help="Max Media items per listing (default: 25)")
+    parser.add_argument("--seed", type=int, default=11, help="Synthetic data seed (default: 11)")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    engine = init_database(args.database)
+    session = get_session(engine)
+    print("=" * 60)
+    print("Initial Load Benchmark")
+    print("=" * 60)
+    print(f"Database: {args.database.split('@')[-1]}  Listings: {args.records}")
+
+    methods = [("bulk_insert_mappings", _bulk_insert, args.batch_size)]
+    if supports_copy(session):
+        methods.append(("copy_staging", _copy, args.copy_batch_size))
+    else:
+        print("⚠ COPY needs PostgreSQL with psycopg2; running the current path only.")
+
+    results = {}
+    try:
+        for name, write, batch_size in methods:
+            print(f"\n▶ {name} (batches of {batch_size})")
+            results[name] = run_method(session, write, args.records, batch_size, args.seed, args.max_media)
+            print(f"  ✓ {results[name]['listings_per_sec']:,.0f} listings/s ({results[name]['write_seconds']}s)")
+        _empty_tables(session)
+    finally:
+        session.close()
+
+    print(f"\n{'method':24} {'batch':>6} {'listings/s':>12} {'seconds':>9}")
+    print("-" * 54)
+    for name, stats in results.items():
+        print(f"{name:24} {stats['batch_size']:>6} {stats['listings_per_sec']:>12,.0f} {stats['write_seconds']:>9.1f}")
+    if "copy_staging" in results and results["bulk_insert_mappings"]["listings_per_sec"]:
+        speedup = results["copy_staging"]["listings_per_sec"] / results["bulk_insert_mappings"]["listings_per_sec"]
+        print(f"\nCOPY speedup: {speedup:.1f}x")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"timestamp": datetime.utcnow().isoformat(), "records": args.records, "seed": args.seed},
+                "methods": results,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Ingest memory benchmark: peak RSS of populate_database at increasing feed sizes.
+
+For each --records scale a synthetic feed is written to a page archive (services/page_archive), then
+populate_database.py --replay loads it into an empty SQLite database in a fresh process (insert run),
+replays it with --refresh (every listing unchanged, so only the per-page existence and fingerprint
+checks run) and with --refresh --rewrite-unchanged (every listing rewritten). Peak RSS of each
+child process comes from os.wait4, so the numbers include interpreter and import overhead but nothing
+from this harness. With flat-memory ingest the peak should stay roughly constant as the scale grows.
+
+Examples:
+  python benchmarks/bench_ingest_memory.py --records 50000,100000,200000
+  python benchmarks/bench_ingest_memory.py --records 200000 --pipeline --output benchmarks/results/ingest_memory.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from services.page_archive import PageArchiveWriter
+from benchmarks.synthetic import generate_properties
+
+POPULATE_SCRIPT = os.path.join(_project_root, "scripts", "populate_database.py")
+
+
+def write_archive(archive_dir: str, records: int, batch_size: int, seed: int, max_media: int) -> str:
+    """Write `records` synthetic listings as archived pages of batch_size; returns the archive path."""
+    writer = PageArchiveWriter(archive_dir, keep=0)
+    try:
+        for page_num, start in enumerate(range(0, records, batch_size), 1):
+            count = min(batch_size, records - start)
+            page = list(generate_properties(count, seed=seed, start=start, max_media=max_media))
+            next_link = str(start + count) if start + count < records else None
+            writer.write_page(page_num, page, next_link)
+    finally:
+        writer.close()
+    return writer.path
+
+
+def run_populate(args: List[str]) -> Dict[str, Any]:
+    """Run populate_database.py in a child process; returns its wall time and peak RSS."""
+    begin = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        process = subprocess.Popen([sys.executable, POPULATE_SCRIPT] + args, stdout=devnull, stderr=subprocess.PIPE)
+        stderr = process.stderr.read()
+        _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - begin
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"populate_database.py {' '.join(args)} failed:\n{stderr.decode(errors='replace')[-2000:]}")
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return {"seconds": round(seconds, 1), "peak_rss_mb": round(peak_bytes / 1_048_576, 1)}
+
+
+def run_scale(records: int, work_dir: str, batch_size: int, seed: int, max_media: int, extra: List[str]) -> Dict[str, Any]:
+    archive_dir = os.path.join(work_dir, f"archive_{records}")
+    archive = write_archive(archive_dir, records, batch_size, seed, max_media)
+    database = f"sqlite:///{os.path.join(work_dir, f'ingest_{records}.db')}"
+    common = ["--database", database, "--replay", archive, "--batch-size", str(batch_size)] + extra
+    result = {"insert": run_populate(common)}
+    print(f"    insert:    {result['insert']['peak_rss_mb']:>6.1f} MB peak RSS ({result['insert']['seconds']}s)")
+    result["unchanged"] = run_populate(common + ["--refresh"])
+    print(f"    unchanged: {result['unchanged']['peak_rss_mb']:>6.1f} MB peak RSS ({result['unchanged']['seconds']}s)")
+    result["rewrite"] = run_populate(common + ["--refresh", "--rewrite-unchanged"])
+    print(f"    rewrite:   {result['rewrite']['peak_rss_mb']:>6.1f} MB peak RSS ({result['rewrite']['seconds']}s)")
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure populate_database peak RSS at increasing feed sizes")
+    parser.add_argument("--records", default="50000,100000,200000", metavar="N,N,...", help="Feed sizes (default: 50000,100000,200000)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Listings per page (default: 100, as populate)")
+    parser.add_argument("--max-media", type=int, default=5, help="Max Media items per listing (default: 5)")
+    parser.add_argument("--seed", type=int, default=13, help="Synthetic data seed (default: 13)")
+    parser.add_argument("--pipeline", action="store_true", help="Run populate with --pipeline")
+    parser.add_argument("--work-dir", default=None, help="Where archives and databases go (default: a temp dir, removed afterwards)")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    scales = [int(value) for value in args.records.split(",") if value.strip()]
+    extra = ["--pipeline"] if args.pipeline else []
+    print("=" * 60)
+    print("Ingest Memory Benchmark")
+    print("=" * 60)
+
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        for records in scales:
+            print(f"\n▶ {records} listings")
+            results[str(records)] = run_scale(records, work_dir, args.batch_size, args.seed, args.max_media, extra)
+
+    print(f"\n{'listings':>10} {'insert MB':>10} {'unchanged MB':>13} {'rewrite MB':>11}")
+    print("-" * 47)
+    for records, stats in results.items():
+        print(
+            f"{records:>10} {stats['insert']['peak_rss_mb']:>10.1f} "
+            f"{stats['unchanged']['peak_rss_mb']:>13.1f} {stats['rewrite']['peak_rss_mb']:>11.1f}"
+        )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"timestamp": datetime.utcnow().isoformat(), "batch_size": args.batch_size, "pipeline": args.pipeline},
+                "scales": results,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
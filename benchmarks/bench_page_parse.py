@@ -0,0 +1,93 @@
+"""
+OData page parse benchmark: whole-body decode (what response.json() does) against the streaming parser
+(services/odata_stream, populate_database.py --stream-parse) at several page sizes.
+
+Each synthetic page is serialized once and split into STREAM_CHUNK_BYTES chunks, standing in for the
+decoded response stream. "whole" joins the chunks into one body, decodes it to text and json.loads it, as
+requests does; "stream" feeds the chunks to ODataPageStream. Both keep the resulting records, so the
+difference in peak traced memory (tracemalloc) is the body and text the streaming parser never holds.
+Time is best of --repeat runs without tracing.
+
+Examples:
+  python benchmarks/bench_page_parse.py --batch-sizes 100,1000,5000
+  python benchmarks/bench_page_parse.py --batch-sizes 1000 --max-media 40 --output benchmarks/results/page_parse.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from services.mlsgrid_client import STREAM_CHUNK_BYTES
+from services.odata_stream import ODataPageStream
+from benchmarks.synthetic import generate_page
+
+
+def parse_whole(chunks: List[bytes]) -> List[Dict[str, Any]]:
+    body = b"".join(chunks)
+    return json.loads(body.decode("utf-8"))["value"]
+
+
+def parse_stream(chunks: List[bytes]) -> List[Dict[str, Any]]:
+    return list(ODataPageStream(iter(chunks)))
+
+
+def measure(parse: Callable[[List[bytes]], List[Dict[str, Any]]], chunks: List[bytes], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parse(chunks)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        records = parse(chunks)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del records
+    return {"parse_ms": round(best * 1000, 1), "peak_mb": round(peak / 1_048_576, 1)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare whole-body and streaming OData page parsing")
+    parser.add_argument("--batch-sizes", default="100,1000,5000", metavar="N,N,...", help="Records per page (default: 100,1000,5000)")
+    parser.add_argument("--max-media", type=int, default=40, help="Max Media items per listing (default: 40)")
+    parser.add_argument("--seed", type=int, default=13, help="Synthetic data seed (default: 13)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repeats, best is kept (default: 3)")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("OData Page Parse Benchmark")
+    print("=" * 60)
+    results = {}
+    for batch_size in [int(value) for value in args.batch_sizes.split(",") if value.strip()]:
+        body = json.dumps(generate_page(batch_size, seed=args.seed, max_media=args.max_media)).encode("utf-8")
+        chunks = [body[i:i + STREAM_CHUNK_BYTES] for i in range(0, len(body), STREAM_CHUNK_BYTES)]
+        del body
+        whole = measure(parse_whole, chunks, args.repeat)
+        stream = measure(parse_stream, chunks, args.repeat)
+        results[str(batch_size)] = {"body_mb": round(sum(map(len, chunks)) / 1_048_576, 1), "whole": whole, "stream": stream}
+        print(f"\n▶ {batch_size} records ({results[str(batch_size)]['body_mb']} MB body)")
+        print(f"    whole:  {whole['peak_mb']:>7.1f} MB peak, {whole['parse_ms']:>7.1f} ms")
+        print(f"    stream: {stream['peak_mb']:>7.1f} MB peak, {stream['parse_ms']:>7.1f} ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"meta": {"timestamp": datetime.utcnow().isoformat(), "max_media": args.max_media}, "batch_sizes": results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+$select projection benchmark: page size and parse time of full Property records against records
+projected onto the fields ingest reads (services/odata_select, populate_database.py --select).
+
+Offline, each record of a synthetic feed (or a recorded fixture) is cut down to transformer_fields()
+the way $select/$expand=Media($select=...) would cut it server side, and both pages are compared on
+JSON bytes, gzip bytes (what goes over the wire) and json.loads time. The transformed rows of full and
+projected records are checked to be identical, so the projection drops nothing ingest uses. Synthetic
+records only carry mapped fields; --extra-fields pads each one with unmapped fields to approximate the
+several hundred a real NWMLS record has.
+
+--live fetches the same first page from MLS Grid with and without $select (MLSGRID_* env vars).
+
+Examples:
+  python benchmarks/bench_select.py --records 1000 --extra-fields 300
+  python benchmarks/bench_select.py --fixture recorded_page.json --output benchmarks/results/select.json
+  python benchmarks/bench_select.py --live --top 200
+"""
+import argparse
+import gc
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from services.odata_select import EXPANDABLE, metadata_fields, select_params, transformer_fields
+from services.property_transformer import transform_property, transform_media
+from benchmarks.bench_transform import load_fixture
+from benchmarks.synthetic import generate_properties
+
+
+def pad_record(record: Dict[str, Any], extra_fields: int) -> Dict[str, Any]:
+    """Add extra_fields unmapped fields (strings, numbers, nulls) the transformers never read."""
+    padded = dict(record)
+    for idx in range(extra_fields):
+        kind = idx % 4
+        padded[f"NWM_Unmapped{idx:03d}"] = (
+            f"Unmapped value {idx} for {record.get('ListingKey')}" if kind == 0
+            else idx * 1.5 if kind == 1
+            else None if kind == 2
+            else idx % 2 == 0
+        )
+    return padded
+
+
+def project_record(record: Dict[str, Any], fields: Dict[str, set]) -> Dict[str, Any]:
+    """The record as $select (and $select inside $expand) would return it."""
+    projected = {key: value for key, value in record.items() if key in fields["Property"]}
+    for name in EXPANDABLE:
+        if name in record:
+            projected[name] = [
+                {key: value for key, value in item.items() if key in fields[name]} for item in record[name] or []
+            ]
+    return projected
+
+
+def page_stats(body: bytes, repeat: int) -> Dict[str, Any]:
+    """JSON bytes, gzip bytes and best-of-repeat json.loads time for one page body."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        json.loads(body)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "json_bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+        "parse_ms": round(best * 1000, 2),
+    }
+
+
+def check_equivalent(full: List[Dict[str, Any]], projected: List[Dict[str, Any]]) -> int:
+    """Number of records whose transformed row or media differ between full and projected input."""
+    return sum(
+        1 for a, b in zip(full, projected)
+        if transform_property(a) != transform_property(b) or transform_media(a) != transform_media(b)
+    )
+
+
+def run_offline(records: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    fields = transformer_fields()
+    projected = [project_record(record, fields) for record in records]
+    full_stats = page_stats(json.dumps({"value": records}).encode("utf-8"), repeat)
+    projected_stats = page_stats(json.dumps({"value": projected}).encode("utf-8"), repeat)
+    return {
+        "records": len(records),
+        "selected_fields": len(fields["Property"]),
+        "full": full_stats,
+        "select": projected_stats,
+        "mismatches": check_equivalent(records, projected),
+    }
+
+
+def run_live(top: int, repeat: int) -> Dict[str, Any]:
+    """Fetch the first page of MLSGRID_API_URL with and without $select; compares response sizes and parse time."""
+    from services.mlsgrid_client import MLSGridClient
+
+    client = MLSGridClient.from_env()
+    parsed = urlparse(client.api_url)
+    query = parse_qs(parsed.query, keep_blank_values=True)
+    query["$top"] = [str(top)]
+    expand = (query.get("$expand") or [""])[0]
+    params = select_params(expand, metadata_fields(client.get_metadata()))
+    results = {"selected_fields": len(params["$select"].split(","))}
+    for label, extra in (("full", {}), ("select", params)):
+        url = urlunparse(parsed._replace(query=urlencode({**query, **{k: [v] for k, v in extra.items()}}, doseq=True)))
+        start = time.perf_counter()
+        response = client._get(url)
+        seconds = time.perf_counter() - start
+        stats = page_stats(response.content, repeat)
+        stats["wire_bytes"] = int(response.headers.get("Content-Length") or len(response.content))
+        stats["request_ms"] = round(seconds * 1000, 1)
+        results[label] = stats
+    client.close()
+    return results
+
+
+def _print_comparison(stats: Dict[str, Any]) -> None:
+    keys = [key for key in ("json_bytes", "gzip_bytes", "wire_bytes", "parse_ms", "request_ms") if key in stats["full"]]
+    print(f"\n{'':>12} {'full':>12} {'select':>12} {'ratio':>7}")
+    print("-" * 46)
+    for key in keys:
+        full, selected = stats["full"][key], stats["select"][key]
+        ratio = selected / full if full else 0.0
+        print(f"{key:>12} {full:>12,} {selected:>12,} {ratio:>6.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare full and $select-projected Property pages")
+    parser.add_argument("--records", type=int, default=1000, help="Synthetic records (default: 1000)")
+    parser.add_argument("--extra-fields", type=int, default=300, help="Unmapped fields added to each synthetic record (default: 300)")
+    parser.add_argument("--max-media", type=int, default=20, help="Max Media items per synthetic listing (default: 20)")
+    parser.add_argument("--seed", type=int, default=13, help="Synthetic data seed (default: 13)")
+    parser.add_argument("--fixture", default=None, help="Use recorded payloads (page JSON or JSONL) instead of synthetic data")
+    parser.add_argument("--live", action="store_true", help="Fetch a page from MLS Grid with and without $select")
+    parser.add_argument("--top", type=int, default=100, help="Page size for --live (default: 100)")
+    parser.add_argument("--repeat", type=int, default=5, help="Parse timing repeats, best is kept (default: 5)")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("$select Projection Benchmark")
+    print("=" * 60)
+    if args.live:
+        source = f"live first page ($top={args.top})"
+        results = run_live(args.top, args.repeat)
+    else:
+        if args.fixture:
+            source = args.fixture
+            records = load_fixture(args.fixture)
+        else:
+            source = f"synthetic ({args.records} records, +{args.extra_fields} unmapped fields)"
+            records = [
+                pad_record(record, args.extra_fields)
+                for record in generate_properties(args.records, seed=args.seed, max_media=args.max_media)
+            ]
+        results = run_offline(records, args.repeat)
+    print(f"Source: {source}")
+    print(f"Selected Property fields: {results['selected_fields']}")
+    _print_comparison(results)
+    if "mismatches" in results:
+        mark = "✓" if results["mismatches"] == 0 else "✗"
+        print(f"\n{mark} Transformed output differs for {results['mismatches']} of {results['records']} records")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({"meta": {"timestamp": datetime.utcnow().isoformat(), "source": source}, "results": results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0 if results.get("mismatches", 0) == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
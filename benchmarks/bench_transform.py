@@ -0,0 +1,233 @@
+"""
+Throughput micro-benchmarks for the transformer hot paths:
+transform_property, transform_media, transform_unit_types (ingest) and transform_for_frontend (serving).
+
+--processes 1,2,4,8 additionally measures services/transform_pool.TransformPool (the
+populate_database --transform-processes stage) at each process count, including the cost of
+shipping records to the workers and results back, and reports the speedup over in-process.
+
+Input is either synthetic MLS Grid payloads (benchmarks/synthetic.py, configurable scale/null rate/media
+count) or a recorded fixture: an OData page JSON ({"value": [...]}) or JSONL with one Property per line.
+For each transformer it reports records/sec (best of --repeat runs) and, under tracemalloc, the average
+peak bytes allocated per record and blocks still retained per record by the result.
+
+Examples:
+  python benchmarks/bench_transform.py --records 5000
+  python benchmarks/bench_transform.py --fixture recorded_page.json --output after.json --compare before.json
+  python benchmarks/bench_transform.py --records 200 --save-fixture benchmarks/fixtures/page.json
+  python benchmarks/bench_transform.py --records 20000 --processes 1,2,4,8
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import selectinload
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from database.models import Property, PropertyMedia, get_session, init_database, media_entries
+from services.property_transformer import transform_property, transform_media, transform_unit_types, transform_for_frontend
+from services.transform_pool import TransformPool, transform_records
+from benchmarks.synthetic import generate_properties
+
+
+def load_fixture(path: str) -> List[Dict[str, Any]]:
+    """Load recorded Property payloads from an OData page JSON or a JSONL file."""
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data.get("value", [])
+    return data
+
+
+def _time_per_record(func: Callable[[Any], Any], inputs: List[Any], repeat: int) -> float:
+    """Best-of-repeat records/sec for func over inputs."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return len(inputs) / best if best > 0 else float("inf")
+
+
+def _allocations_per_record(func: Callable[[Any], Any], inputs: List[Any]) -> Dict[str, float]:
+    """Average peak bytes allocated per call and blocks retained by the results, per record."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peak_total = 0
+        results = []
+        before = tracemalloc.take_snapshot()
+        for item in inputs:
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            results.append(func(item))
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+        after = tracemalloc.take_snapshot()
+        retained_blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    finally:
+        tracemalloc.stop()
+    n = max(1, len(inputs))
+    return {
+        "peak_bytes_per_record": round(peak_total / n, 1),
+        "retained_blocks_per_record": round(retained_blocks / n, 1),
+    }
+
+
+def build_orm_inputs(records: List[Dict[str, Any]]) -> List[tuple]:
+    """(Property, media entries) pairs as the API loads them (written to and queried back from an in-memory
+    SQLite database with details selectin-loaded, so every column is loaded; media as the detail endpoint
+    decodes it from media_json), for transform_for_frontend."""
+    engine = init_database("sqlite:///:memory:")
+    session = get_session(engine)
+    for raw in records:
+        session.add(Property(**transform_property(raw)))
+        session.add_all(PropertyMedia(**m) for m in transform_media(raw))
+    session.commit()
+    session.expunge_all()
+    media_by_property: Dict[str, List[PropertyMedia]] = {}
+    for media in session.query(PropertyMedia):
+        media_by_property.setdefault(media.property_id, []).append(media)
+    properties = session.query(Property).options(selectinload(Property.details))
+    inputs = [(prop, media_entries(media_by_property.get(prop.id, []))) for prop in properties]
+    session.close()
+    return inputs
+
+
+def run_benchmarks(records: List[Dict[str, Any]], repeat: int, alloc_sample: int) -> Dict[str, Dict[str, Any]]:
+    orm_inputs = build_orm_inputs(records)
+    # Only multi-family listings carry UnitTypes; timing empty lists would hide the real cost
+    unit_type_lists = [raw["UnitTypes"] for raw in records if raw.get("UnitTypes")]
+    cases = {
+        "transform_property": (transform_property, records),
+        "transform_media": (transform_media, records),
+        "transform_unit_types": (transform_unit_types, unit_type_lists),
+        "transform_for_frontend (list)": (lambda pair: transform_for_frontend(pair[0]), orm_inputs),
+        "transform_for_frontend (detail)": (lambda pair: transform_for_frontend(pair[0], pair[1]), orm_inputs),
+    }
+    results = {}
+    for name, (func, inputs) in cases.items():
+        if not inputs:
+            continue
+        rps = _time_per_record(func, inputs, repeat)
+        allocs = _allocations_per_record(func, inputs[:alloc_sample])
+        results[name] = {"records": len(inputs), "records_per_sec": round(rps, 1), **allocs}
+    return results
+
+
+def run_pool_scaling(records: List[Dict[str, Any]], process_counts: List[int], chunk_size: int) -> Dict[str, Dict[str, Any]]:
+    """records/sec of transform_property + transform_media in-process and through TransformPool."""
+    start = time.perf_counter()
+    transform_records(records)
+    in_process = len(records) / (time.perf_counter() - start)
+    results = {"in-process": {"processes": 0, "records_per_sec": round(in_process, 1), "speedup": 1.0}}
+    for processes in process_counts:
+        with TransformPool(processes=processes, chunk_size=chunk_size) as pool:
+            pool.transform(records[: processes * chunk_size])  # start the workers before timing
+            start = time.perf_counter()
+            pool.transform(records)
+            rps = len(records) / (time.perf_counter() - start)
+        results[f"{processes} processes"] = {
+            "processes": processes,
+            "records_per_sec": round(rps, 1),
+            "speedup": round(rps / in_process, 2),
+        }
+    return results
+
+
+def _print_scaling(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'transform pool':34} {'records/s':>12} {'speedup':>9}")
+    print("-" * 57)
+    for name, stats in results.items():
+        print(f"{name:34} {stats['records_per_sec']:>12,.0f} {stats['speedup']:>8.2f}x")
+
+
+def _print_results(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]] = None) -> None:
+    print(f"\n{'transformer':34} {'records/s':>12} {'peak B/rec':>12} {'blocks/rec':>11}")
+    print("-" * 72)
+    for name, stats in results.items():
+        line = f"{name:34} {stats['records_per_sec']:>12,.0f} {stats['peak_bytes_per_record']:>12,.0f} {stats['retained_blocks_per_record']:>11,.1f}"
+        base = (baseline or {}).get(name)
+        if base and base.get("records_per_sec"):
+            delta = stats["records_per_sec"] / base["records_per_sec"] - 1
+            line += f"   ({delta:+.1%} vs baseline)"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark transformer throughput and allocations")
+    parser.add_argument("--records", type=int, default=2000, help="Synthetic records to generate (default: 2000)")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed (default: 7)")
+    parser.add_argument("--null-rate", type=float, default=0.15, help="Probability an optional field is null (default: 0.15)")
+    parser.add_argument("--max-media", type=int, default=40, help="Max Media items per listing (default: 40)")
+    parser.add_argument("--fixture", default=None, help="Use recorded payloads (page JSON or JSONL) instead of synthetic data")
+    parser.add_argument("--save-fixture", default=None, help="Write the generated records as an OData page JSON and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per transformer; best is reported (default: 5)")
+    parser.add_argument("--alloc-sample", type=int, default=500, help="Records traced for allocation stats (default: 500)")
+    parser.add_argument("--processes", default=None, metavar="N,N,...", help="Also measure TransformPool at these process counts, e.g. 1,2,4,8")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Records per TransformPool task (default: 50)")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    parser.add_argument("--compare", default=None, metavar="BASELINE_JSON", help="Show records/sec change against an earlier run")
+    args = parser.parse_args()
+
+    if args.fixture:
+        records = load_fixture(args.fixture)
+        source = args.fixture
+    else:
+        records = list(generate_properties(args.records, seed=args.seed, null_rate=args.null_rate, max_media=args.max_media))
+        source = f"synthetic (seed {args.seed}, null rate {args.null_rate}, max media {args.max_media})"
+
+    if args.save_fixture:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_fixture)), exist_ok=True)
+        with open(args.save_fixture, "w") as f:
+            json.dump({"value": records}, f)
+        print(f"✓ Wrote {len(records)} records to {args.save_fixture}")
+        return 0
+
+    print("=" * 60)
+    print("Transformer Micro-benchmarks")
+    print("=" * 60)
+    print(f"Input: {len(records)} records from {source}")
+    media_total = sum(len(r.get("Media") or []) for r in records)
+    print(f"Media items: {media_total} ({media_total / max(1, len(records)):.1f}/record)")
+
+    results = run_benchmarks(records, args.repeat, args.alloc_sample)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f).get("transformers")
+    _print_results(results, baseline)
+
+    scaling = None
+    if args.processes:
+        process_counts = [int(n) for n in args.processes.split(",") if n.strip()]
+        print(f"\nCPU cores: {os.cpu_count()}")
+        scaling = run_pool_scaling(records, process_counts, args.chunk_size)
+        _print_scaling(scaling)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"timestamp": datetime.utcnow().isoformat(), "records": len(records), "source": source, "repeat": args.repeat},
+                "transformers": results,
+                "transform_pool": scaling,
+            }, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Index usage report for a replayed /api request mix.
+
+Replays request paths through the API in-process (FastAPI TestClient against --database), captures every
+SQL statement they run, and EXPLAINs each one (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on
+PostgreSQL). Reports which indexes the plans use, per statement kind (count / page / other) and sort mode,
+which statements still sort without an index, and the declared indexes on the searched tables that no
+plan touched - candidates to drop. On PostgreSQL it also reports pg_stat_user_indexes scans during the
+replay.
+
+The mix is either recorded request paths (--requests FILE: one per line; uvicorn/nginx access log lines
+work too, the first /api/... path on each line is used) or load_test's synthetic search mix
+(--generate N, which --save-requests writes out so a later run replays the same input).
+
+Examples:
+  python benchmarks/load_test.py --scale 100k --scenarios search --requests 50   # seeds benchmarks/bench_100k.db
+  python benchmarks/index_usage.py --database sqlite:///benchmarks/bench_100k.db --generate 500 --save-requests mix.txt
+  python benchmarks/index_usage.py --database postgresql://localhost/allode_bench --requests access.log --output usage.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+sys.path.insert(0, os.path.join(_project_root, "backend"))
+
+# Tables whose indexes are reported (unused ones are listed as drop candidates)
+REPORTED_TABLES = ("properties", "property_details", "property_media")
+_REQUEST_PATH_RE = re.compile(r"(/api/[^\s\"']+)")
+_SQLITE_INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def load_requests(path: str) -> List[str]:
+    """Request paths from a file: one per line, or access log lines containing one."""
+    paths = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = _REQUEST_PATH_RE.search(line)
+            if match:
+                paths.append(match.group(1))
+    return paths
+
+
+def generate_requests(count: int, seed: int, scale: int) -> List[str]:
+    from benchmarks.load_test import build_search_requests
+    return build_search_requests(random.Random(seed), count, scale)
+
+
+def _statement_kind(statement: str) -> str:
+    lowered = statement.lower()
+    if "count(" in lowered:
+        return "count"
+    if "order by" in lowered and "limit" in lowered:
+        return "page"
+    return "other"
+
+
+def _sqlite_plan(cursor, statement: str, parameters: Any) -> Tuple[List[str], bool]:
+    cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters if parameters is not None else ())
+    details = [str(row[-1]) for row in cursor.fetchall()]
+    indexes = [m.group(1) for detail in details for m in _SQLITE_INDEX_RE.finditer(detail)]
+    # "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY" only sorts ties within an index order; not a full sort
+    full_sort = any("TEMP B-TREE FOR ORDER BY" in detail for detail in details)
+    return indexes, full_sort
+
+
+def _postgres_plan(cursor, statement: str, parameters: Any) -> Tuple[List[str], bool]:
+    cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    indexes: List[str] = []
+    sorted_ = False
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if "Index Name" in node:
+            indexes.append(node["Index Name"])
+        # Incremental Sort only sorts ties within an index order; not a full sort
+        if node.get("Node Type") == "Sort":
+            sorted_ = True
+        stack.extend(node.get("Plans", ()))
+    return indexes, sorted_
+
+
+def _postgres_index_scans(engine) -> Dict[str, int]:
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT indexrelname, idx_scan FROM pg_stat_user_indexes WHERE relname = ANY(:tables)"
+        ), {"tables": list(REPORTED_TABLES)})
+        return {name: scans for name, scans in rows}
+
+
+def declared_indexes(engine) -> Dict[str, str]:
+    """index name -> table, for REPORTED_TABLES as they exist in the database."""
+    from sqlalchemy import inspect
+    inspector = inspect(engine)
+    indexes = {}
+    for table in REPORTED_TABLES:
+        if inspector.has_table(table):
+            for index in inspector.get_indexes(table):
+                indexes[index["name"]] = table
+    return indexes
+
+
+def replay(database_url: str, paths: List[str]) -> Dict[str, Any]:
+    os.environ["DATABASE_URL"] = database_url
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    import main
+
+    captured: List[Tuple[str, Any]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    engine = main.db_router.primary_engine
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        raise SystemExit(f"Unsupported dialect for EXPLAIN: {dialect}")
+    scans_before = _postgres_index_scans(engine) if dialect == "postgresql" else {}
+
+    client = TestClient(main.app)
+    event.listen(Engine, "before_cursor_execute", _capture)
+    statements: List[Dict[str, Any]] = []
+    errors = 0
+    start = time.perf_counter()
+    try:
+        for path in paths:
+            captured.clear()
+            response = client.get(path)
+            if response.status_code != 200:
+                errors += 1
+            sort_by = parse_qs(urlsplit(path).query).get("sort_by", ["-"])[0]
+            for statement, parameters in captured:
+                statements.append({
+                    "path": path, "sort_by": sort_by, "kind": _statement_kind(statement),
+                    "statement": statement, "parameters": parameters,
+                })
+    finally:
+        event.remove(Engine, "before_cursor_execute", _capture)
+    replay_seconds = time.perf_counter() - start
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for entry in statements:
+            plan = _sqlite_plan if dialect == "sqlite" else _postgres_plan
+            entry["indexes"], entry["sorted"] = plan(cursor, entry.pop("statement"), entry.pop("parameters"))
+        cursor.close()
+    finally:
+        raw.close()
+
+    scans = {}
+    if dialect == "postgresql":
+        scans_after = _postgres_index_scans(engine)
+        scans = {name: count - scans_before.get(name, 0) for name, count in scans_after.items()}
+    return {
+        "dialect": dialect, "statements": statements, "errors": errors,
+        "replay_seconds": replay_seconds, "declared": declared_indexes(engine), "pg_index_scans": scans,
+    }
+
+
+def summarize(result: Dict[str, Any], requests_count: int) -> Dict[str, Any]:
+    usage: Dict[str, Counter] = defaultdict(Counter)  # index -> kind -> statements
+    sorts_by_index: Dict[str, Counter] = defaultdict(Counter)  # index -> sort_by (page statements)
+    unindexed_sorts: Counter = Counter()  # sort_by -> page statements that sort
+    kinds: Counter = Counter()
+    for entry in result["statements"]:
+        kinds[entry["kind"]] += 1
+        for name in set(entry["indexes"]):
+            usage[name][entry["kind"]] += 1
+            if entry["kind"] == "page":
+                sorts_by_index[name][entry["sort_by"]] += 1
+        if entry["kind"] == "page" and entry["sorted"]:
+            unindexed_sorts[entry["sort_by"]] += 1
+    declared = result["declared"]
+    scans = result["pg_index_scans"]
+    unused = sorted(
+        name for name in declared
+        if name not in usage and not name.startswith("sqlite_autoindex") and not scans.get(name)
+    )
+    return {
+        "requests": requests_count,
+        "errors": result["errors"],
+        "replay_seconds": round(result["replay_seconds"], 2),
+        "statements": dict(kinds),
+        "index_usage": {
+            name: {"table": declared.get(name), "statements": dict(counts), "page_sorts": dict(sorts_by_index[name])}
+            for name, counts in sorted(usage.items(), key=lambda item: -sum(item[1].values()))
+        },
+        "unindexed_sorts": dict(unindexed_sorts),
+        "unused_indexes": [{"name": name, "table": declared[name]} for name in unused],
+        "pg_index_scans": scans,
+    }
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(f"\n{summary['requests']} requests ({summary['errors']} errors) in {summary['replay_seconds']}s, "
+          f"statements: {summary['statements']}")
+    print("\nIndexes used (statements by kind; page statements by sort_by):")
+    for name, usage in summary["index_usage"].items():
+        sorts = ", ".join(f"{mode} {count}" for mode, count in sorted(usage["page_sorts"].items()))
+        print(f"  {name:40} {usage['table'] or '?':18} {usage['statements']}" + (f"  [{sorts}]" if sorts else ""))
+    if summary["unindexed_sorts"]:
+        print("\nPage queries sorted without an index (by sort_by):")
+        for mode, count in sorted(summary["unindexed_sorts"].items()):
+            print(f"  {mode:20} {count}")
+    else:
+        print("\n✓ Every page query read its sort order from an index")
+    if summary["unused_indexes"]:
+        print("\nIndexes no replayed statement used (drop candidates, if this mix is representative):")
+        for entry in summary["unused_indexes"]:
+            print(f"  {entry['name']:40} {entry['table']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay an /api request mix and report which indexes its SQL uses.")
+    parser.add_argument("--database", default=None, help="Database URL (default: $DATABASE_URL)")
+    parser.add_argument("--requests", default=None, metavar="FILE", help="Recorded request paths or access log to replay")
+    parser.add_argument("--generate", type=int, default=500, help="Synthetic search requests when --requests is not given (default: 500)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic mix (default: 42)")
+    parser.add_argument("--save-requests", default=None, metavar="FILE", help="Write the replayed request paths here")
+    parser.add_argument("--output", default=None, help="Write the report JSON here")
+    args = parser.parse_args()
+
+    database_url = args.database or os.getenv("DATABASE_URL")
+    if not database_url:
+        parser.error("--database or DATABASE_URL is required")
+
+    if args.requests:
+        paths = load_requests(args.requests)
+        print(f"Replaying {len(paths):,} recorded requests from {args.requests}")
+    else:
+        from sqlalchemy import func
+        from database.models import get_engine, get_session, Property
+        session = get_session(get_engine(database_url))
+        try:
+            scale = session.query(func.count(Property.id)).scalar() or 1
+        finally:
+            session.close()
+        paths = generate_requests(args.generate, args.seed, scale)
+        print(f"Replaying {len(paths):,} synthetic search requests ({scale:,} listings)")
+    if not paths:
+        print("✗ No request paths to replay")
+        return 1
+    if args.save_requests:
+        with open(args.save_requests, "w", encoding="utf-8") as f:
+            f.write("\n".join(paths) + "\n")
+
+    summary = summarize(replay(database_url, paths), len(paths))
+    print_report(summary)
+
+    if args.output:
+        summary["database"] = database_url.split("@")[-1]
+        summary["recorded_at"] = datetime.utcnow().isoformat()
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+HTTP load test for the search, autocomplete and detail endpoints.
+
+Seeds a local SQLite or PostgreSQL database with synthetic NWMLS-shaped listings (10k/100k/500k),
+starts the API with uvicorn against it (or targets --url), replays a deterministic request mix and
+reports throughput, p50/p95/p99 latency and SQL statements per request (read from the
+Server-Timing header). Results are saved as JSON; --compare checks them against a baseline run
+and exits non-zero on regression so it can be used as a CI gate.
+
+Examples:
+  python benchmarks/load_test.py --scale 10k
+  python benchmarks/load_test.py --scale 100k --database postgresql://localhost/allode_bench --output after.json
+  python benchmarks/load_test.py --scale 10k --compare before.json --max-regression 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from database.models import init_database, get_session, Property, PropertyDetail, PropertyMedia, AppMetadata, SEARCH_SORTS
+from database.bulk import clear_listing_state, insert_properties
+from services.property_transformer import transform_property, transform_media
+from benchmarks.synthetic import CITIES, STREET_NAMES, generate_properties
+
+SCALES = {"10k": 10_000, "100k": 100_000, "500k": 500_000}
+SEED_CHUNK = 1000
+SORT_MODES = list(SEARCH_SORTS)
+HOME_TYPES = ["Single Family", "Condo", "Multi Family", "Manufactured", "Land"]
+STATUSES = ["For Sale", "Pending", "Sold"]
+_QUERY_COUNT_RE = re.compile(r'db;desc="(\d+) queries";dur=([\d.]+)')
+
+
+def _parse_scale(value: str) -> int:
+    value = value.strip().lower()
+    if value in SCALES:
+        return SCALES[value]
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def seed_database(database_url: str, scale: int, seed: int, reseed: bool = False) -> None:
+    """Fill the database with `scale` synthetic listings (skipped if it already holds this seed/scale)."""
+    engine = init_database(database_url)
+    session = get_session(engine)
+    marker = f"{scale}:{seed}"
+    try:
+        row = session.query(AppMetadata).filter_by(key="benchmark_seed").first()
+        if row and row.value == marker and not reseed:
+            print(f"✓ Database already seeded with {scale:,} synthetic listings (seed {seed})")
+            return
+
+        print(f"Seeding {scale:,} synthetic listings (seed {seed})...")
+        session.query(PropertyMedia).delete()
+        session.query(PropertyDetail).delete()
+        session.query(Property).delete()
+        clear_listing_state(session)
+        session.commit()
+
+        start = time.perf_counter()
+        properties: List[Dict[str, Any]] = []
+        media: List[Dict[str, Any]] = []
+        inserted = 0
+        for raw in generate_properties(scale, seed=seed):
+            properties.append(transform_property(raw))
+            media.extend(transform_media(raw))
+            if len(properties) >= SEED_CHUNK:
+                insert_properties(session, properties, media)
+                session.commit()
+                inserted += len(properties)
+                properties, media = [], []
+                if inserted % (SEED_CHUNK * 20) == 0:
+                    print(f"  {inserted:,} / {scale:,} ({time.perf_counter() - start:.0f}s)")
+        if properties:
+            insert_properties(session, properties, media)
+            session.commit()
+
+        row = session.query(AppMetadata).filter_by(key="benchmark_seed").first()
+        if row:
+            row.value = marker
+        else:
+            session.add(AppMetadata(key="benchmark_seed", value=marker))
+        session.commit()
+        print(f"✓ Seeded {scale:,} listings in {time.perf_counter() - start:.0f}s")
+    finally:
+        session.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int = 1) -> Tuple[subprocess.Popen, str]:
+    """Run the API under uvicorn against database_url; returns (process, base_url) once it answers."""
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=_project_root,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API server exited during startup")
+        try:
+            if requests.get(base_url + "/", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("API server did not start within 60s")
+
+
+def build_search_requests(rng: random.Random, count: int, scale: int, page_size: int = 20) -> List[str]:
+    """Filter and sort mix for /api/properties, including deep pages."""
+    max_page = max(1, scale // page_size)
+    paths = []
+    for _ in range(count):
+        params: Dict[str, Any] = {"sort_by": rng.choice(SORT_MODES), "page_size": page_size}
+        roll = rng.random()
+        if roll < 0.6:
+            params["page"] = 1
+        elif roll < 0.85:
+            params["page"] = rng.randint(2, 10)
+        else:
+            params["page"] = rng.randint(max(1, max_page // 2), max_page)  # deep page
+        if rng.random() < 0.5:
+            params["city"] = rng.choice(CITIES)[0]
+        if rng.random() < 0.4:
+            params["min_price"] = rng.choice([200_000, 400_000, 600_000])
+        if rng.random() < 0.4:
+            params["max_price"] = rng.choice([800_000, 1_200_000, 2_000_000])
+        if rng.random() < 0.4:
+            params["bedrooms"] = rng.randint(1, 4)
+        if rng.random() < 0.2:
+            params["bathrooms"] = rng.randint(1, 3)
+        if rng.random() < 0.4:
+            params["home_type"] = ",".join(rng.sample(HOME_TYPES, rng.randint(1, 2)))
+        if rng.random() < 0.6:
+            params["status"] = rng.choice(["For Sale", "For Sale,Pending", "Sold"])
+        if rng.random() < 0.05:
+            params["zipcode"] = rng.choice(rng.choice(CITIES)[1])
+        paths.append("/api/properties?" + "&".join(f"{k}={requests.utils.quote(str(v))}" for k, v in params.items()))
+    return paths
+
+
+def build_autocomplete_requests(rng: random.Random, count: int) -> List[str]:
+    """Keystroke sequences: each typed term contributes its prefixes of length 2..n in order."""
+    paths: List[str] = []
+    while len(paths) < count:
+        kind = rng.random()
+        if kind < 0.45:
+            term = rng.choice(CITIES)[0]
+        elif kind < 0.75:
+            term = f"{rng.randint(100, 29999)} {rng.choice(STREET_NAMES)}"
+        elif kind < 0.9:
+            term = rng.choice(rng.choice(CITIES)[1])
+        else:
+            term = rng.choice(["Wa", "WA", "Washington"])
+        for length in range(2, len(term) + 1):
+            paths.append("/api/autocomplete?q=" + requests.utils.quote(term[:length]))
+    return paths[:count]
+
+
+def build_detail_requests(rng: random.Random, count: int, scale: int) -> List[str]:
+    return [f"/api/properties/NWM{2_000_000 + rng.randrange(scale)}" for _ in range(count)]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def run_scenario(base_url: str, paths: List[str], concurrency: int, warmup: int = 20) -> Dict[str, Any]:
+    """Replay paths with `concurrency` client threads; returns latency/throughput/query-count stats."""
+    local = threading.local()
+
+    def _session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def _one(path: str) -> Tuple[float, int, Optional[int], Optional[float]]:
+        start = time.perf_counter()
+        try:
+            response = _session().get(base_url + path, timeout=60)
+            status = response.status_code
+            _ = response.content
+            match = _QUERY_COUNT_RE.search(response.headers.get("Server-Timing", ""))
+        except requests.RequestException:
+            return time.perf_counter() - start, 0, None, None
+        elapsed = time.perf_counter() - start
+        if match:
+            return elapsed, status, int(match.group(1)), float(match.group(2))
+        return elapsed, status, None, None
+
+    for path in paths[:warmup]:
+        _one(path)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(_one, paths))
+    wall = time.perf_counter() - wall_start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = sum(1 for r in results if not (200 <= r[1] < 400))
+    query_counts = [r[2] for r in results if r[2] is not None]
+    db_ms = [r[3] for r in results if r[3] is not None]
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(results) / wall, 2) if wall > 0 else None,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50": round(_percentile(latencies, 50), 2) if latencies else None,
+            "p95": round(_percentile(latencies, 95), 2) if latencies else None,
+            "p99": round(_percentile(latencies, 99), 2) if latencies else None,
+            "max": round(latencies[-1], 2) if latencies else None,
+        },
+        "queries_per_request": round(sum(query_counts) / len(query_counts), 2) if query_counts else None,
+        "db_ms_per_request": round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Return a list of regression messages (empty when current is within max_regression of baseline)."""
+    failures = []
+    for name, cur in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        base_p95, cur_p95 = base["latency_ms"]["p95"], cur["latency_ms"]["p95"]
+        if base_p95 and cur_p95 and cur_p95 > base_p95 * (1 + max_regression):
+            failures.append(f"{name}: p95 {cur_p95:.1f}ms vs baseline {base_p95:.1f}ms (+{(cur_p95 / base_p95 - 1) * 100:.0f}%)")
+        base_rps, cur_rps = base["throughput_rps"], cur["throughput_rps"]
+        if base_rps and cur_rps and cur_rps < base_rps * (1 - max_regression):
+            failures.append(f"{name}: throughput {cur_rps:.1f} req/s vs baseline {base_rps:.1f} (-{(1 - cur_rps / base_rps) * 100:.0f}%)")
+        base_q, cur_q = base.get("queries_per_request"), cur.get("queries_per_request")
+        if base_q is not None and cur_q is not None and cur_q > base_q:
+            failures.append(f"{name}: {cur_q} queries/request vs baseline {base_q}")
+    return failures
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=_project_root, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test /api/properties, /api/autocomplete and /api/properties/{id}")
+    parser.add_argument("--scale", default="10k", help="Synthetic listings to seed: 10k, 100k, 500k or a number (default: 10k)")
+    parser.add_argument("--database", default=None, help="Database URL (default: SQLite file benchmarks/bench_<scale>.db)")
+    parser.add_argument("--reseed", action="store_true", help="Wipe and reseed even if the database already holds this scale")
+    parser.add_argument("--url", default=None, help="Target an already running API instead of starting uvicorn")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads (default: 8)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario (default: 500)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for data and request mix (default: 42)")
+    parser.add_argument("--scenarios", default="search,autocomplete,detail", help="Comma-separated scenarios to run")
+    parser.add_argument("--output", default=None, help="Write results JSON here (default: benchmarks/results/load_<scale>_<time>.json)")
+    parser.add_argument("--compare", default=None, metavar="BASELINE_JSON", help="Fail if results regress against this run")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Allowed p95/throughput regression (default: 0.10)")
+    args = parser.parse_args()
+
+    scale = _parse_scale(args.scale)
+    database_url = args.database or f"sqlite:///{os.path.join(_project_root, 'benchmarks', f'bench_{scale}.db')}"
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+    print("=" * 60)
+    print("API Load Test")
+    print("=" * 60)
+    print(f"Database: {database_url.split('@')[-1]}")
+    seed_database(database_url, scale, args.seed, reseed=args.reseed)
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_server(database_url, workers=args.server_workers)
+        print(f"✓ API started at {base_url}")
+
+    rng = random.Random(args.seed)
+    builders = {
+        "search": lambda: build_search_requests(rng, args.requests, scale),
+        "autocomplete": lambda: build_autocomplete_requests(rng, args.requests),
+        "detail": lambda: build_detail_requests(rng, args.requests, scale),
+    }
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_commit": _git_commit(),
+            "scale": scale,
+            "dialect": database_url.split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": {},
+    }
+    try:
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if name not in builders:
+                print(f"⚠️  Unknown scenario '{name}', skipping")
+                continue
+            print(f"\nRunning {name} ({args.requests} requests, concurrency {args.concurrency})...")
+            stats = run_scenario(base_url, builders[name](), args.concurrency)
+            results["scenarios"][name] = stats
+            lat = stats["latency_ms"]
+            print(f"  {stats['throughput_rps']} req/s | p50 {lat['p50']}ms p95 {lat['p95']}ms p99 {lat['p99']}ms"
+                  f" | {stats['queries_per_request']} queries/req | errors {stats['errors']}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+
+    output = args.output or os.path.join(
+        _project_root, "benchmarks", "results", f"load_{scale}_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failures = compare_results(results, baseline, args.max_regression)
+        if failures:
+            print(f"\n✗ Regression against {args.compare}:")
+            for failure in failures:
+                print(f"  - {failure}")
+            return 1
+        print(f"✓ No regression against {args.compare} (threshold {args.max_regression:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Synthetic NWMLS-shaped MLS Grid OData Property payloads for benchmarks.
+Records look like the API's `value[]` items (with $expand=Media,UnitTypes): nulls, list-valued
+fields, ISO timestamps with Z suffix, and variable-length Media arrays. Output is deterministic
+for a given seed, so benchmark runs are reproducible.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+# (city, postal codes, latitude, longitude, weight)
+CITIES = [
+    ("Seattle", ["98101", "98103", "98105", "98115", "98117", "98122"], 47.61, -122.33, 30),
+    ("Bellevue", ["98004", "98006", "98007", "98008"], 47.61, -122.20, 10),
+    ("Tacoma", ["98402", "98403", "98405", "98406"], 47.25, -122.44, 10),
+    ("Redmond", ["98052", "98053"], 47.67, -122.12, 6),
+    ("Kirkland", ["98033", "98034"], 47.68, -122.21, 6),
+    ("Everett", ["98201", "98203", "98204"], 47.98, -122.20, 6),
+    ("Spokane", ["99201", "99203", "99205"], 47.66, -117.43, 6),
+    ("Olympia", ["98501", "98502"], 47.04, -122.90, 4),
+    ("Bellingham", ["98225", "98226"], 48.75, -122.48, 4),
+    ("Renton", ["98055", "98056", "98059"], 47.48, -122.22, 5),
+    ("Kent", ["98030", "98031", "98032"], 47.38, -122.23, 4),
+    ("Sammamish", ["98074", "98075"], 47.61, -122.04, 3),
+    ("Seatac", ["98188", "98198"], 47.44, -122.30, 2),
+    ("Wenatchee", ["98801"], 47.42, -120.31, 2),
+    ("Port Angeles", ["98362", "98363"], 48.12, -123.43, 2),
+]
+
+STREET_NAMES = [
+    "Main", "Pine", "Spring", "Queen Anne", "Madison", "Union", "Cedar", "Maple", "Lake Washington",
+    "Rainier", "Aurora", "Greenwood", "Roosevelt", "Fremont", "Meridian", "Evergreen", "Alki", "Summit",
+]
+STREET_TYPES = ["Street", "Avenue", "Drive", "Lane", "Court", "Place", "Road", "Way", "Boulevard"]
+DIRECTIONS = ["", "", "", "N", "S", "NE", "NW", "SE", "SW", "E", "W"]
+
+# (PropertyType, PropertySubType, weight)
+PROPERTY_TYPES = [
+    ("Residential", "Single Family Residence", 55),
+    ("Residential", "Condominium", 15),
+    ("Residential Income", "Multi Family", 7),
+    ("Residential", "Manufactured On Land", 4),
+    ("Manufactured In Park", "Manufactured Home", 2),
+    ("Land", "Vacant Land", 8),
+    ("Farm", "Farm & Ranch", 2),
+    ("Commercial Sale", "Commercial Industrial", 2),
+    ("Residential", "Residential", 3),
+    ("Business Opportunity", "Business Opportunity", 1),
+    ("Residential", "Timeshare", 1),
+]
+
+# (MlsStatus, StandardStatus, weight)
+STATUSES = [
+    ("Active", "Active", 55),
+    ("Contingent", "Active Under Contract", 8),
+    ("Pending", "Pending", 14),
+    ("Pending Inspection", "Pending", 5),
+    ("Pending Feasibility", "Pending", 2),
+    ("Sold", "Closed", 14),
+    ("Cancelled", "Canceled", 1),
+    ("Expired", "Expired", 1),
+]
+
+APPLIANCES = ["Dishwasher(s)", "Dryer(s)", "Microwave(s)", "Refrigerator(s)", "Stove(s)/Range(s)", "Washer(s)", "Disposal"]
+FLOORING = ["Ceramic Tile", "Hardwood", "Laminate", "Vinyl Plank", "Wall to Wall Carpet", "Concrete"]
+HEATING = ["Forced Air", "Heat Pump", "Baseboard", "Radiant", "Ductless", "Fireplace"]
+EXTERIOR = ["Brick", "Cement Planked", "Wood", "Vinyl", "Stone", "Metal/Vinyl"]
+VIEWS = ["Mountain(s)", "Territorial", "Sound", "Lake", "City", "Bay", "Ocean"]
+SECURITY = ["Security System", "Smoke Detector(s)", "Fire Sprinkler System"]
+UTILITIES = ["Cable Connected", "High Speed Internet", "Natural Gas Available", "Sewer Connected"]
+PARKING = ["Driveway", "Attached Garage", "Detached Garage", "Off Street", "RV Parking"]
+LOT_FEATURES = ["Curbs", "Paved", "Sidewalk", "Cul-De-Sac", "Dead End Street", "Corner Lot"]
+INTERIOR = ["Bath Off Primary", "Dining Room", "Walk-In Closet(s)", "Fireplace", "Vaulted Ceiling(s)", "Loft"]
+LISTING_TERMS = ["Cash Out", "Conventional", "FHA", "VA Loan", "Owner Financing"]
+MEDIA_CATEGORIES = ["Photo", "Photo", "Photo", "Photo", "Floor Plan", "Virtual Tour"]
+REMARK_WORDS = (
+    "light filled home with updated kitchen quartz counters stainless appliances hardwood floors "
+    "spacious primary suite walk-in closet fenced backyard patio garden close to parks schools "
+    "transit shopping dining minutes to downtown freshly painted new roof covered deck views "
+    "vaulted ceilings gas fireplace bonus room office ample storage quiet street move-in ready"
+).split()
+
+BASE_TIMESTAMP = datetime(2025, 1, 1)
+
+
+def _weighted(rng: random.Random, items: List[tuple]) -> tuple:
+    return rng.choices(items, weights=[item[-1] for item in items], k=1)[0]
+
+
+def _iso(dt: datetime, with_ms: bool = True) -> str:
+    """ISO timestamp with Z suffix, as MLS Grid returns them."""
+    if with_ms:
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _maybe(rng: random.Random, value: Any, null_rate: float) -> Any:
+    """Return None with probability null_rate (the API omits or nulls many optional fields)."""
+    return None if rng.random() < null_rate else value
+
+
+def _sample_list(rng: random.Random, choices: List[str], low: int = 1, high: int = 4) -> List[str]:
+    return rng.sample(choices, k=min(len(choices), rng.randint(low, high)))
+
+
+def _remarks(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(REMARK_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _media(rng: random.Random, listing_key: str, count: int, modified: datetime) -> List[Dict[str, Any]]:
+    preferred_idx = 0 if rng.random() < 0.9 else rng.randrange(count) if count else 0
+    media = []
+    for idx in range(count):
+        media_key = f"{listing_key}-m{idx}"
+        media.append({
+            "MediaKey": media_key,
+            "ResourceRecordKey": listing_key,
+            "MediaURL": f"https://media.mlsgrid.com/token={rng.getrandbits(64):016x}/{media_key}.jpeg",
+            "Order": idx,
+            "PreferredPhotoYN": idx == preferred_idx,
+            "ImageWidth": rng.choice([1024, 1280, 1600, 2048]),
+            "ImageHeight": rng.choice([683, 768, 960, 1365]),
+            "MediaCategory": rng.choice(MEDIA_CATEGORIES),
+            "MediaModificationTimestamp": _iso(modified - timedelta(minutes=rng.randint(0, 600))),
+            "ShortDescription": _maybe(rng, rng.choice(["Living Room", "Kitchen", "Primary Bedroom", "Exterior", "View"]), 0.5),
+        })
+    return media
+
+
+def _unit_types(rng: random.Random, listing_key: str) -> List[Dict[str, Any]]:
+    units = []
+    for idx in range(rng.randint(2, 6)):
+        units.append({
+            "UnitTypeKey": f"{listing_key}-u{idx}",
+            "NWM_UnitName": f"Unit {idx + 1}",
+            "NWM_UnitDishwasher": rng.choice(["Yes", "No", None]),
+            "NWM_UnitRangeOven": rng.choice(["Yes", "No"]),
+            "NWM_UnitRefrigerator": rng.choice(["Yes", "No"]),
+            "NWM_UnitWasherDryer": rng.choice(["Yes", "No", None]),
+            "UnitTypeActualRent": rng.choice([None, rng.randrange(900, 3500, 25)]),
+            "NWM_UnitSquareFeet": rng.randrange(400, 1500, 10),
+            "UnitTypeBathsTotal": rng.choice([1, 1, 1.5, 2]),
+            "UnitTypeBedsTotal": rng.randint(0, 3),
+            "NWM_UnitTenantDescription": _maybe(rng, "Month to month", 0.6),
+            "NWM_UnitTypeOfUse": rng.choice(["Residential", "Residential", "Commercial"]),
+            "NWM_UnitLeaseExpirationDate": _maybe(rng, _iso(BASE_TIMESTAMP + timedelta(days=rng.randint(30, 700)), False), 0.5),
+        })
+    return units
+
+
+def generate_property(index: int, seed: int = 0, null_rate: float = 0.15, max_media: int = 40) -> Dict[str, Any]:
+    """One synthetic Property record. The same (index, seed) always yields the same record."""
+    rng = random.Random(seed * 1_000_003 + index)
+    listing_id = f"NWM{2_000_000 + index}"
+    city, zips, lat, lng, _ = _weighted(rng, CITIES)
+    postal_code = rng.choice(zips)
+    property_type, sub_type, _ = _weighted(rng, PROPERTY_TYPES)
+    mls_status, standard_status, _ = _weighted(rng, STATUSES)
+    is_land = property_type == "Land"
+
+    street_number = str(rng.randint(100, 29999))
+    direction = rng.choice(DIRECTIONS)
+    street_name = f"{rng.choice(STREET_NAMES)} {rng.choice(STREET_TYPES)}" + (f" {direction}" if direction else "")
+    unit = f" Unit {rng.choice('ABCD')}{rng.randint(1, 12)}" if sub_type == "Condominium" else ""
+    unparsed = f"{street_number} {street_name}{unit}, {city}, WA {postal_code}"
+    # The feed is not perfectly normalized; some addresses have stray spaces before commas
+    if rng.random() < 0.05:
+        unparsed = unparsed.replace(",", " ,", 1)
+
+    bedrooms = None if is_land else rng.choice([1, 2, 2, 3, 3, 3, 4, 4, 5, 6])
+    baths = None if is_land else rng.choice([1.0, 1.5, 1.75, 2.0, 2.25, 2.5, 2.75, 3.0, 3.5])
+    living_area = None if is_land else rng.randrange(450, 6000, 10)
+    list_price = rng.randrange(150_000, 3_500_000, 1000) if rng.random() > 0.01 else None
+
+    modified = BASE_TIMESTAMP + timedelta(minutes=index * 7 + rng.randint(0, 5))
+    on_market = modified - timedelta(days=rng.randint(0, 240))
+    media_count = 0 if rng.random() < 0.03 else rng.randint(1, max(1, max_media))
+
+    record: Dict[str, Any] = {
+        "@odata.id": f"https://api.mlsgrid.com/v2/Property('{listing_id}')",
+        "ListingId": listing_id,
+        "ListingKey": listing_id,
+        "OriginatingSystemName": "nwmls",
+        "SourceSystemName": "nwmls",
+        "MlgCanView": True,
+        "MlgCanUse": ["IDX", "VOW"],
+        "ListPrice": list_price,
+        "OriginalListPrice": _maybe(rng, list_price, 0.3),
+        "StreetNumber": street_number,
+        "StreetName": street_name,
+        "City": city,
+        "StateOrProvince": "WA",
+        "PostalCode": postal_code,
+        "UnparsedAddress": unparsed,
+        "PropertyType": property_type,
+        "PropertySubType": sub_type,
+        "BedroomsTotal": bedrooms,
+        "NWM_Bathrooms": baths,
+        "BathroomsFull": None if baths is None else int(baths),
+        "BathroomsHalf": None if baths is None else int((baths % 1) >= 0.5),
+        "LivingArea": living_area,
+        "NWM_CalculatedSquareFootage": _maybe(rng, living_area, 0.4),
+        "LotSizeSquareFeet": _maybe(rng, float(rng.randrange(1500, 90000, 10)), null_rate),
+        "LotSizeAcres": _maybe(rng, round(rng.uniform(0.05, 10), 2), null_rate),
+        "YearBuilt": None if is_land else rng.randint(1900, 2025),
+        "StandardStatus": standard_status,
+        "MlsStatus": mls_status,
+        "Latitude": round(lat + rng.uniform(-0.08, 0.08), 6),
+        "Longitude": round(lng + rng.uniform(-0.08, 0.08), 6),
+        "PublicRemarks": _remarks(rng, rng.randint(40, 160)),
+        "PrivateRemarks": _maybe(rng, _remarks(rng, rng.randint(5, 40)), 0.4),
+        "ListAgentFullName": f"Agent {rng.randint(1, 5000)}",
+        "ListAgentEmail": _maybe(rng, f"agent{rng.randint(1, 5000)}@example.com", null_rate),
+        "ListAgentPhone": _maybe(rng, f"206-555-{rng.randint(0, 9999):04d}", null_rate),
+        "ListOfficeName": f"Brokerage {rng.randint(1, 400)}",
+        "ListOfficePhone": _maybe(rng, f"425-555-{rng.randint(0, 9999):04d}", null_rate),
+        "ListingContractDate": _iso(on_market - timedelta(days=rng.randint(0, 10)), False),
+        "OnMarketDate": _iso(on_market, False),
+        "ModificationTimestamp": _iso(modified),
+        "OriginatingSystemModificationTimestamp": _iso(modified - timedelta(seconds=rng.randint(1, 90))),
+        "PhotosChangeTimestamp": _iso(modified - timedelta(hours=rng.randint(0, 48))),
+        "StatusChangeTimestamp": _iso(modified - timedelta(days=rng.randint(0, 30))),
+        "CumulativeDaysOnMarket": rng.randint(0, 300),
+        "Appliances": _maybe(rng, _sample_list(rng, APPLIANCES, 2, 6), null_rate),
+        "ArchitecturalStyle": _maybe(rng, [rng.choice(["Craftsman", "Modern", "Colonial", "Traditional", "Contemporary"])], null_rate),
+        "AttachedGarageYN": _maybe(rng, rng.random() < 0.6, null_rate),
+        "BuildingName": _maybe(rng, f"The {rng.choice(STREET_NAMES)}", 0.8),
+        "CarportYN": _maybe(rng, rng.random() < 0.1, null_rate),
+        "CoveredSpaces": _maybe(rng, rng.randint(0, 3), null_rate),
+        "ElementarySchool": _maybe(rng, f"{rng.choice(STREET_NAMES)} Elementary", null_rate),
+        "HighSchool": _maybe(rng, f"{rng.choice(STREET_NAMES)} High", null_rate),
+        "HighSchoolDistrict": _maybe(rng, f"{city} School District", null_rate),
+        "ExteriorFeatures": _maybe(rng, _sample_list(rng, EXTERIOR), null_rate),
+        "FireplaceYN": _maybe(rng, rng.random() < 0.5, null_rate),
+        "FireplacesTotal": _maybe(rng, rng.randint(0, 3), null_rate),
+        "Flooring": _maybe(rng, _sample_list(rng, FLOORING), null_rate),
+        "FoundationDetails": _maybe(rng, [rng.choice(["Poured Concrete", "Slab", "Block"])], null_rate),
+        "GarageSpaces": _maybe(rng, rng.randint(0, 4), null_rate),
+        "GarageYN": _maybe(rng, rng.random() < 0.7, null_rate),
+        "Heating": _maybe(rng, _sample_list(rng, HEATING, 1, 3), null_rate),
+        "HeatingYN": _maybe(rng, True, null_rate),
+        "Cooling": _maybe(rng, _sample_list(rng, ["Central Air", "Heat Pump", "Ductless HP-Mini Split"], 1, 2), 0.5),
+        "CoolingYN": _maybe(rng, rng.random() < 0.4, null_rate),
+        "InteriorFeatures": _maybe(rng, _sample_list(rng, INTERIOR, 2, 5), null_rate),
+        "InternetAddressDisplayYN": rng.random() < 0.97,
+        "InternetEntireListingDisplayYN": True,
+        "InternetAutomatedValuationDisplayYN": _maybe(rng, rng.random() < 0.8, null_rate),
+        "Levels": _maybe(rng, rng.choice(["One", "Two", "Multi/Split", "Three Or More"]), null_rate),
+        "ListingTerms": _maybe(rng, _sample_list(rng, LISTING_TERMS, 1, 4), null_rate),
+        "LotFeatures": _maybe(rng, _sample_list(rng, LOT_FEATURES), null_rate),
+        "NewConstructionYN": rng.random() < 0.08,
+        "ParcelNumber": _maybe(rng, f"{rng.randint(1000000000, 9999999999)}", null_rate),
+        "AssociationFee": _maybe(rng, float(rng.randrange(50, 1200, 5)), 0.6),
+        "AssociationYN": _maybe(rng, rng.random() < 0.3, null_rate),
+        "BuyerBrokerageCompensation": _maybe(rng, rng.choice(["2.5", "3", "2"]), null_rate),
+        "BuyerBrokerageCompensationType": _maybe(rng, "%", null_rate),
+        "ParkingFeatures": _maybe(rng, _sample_list(rng, PARKING, 1, 3), null_rate),
+        "ParkingTotal": _maybe(rng, rng.randint(0, 6), null_rate),
+        "Possession": _maybe(rng, rng.choice(["Closing", "Negotiable", "Sub. Tenant's Rights"]), null_rate),
+        "PowerProductionType": _maybe(rng, "Solar", 0.95),
+        "PropertyCondition": _maybe(rng, rng.choice(["Good", "Very Good", "Remodeled", "Fixer"]), null_rate),
+        "Roof": _maybe(rng, [rng.choice(["Composition", "Metal", "Torch Down", "Cedar Shake"])], null_rate),
+        "SecurityFeatures": _maybe(rng, _sample_list(rng, SECURITY, 1, 2), 0.5),
+        "Sewer": _maybe(rng, rng.choice(["Sewer Connected", "Septic Tank", "Available"]), null_rate),
+        "SpecialListingConditions": _maybe(rng, ["Standard"], null_rate),
+        "SubdivisionName": _maybe(rng, rng.choice(["Ballard", "Capitol Hill", "Wallingford", "Crossroads", "Downtown"]), null_rate),
+        "TaxAnnualAmount": _maybe(rng, float(rng.randrange(800, 30000, 1)), null_rate),
+        "TaxYear": _maybe(rng, 2024, null_rate),
+        "Topography": _maybe(rng, [rng.choice(["Level", "Sloped", "Partial Slope"])], null_rate),
+        "Utilities": _maybe(rng, _sample_list(rng, UTILITIES, 1, 4), null_rate),
+        "Vegetation": _maybe(rng, [rng.choice(["Fruit Trees", "Garden Space", "Wooded"])], 0.5),
+        "View": _maybe(rng, _sample_list(rng, VIEWS, 1, 2), 0.5),
+        "WaterSource": _maybe(rng, rng.choice(["Public", "Individual Well", "Shared Well"]), null_rate),
+        "WaterfrontYN": rng.random() < 0.05,
+        "ZoningDescription": _maybe(rng, rng.choice(["SF 5000", "NR3", "LR2", "R-6", "RA-5"]), null_rate),
+        "NWM_Offers": _maybe(rng, rng.choice(["Review Date", "Seller Reserves Right"]), null_rate),
+        "NWM_OffersReviewDate": _maybe(rng, _iso(on_market + timedelta(days=7), False), 0.7),
+        "NWM_SOCComments": _maybe(rng, _remarks(rng, 12), 0.8),
+        "NWM_PowerCompany": _maybe(rng, rng.choice(["PSE", "Seattle City Light", "Tacoma Power"]), null_rate),
+        "NWM_PreliminaryTitleOrdered": _maybe(rng, rng.choice(["Yes", "No"]), null_rate),
+        "NWM_SellerDisclosure": _maybe(rng, "Provided", null_rate),
+        "NWM_SeniorExemption": _maybe(rng, "No", null_rate),
+        "NWM_SewerCompany": _maybe(rng, f"{city} Public Utilities", null_rate),
+        "NWM_StyleCode": _maybe(rng, rng.choice(["10 - 1 Story", "12 - 2 Story", "32 - Townhouse"]), null_rate),
+        "NWM_WaterCompany": _maybe(rng, f"{city} Water", null_rate),
+        "NWM_WaterHeaterLocation": _maybe(rng, rng.choice(["Garage", "Basement", "Utility Room"]), null_rate),
+        "NWM_WaterHeaterType": _maybe(rng, rng.choice(["Gas", "Electric", "Tankless"]), null_rate),
+        "NWM_AppliancesIncluded": _maybe(rng, _sample_list(rng, APPLIANCES, 1, 4), null_rate),
+        "NWM_BuildingInformation": _maybe(rng, ["Built On Lot"], 0.5),
+        "NWM_SiteFeatures": _maybe(rng, _sample_list(rng, ["Deck", "Fenced-Fully", "Patio", "Cable TV", "Gas Available"], 1, 4), null_rate),
+        "NWM_ZoningJurisdiction": _maybe(rng, city, null_rate),
+        "NWM_EnergySource": _maybe(rng, rng.choice(["Electric", "Natural Gas"]), null_rate),
+        "Concessions": _maybe(rng, ["Call Listing Agent"], 0.9),
+        "ConcessionsComments": _maybe(rng, "See remarks", 0.9),
+        "Media": _media(rng, listing_id, media_count, modified) if media_count else None,
+        "UnitTypes": _unit_types(rng, listing_id) if sub_type == "Multi Family" else [],
+    }
+    if mls_status == "Sold":
+        close_date = modified - timedelta(days=rng.randint(0, 20))
+        record["CloseDate"] = _iso(close_date, False)
+        record["ClosePrice"] = None if list_price is None else int(list_price * rng.uniform(0.9, 1.15))
+        record["PurchaseContractDate"] = _iso(close_date - timedelta(days=30), False)
+        record["BuyerAgentFullName"] = f"Agent {rng.randint(1, 5000)}"
+        record["BuyerOfficeName"] = f"Brokerage {rng.randint(1, 400)}"
+        record["OffMarketDate"] = _iso(close_date, False)
+    return record
+
+
+def generate_properties(count: int, seed: int = 0, start: int = 0, **kwargs) -> Iterator[Dict[str, Any]]:
+    """Yield `count` synthetic records with indices start..start+count-1."""
+    for index in range(start, start + count):
+        yield generate_property(index, seed=seed, **kwargs)
+
+
+def generate_page(
+    count: int,
+    seed: int = 0,
+    start: int = 0,
+    next_link: Optional[str] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """One OData page body: {"@odata.context", "value": [...], "@odata.nextLink"}."""
+    page: Dict[str, Any] = {
+        "@odata.context": "https://api.mlsgrid.com/v2/$metadata#Property",
+        "value": list(generate_properties(count, seed=seed, start=start, **kwargs)),
+    }
+    if next_link:
+        page["@odata.nextLink"] = next_link
+    return page
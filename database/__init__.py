@@ -1,5 +1,5 @@
 """Database package"""
-from .models import Property, PropertyMedia, init_database, get_engine, get_session
-
-__all__ = ['Property', 'PropertyMedia', 'init_database', 'get_engine', 'get_session']
+from .models import Property, PropertyDetail, PropertyMedia, init_database, get_engine, get_session
+from .routing import ReplicaRouter
 
+__all__ = ['Property', 'PropertyDetail', 'PropertyMedia', 'init_database', 'get_engine', 'get_session', 'ReplicaRouter']
@@ -0,0 +1,332 @@
+"""
+Set-based ingest writes:
+- multi-row INSERT ... ON CONFLICT DO UPDATE for properties and property_details (PostgreSQL and SQLite), so
+  refreshing a page of listings is a few statements instead of a SELECT plus attribute writes per listing
+- COPY FROM STDIN into a temporary staging table, merged with one INSERT ... SELECT per table
+  (PostgreSQL + psycopg2), for initial loads
+"""
+import io
+import json
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, func
+
+from .models import AppMetadata, LISTING_STATE_KEYS, Property, PropertyDetail, PropertyMedia, media_entries, split_property_row
+
+# Columns an upsert never overwrites: the key, R2 fields written by the image pipeline, and created_at
+PRESERVED_ON_UPDATE = {"id", "primary_image_r2_key", "primary_image_r2_url", "primary_image_stored_at", "created_at"}
+
+UPSERT_DIALECTS = {"postgresql", "sqlite"}
+
+
+def supports_upsert(session) -> bool:
+    """True when the session's database supports INSERT ... ON CONFLICT."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite3.sqlite_version_info >= (3, 24, 0)
+    return dialect in UPSERT_DIALECTS
+
+
+def _insert(session):
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _max_bind_params(session) -> int:
+    """Bound parameters allowed per statement (PostgreSQL: 65535; SQLite: 32766 since 3.32, 999 before)."""
+    if session.get_bind().dialect.name == "sqlite" and sqlite3.sqlite_version_info < (3, 32, 0):
+        return 999
+    return 32000
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _upsert(session, table, key: str, rows: List[Dict[str, Any]]) -> int:
+    """Multi-row INSERT ... ON CONFLICT (key) DO UPDATE of rows into table; returns statements executed."""
+    columns = [c.name for c in table.columns if any(c.name in row for row in rows)]
+    # Multi-row VALUES needs the same keys in every row
+    normalized = [{name: row.get(name) for name in columns} for row in rows]
+    insert = _insert(session)
+    chunk_size = max(1, _max_bind_params(session) // max(1, len(columns)))
+    touch = "updated_at" in table.c
+
+    statements = 0
+    for chunk in _chunks(normalized, chunk_size):
+        stmt = insert(table).values(chunk)
+        update_set = {
+            name: func.coalesce(stmt.excluded[name], table.c[name])
+            for name in columns
+            if name not in PRESERVED_ON_UPDATE and name != key
+        }
+        if touch:
+            # onupdate defaults don't fire for ON CONFLICT DO UPDATE
+            update_set["updated_at"] = datetime.utcnow()
+        if update_set:
+            stmt = stmt.on_conflict_do_update(index_elements=[table.c[key]], set_=update_set)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[table.c[key]])
+        session.execute(stmt)
+        statements += 1
+    return statements
+
+
+def upsert_properties(session, rows: List[Dict[str, Any]]) -> int:
+    """Insert or update transformed property rows (properties, then their property_details row);
+    returns the number of statements executed.
+
+    Rows from transform_property omit None fields, and a refresh never blanks a column the feed
+    left out, so updates use COALESCE(excluded.col, properties.col). R2 columns are never updated.
+    """
+    if not rows:
+        return 0
+    property_rows, detail_rows = zip(*(split_property_row(row) for row in rows))
+    statements = _upsert(session, Property.__table__, "id", list(property_rows))
+    return statements + _upsert(session, PropertyDetail.__table__, "property_id", list(detail_rows))
+
+
+def insert_properties(session, rows: List[Dict[str, Any]], media_rows: List[Dict[str, Any]] = ()) -> None:
+    """bulk_insert_mappings for transformed property rows, split across properties and property_details,
+    and their media rows (transform_media), whose media_json is built here rather than read back."""
+    if not rows:
+        return
+    property_rows, detail_rows = zip(*(split_property_row(row) for row in rows))
+    _attach_media_json(detail_rows, media_rows)
+    session.bulk_insert_mappings(Property, property_rows)
+    session.bulk_insert_mappings(PropertyDetail, detail_rows)
+    if media_rows:
+        session.bulk_insert_mappings(PropertyMedia, media_rows)
+
+
+def _media_json(media_rows) -> str:
+    return json.dumps(media_entries(media_rows), separators=(",", ":"))
+
+
+def _attach_media_json(detail_rows, media_rows: List[Dict[str, Any]]) -> None:
+    """Set media_json on new listings' detail rows from the media rows being inserted with them."""
+    by_property: Dict[str, List[Dict[str, Any]]] = {}
+    for media_data in media_rows:
+        by_property.setdefault(media_data["property_id"], []).append(media_data)
+    for detail_row in detail_rows:
+        detail_row["media_json"] = _media_json(by_property.get(detail_row["property_id"], ()))
+
+
+def refresh_media_json(session, property_ids: List[str]) -> int:
+    """Rebuild property_details.media_json from property_media for property_ids, after their media rows
+    changed (caller commits). Returns the number of listings rewritten."""
+    details = PropertyDetail.__table__
+    statement = details.update().where(details.c.property_id == bindparam("b_property_id")).values(
+        media_json=bindparam("b_media_json")
+    )
+    refreshed = 0
+    for ids in _chunks(list(property_ids), 500):
+        by_property: Dict[str, List[PropertyMedia]] = {property_id: [] for property_id in ids}
+        for media in session.query(PropertyMedia).filter(PropertyMedia.property_id.in_(ids)):
+            by_property[media.property_id].append(media)
+        session.execute(statement, [
+            {"b_property_id": property_id, "b_media_json": _media_json(media)}
+            for property_id, media in by_property.items()
+        ])
+        refreshed += len(by_property)
+    return refreshed
+
+
+def delete_properties(session, property_ids: List[str]) -> None:
+    """Delete properties with their details and media rows (caller commits). Bulk deletes skip the ORM
+    cascade and SQLite doesn't enforce foreign keys by default, so child rows are deleted explicitly."""
+    for ids in _chunks(property_ids, 500):
+        session.query(PropertyMedia).filter(PropertyMedia.property_id.in_(ids)).delete(synchronize_session=False)
+        session.query(PropertyDetail).filter(PropertyDetail.property_id.in_(ids)).delete(synchronize_session=False)
+        session.query(Property).filter(Property.id.in_(ids)).delete(synchronize_session=False)
+
+
+def clear_listing_state(session) -> None:
+    """Delete sync state that only holds for the current listings (caller commits). Call whenever every
+    listing is cleared, otherwise the next incremental run only fetches records newer than the old mark
+    and a resumed run skips the pages before its checkpoint."""
+    session.query(AppMetadata).filter(AppMetadata.key.in_(LISTING_STATE_KEYS)).delete(synchronize_session=False)
+
+
+# Columns filled by the image pipeline; cleared when a photo changes so it is uploaded again
+MEDIA_R2_COLUMNS = ("r2_key", "r2_url", "stored_at", "file_size", "content_type")
+PRIMARY_R2_COLUMNS = ("primary_image_r2_key", "primary_image_r2_url", "primary_image_stored_at")
+
+
+def _url_identity(url: Optional[str]) -> Optional[str]:
+    """Media URL without its query string, so re-signed URLs for the same photo compare equal."""
+    return url.split("?", 1)[0] if url else url
+
+
+def _free_media_id(property_id: str, idx: int, taken: set) -> str:
+    media_id = f"{property_id}_{idx}"
+    while media_id in taken:
+        idx += 1
+        media_id = f"{property_id}_{idx}"
+    taken.add(media_id)
+    return media_id
+
+
+def reconcile_media(
+    session,
+    property_rows: List[Dict[str, Any]],
+    media_rows: List[Dict[str, Any]],
+) -> Tuple[Dict[str, int], Set[str]]:
+    """Bring stored media for property_rows in line with media_rows (from transform_media), keyed on media_key.
+
+    Unchanged photos keep their row and R2 columns (only order/metadata/URL signature are updated);
+    photos whose URL changed have their R2 columns cleared; new photos are inserted and missing ones deleted.
+    A property whose primary_image_url changed gets its primary R2 columns cleared. Call before the
+    properties upsert, and refresh_media_json after it. Returns (counts, ids of properties with images to upload)."""
+    property_ids = [row["id"] for row in property_rows]
+    if not property_ids:
+        return {}, set()
+
+    stored_media: Dict[str, List[PropertyMedia]] = {}
+    previous_primary: Dict[str, Optional[str]] = {}
+    for ids in _chunks(property_ids, 500):
+        for media in session.query(PropertyMedia).filter(PropertyMedia.property_id.in_(ids)):
+            stored_media.setdefault(media.property_id, []).append(media)
+        for property_id, primary_url in session.query(Property.id, Property.primary_image_url).filter(Property.id.in_(ids)):
+            previous_primary[property_id] = primary_url
+    incoming_media: Dict[str, List[Dict[str, Any]]] = {}
+    for media_data in media_rows:
+        incoming_media.setdefault(media_data["property_id"], []).append(media_data)
+
+    counts = {"unchanged": 0, "updated": 0, "changed": 0, "added": 0, "removed": 0}
+    needs_upload: Set[str] = set()
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    deletes: List[str] = []
+    primary_resets: List[Dict[str, Any]] = []
+
+    for row in property_rows:
+        property_id = row["id"]
+        if property_id not in previous_primary:
+            needs_upload.add(property_id)  # new listing
+        elif row.get("primary_image_url") and _url_identity(row["primary_image_url"]) != _url_identity(previous_primary[property_id]):
+            primary_resets.append({"id": property_id, **{name: None for name in PRIMARY_R2_COLUMNS}})
+            needs_upload.add(property_id)
+
+        stored_by_key = {m.media_key: m for m in stored_media.get(property_id, []) if m.media_key}
+        matched: Set[str] = set()
+        taken_ids = {m.id for m in stored_media.get(property_id, [])}
+        for media_data in incoming_media.get(property_id, []):
+            stored = stored_by_key.get(media_data.get("media_key"))
+            if stored is None or stored.id in matched:
+                new_row = dict(media_data)
+                new_row["id"] = _free_media_id(property_id, int(media_data["id"].rsplit("_", 1)[1]), taken_ids)
+                inserts.append(new_row)
+                counts["added"] += 1
+                needs_upload.add(property_id)
+                continue
+            matched.add(stored.id)
+            changes = {
+                key: value for key, value in media_data.items()
+                if key not in ("id", "property_id") and getattr(stored, key) != value
+            }
+            if _url_identity(media_data.get("media_url")) != _url_identity(stored.media_url):
+                changes.update({name: None for name in MEDIA_R2_COLUMNS})
+                counts["changed"] += 1
+                needs_upload.add(property_id)
+            elif changes:
+                counts["updated"] += 1
+            else:
+                counts["unchanged"] += 1
+                continue
+            updates.append({"id": stored.id, **changes})
+        for stored in stored_media.get(property_id, []):
+            if stored.id not in matched:
+                deletes.append(stored.id)
+                counts["removed"] += 1
+
+    for ids in _chunks(deletes, 500):
+        session.query(PropertyMedia).filter(PropertyMedia.id.in_(ids)).delete(synchronize_session=False)
+    if updates:
+        session.bulk_update_mappings(PropertyMedia, updates)
+    if inserts:
+        session.bulk_insert_mappings(PropertyMedia, inserts)
+    if primary_resets:
+        session.bulk_update_mappings(Property, primary_resets)
+    return counts, needs_upload
+
+
+def supports_copy(session) -> bool:
+    """True when the session is on PostgreSQL through psycopg2 (cursor.copy_expert)."""
+    dialect = session.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def _copy_value(value: Any) -> str:
+    """Encode one value for COPY ... FROM STDIN in text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    text = str(value)
+    if "\\" in text or "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return text
+
+
+def _column_defaults(table) -> Dict[str, Any]:
+    """Python-side column defaults (created_at, order, ...), which COPY would otherwise skip."""
+    defaults = {}
+    for column in table.columns:
+        if column.default is None:
+            continue
+        defaults[column.name] = column.default.arg if column.default.is_scalar else column.default.arg(None)
+    return defaults
+
+
+def _copy_merge(session, cursor, table, rows: List[Dict[str, Any]]) -> int:
+    """COPY rows into a temp staging table shaped like table, then insert the ones whose key is new."""
+    quote = session.get_bind().dialect.identifier_preparer.quote
+    defaults = _column_defaults(table)
+    columns = [c.name for c in table.columns if c.name in defaults or any(c.name in row for row in rows)]
+    column_list = ", ".join(quote(name) for name in columns)
+    staging = quote(f"_staging_{table.name}")
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row.get(name, defaults.get(name))) for name in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {quote(table.name)} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+    cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", buffer)
+    cursor.execute(
+        f"INSERT INTO {quote(table.name)} ({column_list}) SELECT {column_list} FROM {staging} "
+        f"ON CONFLICT ({', '.join(quote(c.name) for c in table.primary_key.columns)}) DO NOTHING"
+    )
+    inserted = cursor.rowcount
+    cursor.execute(f"TRUNCATE {staging}")
+    return inserted
+
+
+def copy_insert(session, property_rows: List[Dict[str, Any]], media_rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Insert new properties (with their details) and media via COPY + merge, in the session's transaction
+    (caller commits). Rows whose id already exists are skipped. Returns inserted row counts per table."""
+    cursor = session.connection().connection.cursor()
+    try:
+        counts = {"properties": 0, "property_details": 0, "property_media": 0}
+        if property_rows:
+            split_rows, detail_rows = zip(*(split_property_row(row) for row in property_rows))
+            _attach_media_json(detail_rows, media_rows)
+            counts["properties"] = _copy_merge(session, cursor, Property.__table__, list(split_rows))
+            counts["property_details"] = _copy_merge(session, cursor, PropertyDetail.__table__, list(detail_rows))
+        if media_rows:
+            counts["property_media"] = _copy_merge(session, cursor, PropertyMedia.__table__, media_rows)
+        return counts
+    finally:
+        cursor.close()
@@ -1,16 +1,26 @@
 """
 Database models for property storage
 """
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, Boolean, Index
+from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, Boolean, Index, ForeignKey, nullslast
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 Base = declarative_base()
 
 
 class Property(Base):
-    """Property model for storing real estate listings"""
+    """Property model for storing real estate listings.
+
+    properties holds the columns search filters, sorts and lists on; the bulky detail-page columns live
+    1:1 in property_details (PropertyDetail), so search scans stay narrow. Each detail column is also
+    readable and writable on Property itself (proxied through Property.details), so callers can keep
+    treating a listing as one row."""
     __tablename__ = 'properties'
 
     # Primary key
@@ -21,7 +31,7 @@ class Property(Base):
     listing_key = Column(String, index=True)
     
     # Pricing
-    list_price = Column(Integer, index=True)
+    list_price = Column(Integer)
     
     # Address components
     street_number = Column(String)
@@ -35,31 +45,24 @@ class Property(Base):
     property_type = Column(String, index=True)
     property_sub_type = Column(String)
     home_type = Column(String, index=True)  # Derived from property_sub_type: Multi Family, Single Family, Manufactured, Condo, Other
-    bedrooms_total = Column(Integer, index=True)
-    bathrooms_total_integer = Column(Float, index=True)  # Float to allow 1 decimal (e.g. 1.75)
+    bedrooms_total = Column(Integer)
+    bathrooms_total_integer = Column(Float)  # Float to allow 1 decimal (e.g. 1.75)
     bathrooms_full = Column(Integer)
     bathrooms_half = Column(Integer)
-    living_area = Column(Integer, index=True)
+    living_area = Column(Integer)
     lot_size_square_feet = Column(Float)
     year_built = Column(Integer)
     standard_status = Column(String, index=True)
     status = Column(String, index=True)  # Derived from MlsStatus: For Sale, Pending, Sold
+    internet_address_display_yn = Column(Boolean)
 
     # Location (for geospatial search)
     latitude = Column(Float)
     longitude = Column(Float)
     
-    # Description
-    public_remarks = Column(Text)
-    private_remarks = Column(Text)
-    
-    # Agent information
-    list_agent_full_name = Column(String)
-    list_agent_email = Column(String)
-    list_agent_phone = Column(String)
-    
     # Dates
     list_date = Column(DateTime)
+    on_market_date = Column(DateTime)
     modification_timestamp = Column(DateTime)
     originating_system_modification_timestamp = Column(DateTime)
     
@@ -71,6 +74,50 @@ class Property(Base):
     primary_image_r2_key = Column(String, index=True)  # e.g., "properties/NWM123/0.jpg"
     primary_image_r2_url = Column(Text)  # Full CDN URL
     primary_image_stored_at = Column(DateTime)  # When uploaded to R2
+
+    # SHA-256 of the raw API record at last ingest; refresh skips listings whose fingerprint is unchanged
+    source_fingerprint = Column(String(64))
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Detail-page columns (loaded on first access; list queries selectinload them for the page only)
+    details = relationship(
+        "PropertyDetail", uselist=False, back_populates="property", cascade="all, delete-orphan",
+    )
+    
+    # Composite indexes for common search patterns (the per-sort indexes are declared with SEARCH_SORTS below).
+    # list_price, bedrooms_total, bathrooms_total_integer and living_area need no index of their own: their
+    # sort index leads with them.
+    __table_args__ = (
+        Index('idx_city_state', 'city', 'state_or_province'),
+        Index('idx_location', 'latitude', 'longitude'),
+        # Every column /api/properties filters on (except address and listing_id), so the page count is an
+        # index-only scan of this narrow index instead of a table scan. list_price leads so min/max_price
+        # counts range-scan it rather than idx_sort_price_* plus a row lookup per match.
+        Index(
+            'idx_search_filters',
+            'list_price', 'bedrooms_total', 'bathrooms_total_integer', 'city', 'state_or_province',
+            'postal_code', 'status', 'home_type', 'internet_address_display_yn',
+        ),
+    )
+
+
+class PropertyDetail(Base):
+    """Detail-page columns of a Property (1:1 on property_id): remarks, agent, features text, NWM fields, unit types."""
+    __tablename__ = 'property_details'
+
+    property_id = Column(String, ForeignKey('properties.id', ondelete='CASCADE'), primary_key=True)
+
+    # Description
+    public_remarks = Column(Text)
+    private_remarks = Column(Text)
+    
+    # Agent information
+    list_agent_full_name = Column(String)
+    list_agent_email = Column(String)
+    list_agent_phone = Column(String)
     
     # Additional fields - Property Features
     appliances = Column(Text)
@@ -98,7 +145,6 @@ class Property(Base):
     high_school_district = Column(String)
     inclusions = Column(Text)
     interior_features = Column(Text)
-    internet_address_display_yn = Column(Boolean)
     levels = Column(String)
     listing_agent_full_name = Column(String)
     list_office_name = Column(String)
@@ -111,7 +157,6 @@ class Property(Base):
     mls_status = Column(String)
     new_construction_yn = Column(Boolean)
     off_market_date = Column(DateTime)
-    on_market_date = Column(DateTime)
     original_list_price = Column(Integer)
     parcel_number = Column(String)
     association_fee = Column(Float)
@@ -175,26 +220,107 @@ class Property(Base):
 
     # Unit types (from API $expand=UnitTypes), stored as JSON array
     unit_types = Column(Text)
-    
-    # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Composite indexes for common search patterns
-    __table_args__ = (
-        Index('idx_city_state', 'city', 'state_or_province'),
-        Index('idx_price_bedrooms', 'list_price', 'bedrooms_total'),
-        Index('idx_status_city', 'standard_status', 'city'),
-        Index('idx_location', 'latitude', 'longitude'),
+
+    # Ordered media list (JSON array of media_entries) copied from property_media, so the detail page reads
+    # its photos with the listing row. NULL until written by ingest / the image pipeline.
+    media_json = Column(Text)
+
+    property = relationship("Property", back_populates="details")
+
+
+# Columns stored in property_details, in table order
+PROPERTY_DETAIL_COLUMNS = tuple(c.name for c in PropertyDetail.__table__.columns if c.name != "property_id")
+_DETAIL_COLUMN_SET = frozenset(PROPERTY_DETAIL_COLUMNS)
+
+
+def _detail_proxy(name: str):
+    # Setting a detail column on a Property without a details row creates it
+    return association_proxy("details", name, creator=lambda value: PropertyDetail(**{name: value}))
+
+
+for _name in PROPERTY_DETAIL_COLUMNS:
+    setattr(Property, _name, _detail_proxy(_name))
+del _name
+
+
+def split_property_row(row: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split a transformed property row (transform_property) into its properties and property_details rows."""
+    property_row = {}
+    detail_row = {"property_id": row["id"]}
+    for key, value in row.items():
+        if key in _DETAIL_COLUMN_SET:
+            detail_row[key] = value
+        else:
+            property_row[key] = value
+    return property_row, detail_row
+
+
+# /api/properties sort_by -> (column, descending). Results are ordered by the column NULLS LAST, then id so
+# pages are stable; each mode has an index on exactly that key (idx_sort_<mode>), so ORDER BY ... LIMIT
+# walks the index and stops after the page instead of sorting every matching row.
+SEARCH_SORTS: Dict[str, Tuple[str, bool]] = {
+    "newest": ("on_market_date", True),
+    "price_asc": ("list_price", False),
+    "price_desc": ("list_price", True),
+    "sqft_desc": ("living_area", True),
+    "lot_size_desc": ("lot_size_square_feet", True),
+    "beds_desc": ("bedrooms_total", True),
+    "baths_desc": ("bathrooms_total_integer", True),
+}
+DEFAULT_SEARCH_SORT = "newest"
+
+
+def search_order_by(sort_by: str):
+    """ORDER BY clauses for a sort_by mode (unknown modes sort as DEFAULT_SEARCH_SORT)."""
+    column_name, descending = SEARCH_SORTS.get(sort_by, SEARCH_SORTS[DEFAULT_SEARCH_SORT])
+    column = getattr(Property, column_name)
+    return nullslast(column.desc() if descending else column.asc()), Property.id.asc()
+
+
+class _NullsLastIndexKey(ColumnElement):
+    """Index key ordered NULLS LAST, matching search_order_by.
+
+    PostgreSQL only walks an index for ORDER BY ... NULLS LAST if the index says so. SQLite rejects
+    NULLS LAST in CREATE INDEX but serves either NULLS order from a plain index, so it gets the bare key.
+    """
+    inherit_cache = True
+    _traverse_internals = [("element", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, element):
+        self.element = element
+
+
+@compiles(_NullsLastIndexKey)
+def _compile_nulls_last_key(element, compiler, **kw):
+    return f"{compiler.process(element.element, **kw)} NULLS LAST"
+
+
+@compiles(_NullsLastIndexKey, "sqlite")
+def _compile_nulls_last_key_sqlite(element, compiler, **kw):
+    return compiler.process(element.element, **kw)
+
+
+for _mode, (_column_name, _descending) in SEARCH_SORTS.items():
+    _column = Property.__table__.c[_column_name]
+    Index(
+        f"idx_sort_{_mode}",
+        _NullsLastIndexKey(_column.desc() if _descending else _column.asc()),
+        Property.__table__.c.id,
     )
+del _mode, _column_name, _descending, _column
 
 
 class PropertyMedia(Base):
-    """Property media/images model"""
+    """Property media/images model (source of truth for property_details.media_json)"""
     __tablename__ = 'property_media'
 
     id = Column(String, primary_key=True)
-    property_id = Column(String, nullable=False, index=True)  # Foreign key to properties.id
+    # Checked at commit, so a batch may write media before its properties rows
+    property_id = Column(
+        String,
+        ForeignKey('properties.id', ondelete='CASCADE', deferrable=True, initially='DEFERRED'),
+        nullable=False,
+    )
     media_key = Column(String)
     media_url = Column(Text)  # Original NWMLS URL (keep for reference)
     
@@ -212,6 +338,38 @@ class PropertyMedia(Base):
     media_category = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # A listing's photos in display order (also serves property_id lookups)
+    __table_args__ = (
+        Index('idx_media_property_order', 'property_id', 'order'),
+    )
+
+
+def media_entries(media_rows) -> List[Dict[str, Any]]:
+    """Compact media list for property_details.media_json from one property's property_media rows
+    (PropertyMedia objects or transform_media dicts): ordered by order (unset last), unset keys omitted."""
+    entries = []
+    for row in media_rows:
+        get = row.get if isinstance(row, dict) else lambda name: getattr(row, name, None)
+        entry = {
+            "order": get("order"),
+            "url": get("media_url"),
+            "r2Url": get("r2_url"),
+            "width": get("image_width"),
+            "height": get("image_height"),
+            "category": get("media_category"),
+            "preferred": get("preferred_photo_yn") or None,
+        }
+        entries.append(((999 if entry["order"] is None else entry["order"], _media_index(get("id"))),
+                        {key: value for key, value in entry.items() if value is not None}))
+    entries.sort(key=lambda item: item[0])
+    return [entry for _, entry in entries]
+
+
+def _media_index(media_id: Optional[str]) -> int:
+    # "<property_id>_<idx>": ties on order keep feed order
+    suffix = (media_id or "").rsplit("_", 1)[-1]
+    return int(suffix) if suffix.isdigit() else 0
+
 
 class AppMetadata(Base):
     """Key-value store for app-level metadata (e.g. last populate run)."""
@@ -221,6 +379,31 @@ class AppMetadata(Base):
     value = Column(Text, nullable=False)
 
 
+# AppMetadata key holding the max ModificationTimestamp seen by a completed run (incremental sync)
+HIGH_WATER_MARK_KEY = "mlsgrid_modification_high_water"
+# AppMetadata key holding the resume point (@odata.nextLink + counters) of an unfinished populate run
+CHECKPOINT_KEY = "populate_checkpoint"
+# AppMetadata keys describing the stored listings; removed whenever the listings are cleared
+LISTING_STATE_KEYS = (HIGH_WATER_MARK_KEY, CHECKPOINT_KEY)
+
+
+class IngestDeadLetter(Base):
+    """Raw API record that failed to transform or write during populate (one row per listing, latest failure;
+    records without a ListingId/ListingKey get one row per distinct payload, matched by payload_hash).
+    Replayed with populate_database.py --retry-dead-letters; removed once the listing is written."""
+    __tablename__ = 'ingest_dead_letters'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    listing_id = Column(String, index=True)  # None when the record has no ListingId / ListingKey
+    payload_hash = Column(String(64), nullable=False, index=True)  # sha256 of the canonical payload JSON
+    stage = Column(String(16), nullable=False)  # "transform" or "write"
+    error = Column(Text)
+    payload = Column(Text, nullable=False)  # raw API record as JSON
+    attempts = Column(Integer, default=1)
+    first_failed_at = Column(DateTime, default=datetime.utcnow)
+    last_failed_at = Column(DateTime, default=datetime.utcnow)
+
+
 # Recycle connections after 10 minutes so they don't outlive server idle timeout
 POOL_RECYCLE_SECONDS = 10 * 60  # 10 min
 
@@ -231,6 +414,7 @@ def get_engine(
     max_overflow: int = 20,
     pool_timeout: int = 60,
     pool_recycle: int = POOL_RECYCLE_SECONDS,
+    pool_pre_ping: bool = False,
 ):
     """Create database engine with a connection pool sized for concurrent use (e.g. multi-worker scripts)."""
     # SQLite uses NullPool when needed elsewhere; here we use default pool with larger size for PostgreSQL
@@ -243,6 +427,7 @@ def get_engine(
         max_overflow=max_overflow,
         pool_timeout=pool_timeout,
         pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
     )
 
 
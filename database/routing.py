@@ -0,0 +1,108 @@
+"""
+Primary/replica session routing for the API.
+
+Writes (ingest, admin, lead endpoints) always use the primary. Read-only endpoints can use
+one or more read replicas, picked round-robin; a replica that fails to hand out a connection
+is skipped for a cool-down period and reads fall back to the primary when none is healthy.
+An optional read-your-writes window sends reads to the primary for a few seconds after an
+admin write so freshly written data is visible despite replication lag.
+"""
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from .models import get_engine
+
+
+class _Replica:
+    """One read replica and its health state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        # pre_ping so a dead replica is detected on checkout instead of mid-query
+        self.engine = get_engine(url, pool_pre_ping=True)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.unhealthy_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+
+class ReplicaRouter:
+    """Hands out primary sessions for writes and replica sessions (with failover) for reads."""
+
+    def __init__(
+        self,
+        primary_url: str,
+        replica_urls: Optional[List[str]] = None,
+        unhealthy_cooldown: float = 30.0,
+        read_your_writes_seconds: float = 0.0,
+    ):
+        self.primary_url = primary_url
+        self.primary_engine = get_engine(primary_url)
+        self._primary_factory = sessionmaker(bind=self.primary_engine)
+        self.replicas = [_Replica(url) for url in (replica_urls or []) if url and url != primary_url]
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._rotation = itertools.count()
+        self._lock = threading.Lock()
+        self._last_write_at = 0.0
+
+    def write_session(self) -> Session:
+        """Session on the primary (ingest, admin and lead endpoints)."""
+        return self._primary_factory()
+
+    def mark_write(self) -> None:
+        """Record an admin write; starts the read-your-writes window if enabled (per process)."""
+        with self._lock:
+            self._last_write_at = time.monotonic()
+
+    def _in_read_your_writes_window(self) -> bool:
+        if self.read_your_writes_seconds <= 0:
+            return False
+        return time.monotonic() - self._last_write_at < self.read_your_writes_seconds
+
+    def read_session(self) -> Session:
+        """Session on a healthy replica (round-robin), falling back to the primary."""
+        if not self.replicas or self._in_read_your_writes_window():
+            return self.write_session()
+
+        now = time.monotonic()
+        start = next(self._rotation)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if not replica.is_healthy(now):
+                continue
+            session = replica.session_factory()
+            try:
+                session.connection()  # check out (and pre-ping) a connection now so failover happens here
+                return session
+            except (OperationalError, DBAPIError) as e:
+                session.close()
+                with self._lock:
+                    replica.unhealthy_until = time.monotonic() + self.unhealthy_cooldown
+                    replica.last_error = str(e).splitlines()[0] if str(e) else type(e).__name__
+                print(f"⚠️  Read replica unavailable, skipping for {self.unhealthy_cooldown:.0f}s: {replica.last_error}")
+        return self.write_session()
+
+    def status(self) -> dict:
+        """Replica health summary (hosts only, no credentials)."""
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {
+                    "host": replica.url.split("@")[-1],
+                    "healthy": replica.is_healthy(now),
+                    "retry_in_seconds": max(0, round(replica.unhealthy_until - now, 1)),
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+            "read_your_writes_seconds": self.read_your_writes_seconds,
+            "reading_from_primary": not self.replicas or self._in_read_your_writes_window(),
+        }
@@ -28,6 +28,7 @@ else:
     print("⚠️  No .env found, using system environment")
 
 from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
 from database.models import get_engine, get_session, Property
 from services.property_transformer import get_home_type_from_property, get_status_from_mls_status
 
@@ -62,7 +63,8 @@ def backfill_home_type(database_url: str | None = None, batch_size: int = 500, d
 
     try:
         # Rows that need backfill: home_type IS NULL or status IS NULL
-        query = session.query(Property).filter(
+        # mls_status lives in property_details; load each batch's details in one query
+        query = session.query(Property).options(selectinload(Property.details)).filter(
             or_(Property.home_type.is_(None), Property.status.is_(None))
         )
         total = query.count()
@@ -25,7 +25,8 @@ else:
     load_dotenv()
     print("⚠️  No .env file found, using system environment variables")
 
-from database.models import get_engine, get_session, Property, PropertyMedia
+from database.models import get_engine, get_session, Property, PropertyDetail, PropertyMedia
+from database.bulk import clear_listing_state
 from services.r2_storage import R2Storage
 
 def clear_all_data(skip_r2: bool = False):
@@ -113,7 +114,9 @@ def clear_all_data(skip_r2: bool = False):
         old_media_count = session.query(PropertyMedia).count()
         
         session.query(PropertyMedia).delete()
+        session.query(PropertyDetail).delete()
         session.query(Property).delete()
+        clear_listing_state(session)
         session.commit()
         
         print("=" * 60)
@@ -0,0 +1,129 @@
+"""
+Migration script for ingest_dead_letters keyed by a surrogate id.
+
+The table used listing_id as its primary key, so every record without a ListingId/ListingKey was saved as
+"unknown" and overwrote the previous one. It now has an autoincrement id, listing_id as a plain (nullable)
+column and a payload_hash used to match records without a listing id. The old table is renamed to
+ingest_dead_letters_old, its rows are copied into the new table and it is dropped; if the copy fails
+the rows stay in ingest_dead_letters_old. Safe to re-run.
+
+Run from project root:
+  python scripts/migrate_dead_letter_ids.py --dry-run
+  python scripts/migrate_dead_letter_ids.py
+  python scripts/migrate_dead_letter_ids.py --database "postgresql://..."
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from dotenv import load_dotenv
+
+backend_dir = os.path.join(_project_root, "backend")
+backend_env = os.path.join(backend_dir, ".env")
+root_env = os.path.join(_project_root, ".env")
+if os.path.exists(backend_env):
+    load_dotenv(dotenv_path=backend_env)
+elif os.path.exists(root_env):
+    load_dotenv(dotenv_path=root_env)
+else:
+    load_dotenv()
+
+from sqlalchemy import DateTime, inspect, text
+
+from database.models import get_engine, IngestDeadLetter
+
+COPIED_COLUMNS = ("listing_id", "stage", "error", "payload", "attempts", "first_failed_at", "last_failed_at")
+
+
+def get_database_url(database_url: str | None = None) -> str:
+    url = database_url or os.getenv("DATABASE_PUBLIC_URL") or os.getenv("DATABASE_URL")
+    if url:
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        return url
+    return f"sqlite:///{os.path.join(_project_root, 'properties.db')}"
+
+
+def _payload_hash(payload: str) -> str:
+    try:
+        canonical = json.dumps(json.loads(payload), sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        canonical = payload or ""
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def migrate(database_url: str, dry_run: bool = False) -> bool:
+    print("=" * 60)
+    print("Key ingest_dead_letters by a surrogate id")
+    print("=" * 60)
+    print(f"Database: {database_url.split('@')[-1] if '@' in database_url else database_url}\n")
+
+    engine = get_engine(database_url)
+    inspector = inspect(engine)
+    table = IngestDeadLetter.__tablename__
+    old_table = f"{table}_old"
+    if inspector.has_table(old_table):
+        print(f"✗ {old_table} exists from an earlier failed run; copy or drop it before re-running")
+        return False
+    if not inspector.has_table(table):
+        print(f"  {table} doesn't exist yet; it is created with the new layout by init_database.")
+        return True
+    if any(column["name"] == "id" for column in inspector.get_columns(table)):
+        print(f"  ✓ {table} already has an id column; nothing to do.")
+        return True
+
+    with engine.connect() as conn:
+        count = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    if dry_run:
+        print(f"  Would rename {table} to {old_table}, create {table} with id / payload_hash columns and copy {count:,} rows")
+        print("\nDry run: no changes made.")
+        return True
+
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} RENAME TO {old_table}"))
+            if engine.dialect.name == "postgresql":
+                # The new table's primary key would otherwise clash with the old constraint's name
+                conn.execute(text(f"ALTER TABLE {old_table} RENAME CONSTRAINT {table}_pkey TO {old_table}_pkey"))
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        return False
+
+    try:
+        with engine.begin() as conn:
+            IngestDeadLetter.__table__.create(conn)
+            rows = conn.execute(
+                text(f"SELECT {', '.join(COPIED_COLUMNS)} FROM {old_table}")
+                .columns(first_failed_at=DateTime, last_failed_at=DateTime)
+            ).mappings().all()
+            if rows:
+                conn.execute(IngestDeadLetter.__table__.insert(), [
+                    {
+                        **row,
+                        "listing_id": None if row["listing_id"] == "unknown" else row["listing_id"],
+                        "payload_hash": _payload_hash(row["payload"]),
+                    }
+                    for row in rows
+                ])
+            conn.execute(text(f"DROP TABLE {old_table}"))
+        print(f"  ✓ Recreated {table} and copied {len(rows):,} rows")
+    except Exception as e:
+        print(f"\n✗ Migration failed (existing rows are kept in {old_table}): {e}")
+        return False
+
+    print("\n✓ Migration complete!")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Key ingest_dead_letters by a surrogate id.")
+    parser.add_argument("--database", default=None, help="Database URL (overrides env)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    success = migrate(get_database_url(args.database), dry_run=args.dry_run)
+    sys.exit(0 if success else 1)
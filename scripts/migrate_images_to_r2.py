@@ -37,6 +37,7 @@ from sqlalchemy.pool import NullPool
 from sqlalchemy.exc import OperationalError, DBAPIError
 from database.models import get_engine, get_session, Property, PropertyMedia
 from services.image_processor import ImageProcessor
+from services.rate_limiter import get_shared_limiter
 
 MAX_CONNECTION_RETRIES = 3
 
@@ -183,7 +184,7 @@ def migrate_all_properties(
         else:
             engine = get_engine(database_url)
         limiter = ThreadSafeRateLimiter(max_requests_per_second) if max_requests_per_second else None
-        processor = ImageProcessor(rate_limiter=limiter)
+        processor = ImageProcessor(rate_limiter=limiter, quota_limiter=get_shared_limiter(database_url))
     except Exception as e:
         print(f"Error initializing: {str(e)}")
         print("Make sure R2 credentials are configured in environment variables.")
@@ -0,0 +1,151 @@
+"""
+Migration script for the denormalized media list (property_details.media_json).
+
+Adds the media_json column, replaces the property_media.property_id index with (property_id, "order"),
+adds the property_media -> properties foreign key (PostgreSQL; orphaned media rows are deleted first), and
+fills media_json from property_media for every listing that doesn't have it yet, in batches. Listings
+without media_json still work (the API falls back to property_media), so this can run while serving.
+Safe to re-run.
+
+Run from project root:
+  python scripts/migrate_media_json.py --dry-run
+  python scripts/migrate_media_json.py
+  python scripts/migrate_media_json.py --database "postgresql://..." --batch-size 2000
+
+SQLite can't add a foreign key to an existing table (and doesn't enforce them unless PRAGMA foreign_keys
+is on), so there the constraint only exists in databases created from the model.
+"""
+import argparse
+import os
+import sys
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from dotenv import load_dotenv
+
+backend_dir = os.path.join(_project_root, "backend")
+backend_env = os.path.join(backend_dir, ".env")
+root_env = os.path.join(_project_root, ".env")
+if os.path.exists(backend_env):
+    load_dotenv(dotenv_path=backend_env)
+elif os.path.exists(root_env):
+    load_dotenv(dotenv_path=root_env)
+else:
+    load_dotenv()
+
+from sqlalchemy import inspect, text
+
+from database.bulk import refresh_media_json
+from database.models import get_engine, get_session, PropertyDetail
+
+OLD_MEDIA_INDEX = "ix_property_media_property_id"
+MEDIA_ORDER_INDEX = "idx_media_property_order"
+MEDIA_FOREIGN_KEY = "property_media_property_id_fkey"  # PostgreSQL's name for the model's constraint
+
+
+def get_database_url(database_url: str | None = None) -> str:
+    url = database_url or os.getenv("DATABASE_PUBLIC_URL") or os.getenv("DATABASE_URL")
+    if url:
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        return url
+    return f"sqlite:///{os.path.join(_project_root, 'properties.db')}"
+
+
+def migrate(database_url: str, dry_run: bool = False, batch_size: int = 1000) -> bool:
+    print("=" * 60)
+    print("Add property_details.media_json and index property_media")
+    print("=" * 60)
+    print(f"Database: {database_url.split('@')[-1] if '@' in database_url else database_url}\n")
+
+    engine = get_engine(database_url)
+    inspector = inspect(engine)
+    if not inspector.has_table("property_details") or not inspector.has_table("property_media"):
+        print("✗ property_details / property_media not found (run scripts/migrate_split_property_details.py first)")
+        return False
+    postgres = engine.dialect.name == "postgresql"
+    has_column = any(column["name"] == "media_json" for column in inspector.get_columns("property_details"))
+    media_indexes = {index["name"] for index in inspector.get_indexes("property_media")}
+    has_foreign_key = any(fk["referred_table"] == "properties" for fk in inspector.get_foreign_keys("property_media"))
+
+    statements = []
+    if not has_column:
+        statements.append(("add property_details.media_json", "ALTER TABLE property_details ADD COLUMN media_json TEXT"))
+    if MEDIA_ORDER_INDEX not in media_indexes:
+        statements.append((
+            f"create {MEDIA_ORDER_INDEX}",
+            f'CREATE INDEX {MEDIA_ORDER_INDEX} ON property_media (property_id, "order")',
+        ))
+    if OLD_MEDIA_INDEX in media_indexes:
+        statements.append((f"drop {OLD_MEDIA_INDEX}", f"DROP INDEX {OLD_MEDIA_INDEX}"))
+    if postgres and not has_foreign_key:
+        statements.append((
+            "delete orphaned media rows",
+            "DELETE FROM property_media m WHERE NOT EXISTS (SELECT 1 FROM properties p WHERE p.id = m.property_id)",
+        ))
+        statements.append((
+            f"add {MEDIA_FOREIGN_KEY}",
+            f"ALTER TABLE property_media ADD CONSTRAINT {MEDIA_FOREIGN_KEY} FOREIGN KEY (property_id) "
+            f"REFERENCES properties (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED",
+        ))
+
+    if dry_run:
+        for label, ddl in statements:
+            print(f"  Would {label}: {ddl}")
+        if has_column:
+            with engine.connect() as conn:
+                missing = conn.execute(text("SELECT COUNT(*) FROM property_details WHERE media_json IS NULL")).scalar()
+            print(f"  Would fill media_json for {missing:,} listings")
+        else:
+            print("  Would fill media_json for every listing")
+        print("\nDry run: no changes made.")
+        return True
+
+    try:
+        with engine.begin() as conn:
+            for label, ddl in statements:
+                start = time.perf_counter()
+                result = conn.execute(text(ddl))
+                rows = f", {result.rowcount:,} rows" if label.startswith("delete") else ""
+                print(f"  ✓ {label} ({time.perf_counter() - start:.1f}s{rows})")
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        return False
+
+    session = get_session(engine)
+    filled = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            ids = [
+                property_id for (property_id,) in session.query(PropertyDetail.property_id)
+                .filter(PropertyDetail.media_json.is_(None))
+                .limit(batch_size)
+            ]
+            if not ids:
+                break
+            filled += refresh_media_json(session, ids)
+            session.commit()
+            print(f"  {filled:,} listings filled ({time.perf_counter() - start:.0f}s)")
+    except Exception as e:
+        session.rollback()
+        print(f"\n✗ Filling media_json failed after {filled:,} listings: {e}")
+        return False
+    finally:
+        session.close()
+    print(f"  ✓ Filled media_json for {filled:,} listings")
+
+    print("\n✓ Migration complete!")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add and fill property_details.media_json; index property_media.")
+    parser.add_argument("--database", default=None, help="Database URL (overrides env)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Listings filled per transaction (default: 1000)")
+    args = parser.parse_args()
+    success = migrate(get_database_url(args.database), dry_run=args.dry_run, batch_size=args.batch_size)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,130 @@
+"""
+Migration script to bring the properties indexes in line with database/models.py.
+
+Creates the indexes the model declares that the database lacks (the per-sort idx_sort_* indexes and the
+idx_search_filters covering index), drops the indexes they replace, and refreshes planner statistics.
+create_all only creates missing tables, so existing databases need this once. Safe to re-run.
+
+Run from project root:
+  python scripts/migrate_search_indexes.py --dry-run
+  python scripts/migrate_search_indexes.py
+  python scripts/migrate_search_indexes.py --keep-old   # add the new indexes only
+  python scripts/migrate_search_indexes.py --database "postgresql://..." --concurrently
+
+--concurrently (PostgreSQL) builds and drops indexes without blocking writes (slower; no transaction).
+benchmarks/index_usage.py reports which of the remaining indexes a request mix actually uses.
+"""
+import argparse
+import os
+import sys
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from dotenv import load_dotenv
+
+backend_dir = os.path.join(_project_root, "backend")
+backend_env = os.path.join(backend_dir, ".env")
+root_env = os.path.join(_project_root, ".env")
+if os.path.exists(backend_env):
+    load_dotenv(dotenv_path=backend_env)
+elif os.path.exists(root_env):
+    load_dotenv(dotenv_path=root_env)
+else:
+    load_dotenv()
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from database.models import get_engine, Property
+
+# Indexes replaced by the idx_sort_* / idx_search_filters set: the single-column ones are the leading
+# column of a sort index, and standard_status isn't filtered on by search
+RETIRED_INDEXES = (
+    "idx_price_bedrooms",
+    "idx_status_city",
+    "ix_properties_list_price",
+    "ix_properties_bedrooms_total",
+    "ix_properties_bathrooms_total_integer",
+    "ix_properties_living_area",
+)
+
+
+def get_database_url(database_url: str | None = None) -> str:
+    url = database_url or os.getenv("DATABASE_PUBLIC_URL") or os.getenv("DATABASE_URL")
+    if url:
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        return url
+    return f"sqlite:///{os.path.join(_project_root, 'properties.db')}"
+
+
+def migrate(database_url: str, dry_run: bool = False, keep_old: bool = False, concurrently: bool = False) -> bool:
+    print("=" * 60)
+    print("Migrate properties search indexes")
+    print("=" * 60)
+    print(f"Database: {database_url.split('@')[-1] if '@' in database_url else database_url}\n")
+
+    engine = get_engine(database_url)
+    inspector = inspect(engine)
+    if not inspector.has_table("properties"):
+        print("✗ properties table not found (run scripts/init_database.py for a new database)")
+        return False
+    existing = {index["name"] for index in inspector.get_indexes("properties")}
+    missing = sorted((index for index in Property.__table__.indexes if index.name not in existing), key=lambda i: i.name)
+    retired = [] if keep_old else [name for name in RETIRED_INDEXES if name in existing]
+    if not missing and not retired:
+        print("  ⊘ Indexes already match the model")
+        return True
+
+    postgres = engine.dialect.name == "postgresql"
+    concurrently = concurrently and postgres
+    statements = []
+    for index in missing:
+        ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+        if concurrently:
+            ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+        statements.append((f"create {index.name}", ddl))
+    for name in retired:
+        statements.append((f"drop {name}", f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}"))
+
+    if dry_run:
+        for label, ddl in statements:
+            print(f"  Would {label}: {ddl}")
+        print("\nDry run: no changes made.")
+        return True
+
+    # CONCURRENTLY can't run inside a transaction block
+    conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT") if concurrently else engine.connect()
+    try:
+        for label, ddl in statements:
+            start = time.perf_counter()
+            conn.execute(text(ddl))
+            if not concurrently:
+                conn.commit()
+            print(f"  ✓ {label} ({time.perf_counter() - start:.1f}s)")
+        # Fresh statistics so the planner knows when an index-ordered scan beats filtering and sorting
+        conn.execute(text("ANALYZE properties" if postgres else "ANALYZE"))
+        if not concurrently:
+            conn.commit()
+        print("  ✓ Analyzed")
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        return False
+    finally:
+        conn.close()
+
+    print("\n✓ Migration complete!")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the model's search indexes and drop the ones they replace.")
+    parser.add_argument("--database", default=None, help="Database URL (overrides env)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the DDL without running it")
+    parser.add_argument("--keep-old", action="store_true", help="Only create new indexes; keep the replaced ones")
+    parser.add_argument("--concurrently", action="store_true", help="PostgreSQL: CREATE/DROP INDEX CONCURRENTLY")
+    args = parser.parse_args()
+    success = migrate(get_database_url(args.database), dry_run=args.dry_run, keep_old=args.keep_old, concurrently=args.concurrently)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,122 @@
+"""
+Migration script to move the detail-page columns of properties into the 1:1 property_details table.
+
+Creates property_details if needed, copies the detail columns of every property that has no details row
+yet (one INSERT ... SELECT), then drops those columns from properties so search scans read the narrow
+row. Safe to re-run: listings already copied are skipped and columns already dropped are ignored.
+
+Run from project root:
+  python scripts/migrate_split_property_details.py --dry-run
+  python scripts/migrate_split_property_details.py
+  python scripts/migrate_split_property_details.py --keep-columns   # copy only; drop later
+  python scripts/migrate_split_property_details.py --database "postgresql://..." --vacuum
+
+Dropping columns needs SQLite 3.35+ (PostgreSQL any). PostgreSQL only reclaims the dropped columns'
+space when rows are rewritten; --vacuum runs VACUUM FULL properties (takes an exclusive lock).
+"""
+import argparse
+import os
+import sys
+import time
+
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _project_root)
+
+from dotenv import load_dotenv
+
+backend_dir = os.path.join(_project_root, "backend")
+backend_env = os.path.join(backend_dir, ".env")
+root_env = os.path.join(_project_root, ".env")
+if os.path.exists(backend_env):
+    load_dotenv(dotenv_path=backend_env)
+elif os.path.exists(root_env):
+    load_dotenv(dotenv_path=root_env)
+else:
+    load_dotenv()
+
+from sqlalchemy import inspect, text
+
+from database.models import get_engine, PropertyDetail, PROPERTY_DETAIL_COLUMNS
+
+
+def get_database_url(database_url: str | None = None) -> str:
+    url = database_url or os.getenv("DATABASE_PUBLIC_URL") or os.getenv("DATABASE_URL")
+    if url:
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql://", 1)
+        return url
+    return f"sqlite:///{os.path.join(_project_root, 'properties.db')}"
+
+
+def migrate(database_url: str, dry_run: bool = False, keep_columns: bool = False, vacuum: bool = False) -> bool:
+    print("=" * 60)
+    print("Split properties into properties + property_details")
+    print("=" * 60)
+    print(f"Database: {database_url.split('@')[-1] if '@' in database_url else database_url}\n")
+
+    engine = get_engine(database_url)
+    quote = engine.dialect.identifier_preparer.quote
+    inspector = inspect(engine)
+    if not inspector.has_table("properties"):
+        print("✗ properties table not found (run scripts/init_database.py for a new database)")
+        return False
+    existing = {column["name"] for column in inspector.get_columns("properties")}
+    columns = [name for name in PROPERTY_DETAIL_COLUMNS if name in existing]
+    if not columns:
+        print("  ⊘ properties has no detail columns left; already split")
+        return True
+    print(f"  {len(columns)} detail columns on properties to move")
+
+    if dry_run:
+        with engine.connect() as conn:
+            total = conn.execute(text("SELECT COUNT(*) FROM properties")).scalar()
+        print(f"  Would copy detail columns for up to {total:,} properties")
+        if not keep_columns:
+            print(f"  Would drop from properties: {', '.join(columns)}")
+        print("\nDry run: no changes made.")
+        return True
+
+    PropertyDetail.__table__.create(engine, checkfirst=True)
+    column_list = ", ".join(quote(name) for name in columns)
+    start = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            # Listings written since the new code was deployed already have a (fresher) details row
+            copied = conn.execute(text(
+                f"INSERT INTO property_details (property_id, {column_list}) "
+                f"SELECT p.id, {', '.join(f'p.{quote(name)}' for name in columns)} FROM properties p "
+                f"WHERE NOT EXISTS (SELECT 1 FROM property_details d WHERE d.property_id = p.id)"
+            )).rowcount
+        print(f"  ✓ Copied details for {copied:,} properties ({time.perf_counter() - start:.1f}s)")
+
+        if keep_columns:
+            print("  ⊘ Keeping the old columns on properties (--keep-columns); re-run without it to drop them")
+        else:
+            start = time.perf_counter()
+            with engine.begin() as conn:
+                for name in columns:
+                    conn.execute(text(f"ALTER TABLE properties DROP COLUMN {quote(name)}"))
+            print(f"  ✓ Dropped {len(columns)} columns from properties ({time.perf_counter() - start:.1f}s)")
+    except Exception as e:
+        print(f"\n✗ Migration failed: {e}")
+        return False
+
+    if vacuum:
+        start = time.perf_counter()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM" if engine.dialect.name == "sqlite" else "VACUUM FULL properties"))
+        print(f"  ✓ Vacuumed ({time.perf_counter() - start:.1f}s)")
+
+    print("\n✓ Migration complete!")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move detail-page columns from properties into property_details.")
+    parser.add_argument("--database", default=None, help="Database URL (overrides env)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--keep-columns", action="store_true", help="Copy into property_details but leave the old columns")
+    parser.add_argument("--vacuum", action="store_true", help="Reclaim space afterwards (VACUUM / VACUUM FULL properties)")
+    args = parser.parse_args()
+    success = migrate(get_database_url(args.database), dry_run=args.dry_run, keep_columns=args.keep_columns, vacuum=args.vacuum)
+    sys.exit(0 if success else 1)
@@ -1,14 +1,21 @@
 """
 Script to populate database with properties from NWMLS API.
 Fetches in batches of 100: pull from API -> insert/commit -> migrate images to R2, until no more pages or limit reached.
+With --incremental, only records modified since the last completed sync are fetched (ModificationTimestamp high-water mark).
+Records that fail to transform or write go to the ingest_dead_letters table; --retry-dead-letters re-ingests them.
+With --partitions N, N ModificationTimestamp windows of the feed are crawled concurrently, each with its own checkpoint.
 API config (MLSGRID_BEARER_TOKEN, MLSGRID_API_URL) is read from backend/.env or project root .env.
 """
 import sys
 import os
+import hashlib
+import json
+import re
+import queue
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-import requests
 from typing import List, Dict, Any, Tuple, Optional
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
@@ -48,8 +55,20 @@ elif os.path.exists(root_env):
 else:
     load_dotenv()
 
-from database.models import init_database, get_session, Property, PropertyMedia, AppMetadata
-from services.property_transformer import transform_property, transform_media
+from sqlalchemy import func
+
+from database.models import init_database, get_session, Property, PropertyMedia, AppMetadata, IngestDeadLetter, HIGH_WATER_MARK_KEY, CHECKPOINT_KEY
+from database.bulk import (
+    supports_upsert, upsert_properties, insert_properties, delete_properties, reconcile_media, refresh_media_json,
+    supports_copy, copy_insert,
+)
+from services.property_transformer import transform_property, transform_media, is_listing_removed, parse_date, source_fingerprint
+from services.ingest_pipeline import Pipeline
+from services.transform_pool import TransformPool
+from services.rate_limiter import get_shared_limiter
+from services.page_archive import PageArchiveWriter, iter_archive_pages
+from services.mlsgrid_client import MLSGridClient
+from services.odata_select import metadata_fields, select_params
 
 def _migrate_batch_to_r2(property_ids: List[str], database_url: str) -> None:
     """Run image migration for the given property IDs (called after each batch insert)."""
@@ -63,48 +82,119 @@ def _migrate_batch_to_r2(property_ids: List[str], database_url: str) -> None:
     )
 
 # API Configuration from env
-BEARER_TOKEN = os.getenv("MLSGRID_BEARER_TOKEN")
 API_URL = os.getenv("MLSGRID_API_URL")
 
 # Batch size for API fetch and insert/commit (then migrate R2 after each batch)
 API_BATCH_SIZE = 100
-# Max retries for property transform and for batch commit
-MAX_INSERT_RETRIES = 3
+# Partitioned crawl: windows start this many years back unless --partition-since or a high-water mark is given
+# (the first window is open-ended, so older records are still fetched)
+PARTITION_DEFAULT_YEARS = 5
+# Incremental sync must see MlgCanView=false records (MLS Grid's deletions), so this clause is dropped
+_MLG_CAN_VIEW_CLAUSE = re.compile(r"(\s+and\s+)?\bMlgCanView\s+eq\s+true\b(\s+and\s+)?", re.IGNORECASE)
 
 
-def _get_api_headers() -> dict:
-    """Build request headers; raises if API config is missing."""
-    if not BEARER_TOKEN or not API_URL:
-        raise ValueError(
-            "MLS Grid API config missing. Set MLSGRID_BEARER_TOKEN and MLSGRID_API_URL in backend/.env"
-        )
-    return {
-        "Authorization": f"Bearer {BEARER_TOKEN}",
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
+_client: MLSGridClient | None = None
+# $select/$expand overriding API_URL's on first-page URLs when --select is on (set by _enable_select)
+_select_params: Dict[str, str] | None = None
+# Parse API pages incrementally as they download (--stream-parse) instead of reading each body whole
+_stream_pages = False
+
+
+def _get_client() -> MLSGridClient:
+    """Shared API client (one connection pool per process); raises if API config is missing."""
+    global _client
+    if _client is None:
+        _client = MLSGridClient.from_env()
+    return _client
 
 
-def _first_page_url_with_top(top: int = API_BATCH_SIZE) -> str:
-    """Build first API URL with $top=top so we get batches of that size."""
+def _first_page_url_with_top(
+    top: int = API_BATCH_SIZE,
+    modified_since: str | None = None,
+    window: Tuple[str | None, str | None] | None = None,
+) -> str:
+    """Build first API URL with $top=top so we get batches of that size.
+    With modified_since, only records with ModificationTimestamp after it are requested (incremental sync).
+    With window=(after, until), only records with after < ModificationTimestamp <= until (either bound may be None)."""
     parsed = urlparse(API_URL)
     query = parse_qs(parsed.query, keep_blank_values=True)
     query["$top"] = [str(top)]
+    if _select_params:
+        query.update({key: [value] for key, value in _select_params.items()})
+    existing_filter = (query.get("$filter") or [""])[0]
+    clauses = []
+    if modified_since:
+        existing_filter = _MLG_CAN_VIEW_CLAUSE.sub(
+            lambda m: " and " if m.group(1) and m.group(2) else "", existing_filter
+        ).strip()
+        clauses.append(f"ModificationTimestamp gt {modified_since}")
+    if window is not None:
+        after, until = window
+        if after:
+            clauses.append(f"ModificationTimestamp gt {after}")
+        if until:
+            clauses.append(f"ModificationTimestamp le {until}")
+    if clauses:
+        query["$filter"] = [" and ".join(([existing_filter] if existing_filter else []) + clauses)]
     new_query = urlencode(query, doseq=True)
     return urlunparse(parsed._replace(query=new_query))
 
 
-def fetch_next_page(next_url: str | None, page_num: int, batch_size: int = API_BATCH_SIZE) -> Tuple[List[Dict[str, Any]], str | None]:
-    """Fetch one page from the API. Returns (list of properties, next_link or None). batch_size used only for first page."""
-    headers = _get_api_headers()
-    url = next_url if next_url is not None else _first_page_url_with_top(batch_size)
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"API request failed: {response.status_code} - {response.text}")
-    data = response.json()
-    page_properties = data.get("value", [])
-    next_link = data.get("@odata.nextLink")
-    return page_properties, next_link
+def fetch_next_page(
+    next_url: str | None,
+    page_num: int,
+    batch_size: int = API_BATCH_SIZE,
+    modified_since: str | None = None,
+    window: Tuple[str | None, str | None] | None = None,
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Fetch one page from the API. Returns (list of properties, next_link or None).
+    batch_size, modified_since and window are used only for the first page."""
+    client = _get_client()
+    url = next_url if next_url is not None else _first_page_url_with_top(batch_size, modified_since, window)
+    return client.get_page(url, stream=_stream_pages)
+
+
+def _enable_select() -> None:
+    """Project first-page requests onto the fields the transformers read ($select, and $select inside
+    API_URL's $expand), limited to names the server's $metadata declares. Left off if $metadata can't be read."""
+    global _select_params
+    expand = (parse_qs(urlparse(API_URL).query).get("$expand") or [""])[0]
+    try:
+        metadata = metadata_fields(_get_client().get_metadata())
+    except Exception as e:
+        print(f"  ⚠ Could not read $metadata ({e}); fetching full records")
+        return
+    if "Property" not in metadata:
+        print("  ⚠ $metadata has no Property entity; fetching full records")
+        return
+    _select_params = select_params(expand, metadata)
+    selected = len(_select_params["$select"].split(","))
+    print(f"  ✓ $select: {selected} of {len(metadata['Property']['properties'])} Property fields"
+          + (f"; $expand={_select_params['$expand']}" if "$expand" in _select_params else ""))
+
+
+def _odata_timestamp(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _partition_start(partition_since: str | None, modified_since: str | None) -> datetime:
+    """Lower edge of the partition windows: partition_since, else the high-water mark, else PARTITION_DEFAULT_YEARS ago."""
+    for value in (partition_since, modified_since):
+        parsed = parse_date(value) if value else None
+        if parsed:
+            return parsed.replace(tzinfo=None)
+    return datetime.utcnow() - timedelta(days=365 * PARTITION_DEFAULT_YEARS)
+
+
+def _partition_windows(count: int, start: datetime, end: datetime) -> List[Tuple[str | None, str | None]]:
+    """Split start..end into count equal ModificationTimestamp windows (after, until]. The first window
+    is open below and the last open above, so together they always cover the whole feed."""
+    step = (end - start) / count
+    bounds = [_odata_timestamp(start + step * i) for i in range(1, count)]
+    return [
+        (bounds[i - 1] if i > 0 else None, bounds[i] if i < count - 1 else None)
+        for i in range(count)
+    ]
 
 
 def get_database_url(database_url: str = None):
@@ -137,6 +227,109 @@ def _id_from_raw(raw_prop: Dict[str, Any]) -> str:
     return raw_prop.get("ListingId") or raw_prop.get("ListingKey") or ""
 
 
+def _read_metadata(session, key: str) -> Optional[str]:
+    """Return AppMetadata value for key, or None."""
+    row = session.query(AppMetadata).filter_by(key=key).first()
+    return row.value if row else None
+
+
+def _write_metadata(session, key: str, value: str) -> None:
+    """Insert or update an AppMetadata row (caller commits)."""
+    row = session.query(AppMetadata).filter_by(key=key).first()
+    if row:
+        row.value = value
+    else:
+        session.add(AppMetadata(key=key, value=value))
+
+
+def _newer_timestamp(current: Optional[str], candidate: Optional[str]) -> Optional[str]:
+    """Return whichever API ModificationTimestamp string is later (keeps the original string for the $filter)."""
+    if not candidate:
+        return current
+    if not current:
+        return candidate
+    current_key = (parse_date(current) or datetime.min, current)
+    candidate_key = (parse_date(candidate) or datetime.min, candidate)
+    return candidate if candidate_key > current_key else current
+
+
+def _delete_properties(session, property_ids: List[str]) -> None:
+    """Delete properties and their details and media rows (caller commits). R2 objects are left in place."""
+    if not property_ids:
+        return
+    delete_properties(session, property_ids)
+
+
+def _lookup_existing(session, property_ids: List[str]) -> Dict[str, Optional[str]]:
+    """Return {id: source_fingerprint} for the given ids that are already in the database.
+    One IN query per 500 ids, so callers can check a page at a time instead of holding every id."""
+    found: Dict[str, Optional[str]] = {}
+    for start in range(0, len(property_ids), 500):
+        ids = property_ids[start:start + 500]
+        found.update(session.query(Property.id, Property.source_fingerprint).filter(Property.id.in_(ids)))
+    return found
+
+
+def _begin_savepoint_transaction(session) -> None:
+    """pysqlite only opens a transaction before DML, so a SAVEPOINT sent first becomes the outermost
+    transaction and its RELEASE commits. Open the transaction explicitly before per-row savepoints."""
+    connection = session.connection()
+    if connection.dialect.name == "sqlite" and not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+def _save_dead_letter(session, raw_prop: Dict[str, Any], stage: str, error) -> None:
+    """Insert or update the dead-letter row for a failed raw record (caller commits).
+    Records are matched by listing id, or by payload hash when they have none."""
+    listing_id = _id_from_raw(raw_prop) or None
+    message = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+    payload_hash = hashlib.sha256(json.dumps(raw_prop, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    now = datetime.utcnow()
+    if listing_id:
+        row = session.query(IngestDeadLetter).filter_by(listing_id=listing_id).first()
+    else:
+        row = session.query(IngestDeadLetter).filter(
+            IngestDeadLetter.listing_id.is_(None), IngestDeadLetter.payload_hash == payload_hash
+        ).first()
+    if row:
+        row.stage = stage
+        row.error = message
+        row.payload = json.dumps(raw_prop)
+        row.payload_hash = payload_hash
+        row.attempts = (row.attempts or 0) + 1
+        row.last_failed_at = now
+    else:
+        session.add(IngestDeadLetter(
+            listing_id=listing_id, payload_hash=payload_hash, stage=stage, error=message,
+            payload=json.dumps(raw_prop), attempts=1, first_failed_at=now, last_failed_at=now,
+        ))
+
+
+def _dead_letter_pages(engine, batch_size: int):
+    """Yield (records, next_link) pages of dead-lettered raw records, oldest failure first, in the
+    shape of archived pages so they can be fed to _PopulateRun.replay_pages."""
+    session = get_session(engine)
+    try:
+        dead_letter_ids = [
+            row[0] for row in session.query(IngestDeadLetter.id).order_by(IngestDeadLetter.first_failed_at, IngestDeadLetter.id)
+        ]
+    finally:
+        session.close()
+    print(f"  {len(dead_letter_ids)} dead-lettered records to retry.")
+    for start in range(0, len(dead_letter_ids), batch_size):
+        page_ids = dead_letter_ids[start:start + batch_size]
+        session = get_session(engine)
+        try:
+            payloads = dict(
+                session.query(IngestDeadLetter.id, IngestDeadLetter.payload)
+                .filter(IngestDeadLetter.id.in_(page_ids))
+            )
+        finally:
+            session.close()
+        has_more = start + batch_size < len(dead_letter_ids)
+        yield [json.loads(payloads[dead_letter_id]) for dead_letter_id in page_ids if dead_letter_id in payloads], ("dead-letters" if has_more else None)
+
+
 def _apply_property_data(existing: Property, property_data: dict) -> None:
     """Update existing Property with transformed API data. Skips id and R2-only columns."""
     skip_keys = {"id", "primary_image_r2_key", "primary_image_r2_url", "primary_image_stored_at"}
@@ -147,6 +340,695 @@ def _apply_property_data(existing: Property, property_data: dict) -> None:
             setattr(existing, key, value)
 
 
+class _Cursor:
+    """One @odata.nextLink chain: the whole feed, or one ModificationTimestamp window of it in a
+    partitioned crawl. Pages are numbered from 1; checkpoint_page is the last page such that it and every
+    page before it are committed (or needed no writes), so a resumed crawl starts after it."""
+
+    def __init__(self, window: Tuple[str | None, str | None] | None = None):
+        self.window = window
+        self.checkpoint_page = 0
+        self.start_next_url: str | None = None
+        self.page_next_urls: Dict[int, str | None] = {}
+        self.done_pages: set = set()
+        self.exhausted = False
+
+    def label(self) -> str:
+        after, until = self.window or (None, None)
+        return f"({after or '…'}, {until or '…'}]"
+
+    def finished(self, page_num: int) -> None:
+        """Mark a page as handled and advance the contiguous checkpoint (caller holds the run lock)."""
+        self.done_pages.add(page_num)
+        while self.checkpoint_page + 1 in self.done_pages:
+            self.checkpoint_page += 1
+            self.done_pages.discard(self.checkpoint_page)
+
+    def state(self) -> Optional[dict]:
+        """{"page", "next_url"} to resume from, or None before the first page is finished (caller holds the lock)."""
+        if self.checkpoint_page not in self.page_next_urls:
+            return None
+        for page_num in [p for p in self.page_next_urls if p < self.checkpoint_page]:
+            del self.page_next_urls[page_num]
+        return {"page": self.checkpoint_page, "next_url": self.page_next_urls[self.checkpoint_page]}
+
+    def restore(self, state: dict) -> None:
+        self.checkpoint_page = state["page"]
+        self.start_next_url = state["next_url"]
+        if self.checkpoint_page:
+            self.page_next_urls[self.checkpoint_page] = self.start_next_url
+            self.exhausted = self.start_next_url is None
+
+
+class _PopulateRun:
+    """State and per-batch steps of one populate run, shared by the sequential loop and the pipeline.
+    A batch is a dict: page_num, fetched, raw (records to write), removed_ids, stored_ids (raw ids already
+    in the database when the page was selected), records (transformed)."""
+
+    def __init__(
+        self,
+        session,
+        database_url: str,
+        limit: int | None,
+        refresh: bool,
+        refresh_only: bool,
+        incremental: bool,
+        copy: bool = False,
+        skip_unchanged: bool = True,
+    ):
+        self.database_url = database_url
+        self.limit = limit
+        self.refresh = refresh
+        self.refresh_only = refresh_only
+        self.incremental = incremental
+        self.lock = threading.Lock()
+        self.use_upsert = supports_upsert(session)
+        self.transform_pool: TransformPool | None = None
+        self.archive: PageArchiveWriter | None = None  # raw pages are written here as they are fetched
+        self.replay_pages = None  # iterator of archived (records, next_link) used instead of the API
+        self.replay_label = "archive"
+        self.checkpointing = True  # off when replaying, so a live run's checkpoint is left alone
+
+        # Checkpointing: one cursor for the whole feed, or one per window in a partitioned crawl. Pages get
+        # a run-wide number as they are yielded; page_cursors maps it back to (cursor, page in that cursor)
+        self.batch_size = API_BATCH_SIZE
+        self.cursors: List[_Cursor] = [_Cursor()]
+        self.page_count = 0
+        self.page_cursors: Dict[int, Tuple[_Cursor, int]] = {}
+        self.use_copy = copy and not refresh and supports_copy(session)
+        if copy and not self.use_copy:
+            print("  ⚠ --copy needs PostgreSQL (psycopg2) and no --refresh; using bulk inserts instead.")
+
+        # Existing ids and fingerprints are looked up per page (flat memory at any table size); in_flight
+        # holds ids selected but not yet committed (bounded by the pages in flight) so a listing repeated
+        # on a later page isn't inserted twice before the first write commits
+        self.engine = session.get_bind()
+        self.skip_unchanged = refresh and skip_unchanged
+        self.in_flight: set = set()
+        existing_count = session.query(func.count(Property.id)).scalar()
+        print(f"  {existing_count} properties in database; existing IDs are checked page by page.")
+
+        self.modified_since: str | None = None
+        if incremental:
+            self.modified_since = _read_metadata(session, HIGH_WATER_MARK_KEY)
+            if self.modified_since:
+                print(f"  High-water mark: ModificationTimestamp gt {self.modified_since}")
+            else:
+                print("  No high-water mark yet; running a full sync to establish one.")
+        self.high_water = self.modified_since
+        self.feed_exhausted = False
+
+        self.inserted_count = 0
+        self.updated_count = 0
+        self.skipped_count = 0
+        self.unchanged_count = 0
+        self.deleted_count = 0
+        self.error_count = 0
+        self.dead_letter_count = 0
+        self.reserved = 0  # records claimed against limit by select()
+        self.total_inserted = 0  # records whose batch commit finished (ok or failed)
+        self.start_time = time.perf_counter()
+
+    @property
+    def partitioned(self) -> bool:
+        return len(self.cursors) > 1
+
+    def partition(self, windows: List[Tuple[str | None, str | None]]) -> None:
+        """Crawl these ModificationTimestamp windows concurrently instead of one cursor over the feed."""
+        self.cursors = [_Cursor(window) for window in windows]
+
+    def _register_page(self, cursor: _Cursor, cursor_page: int, next_url: str | None) -> int:
+        """Record a fetched page's resume URL and give it a run-wide page number."""
+        with self.lock:
+            cursor.page_next_urls[cursor_page] = next_url
+            self.page_count += 1
+            self.page_cursors[self.page_count] = (cursor, cursor_page)
+            return self.page_count
+
+    def page_finished(self, page_num: int) -> None:
+        """Mark a page as fully handled and advance its cursor's contiguous checkpoint."""
+        with self.lock:
+            cursor, cursor_page = self.page_cursors.pop(page_num)
+            cursor.finished(cursor_page)
+
+    def checkpoint_state(self) -> Optional[dict]:
+        """Serializable resume point, or None before the first page is finished."""
+        with self.lock:
+            if self.partitioned:
+                position = {"partitions": [
+                    {"window": list(cursor.window), **(cursor.state() or {"page": 0, "next_url": None})}
+                    for cursor in self.cursors
+                ]}
+            else:
+                position = self.cursors[0].state()
+                if position is None:
+                    return None
+            return {
+                **position,
+                "refresh": self.refresh,
+                "refresh_only": self.refresh_only,
+                "incremental": self.incremental,
+                "batch_size": self.batch_size,
+                "modified_since": self.modified_since,
+                "high_water": self.high_water,
+                "inserted": self.inserted_count,
+                "updated": self.updated_count,
+                "skipped": self.skipped_count,
+                "unchanged": self.unchanged_count,
+                "deleted": self.deleted_count,
+                "errors": self.error_count,
+                "processed": self.total_inserted,
+                "saved_at": datetime.utcnow().isoformat(),
+            }
+
+    def restore_checkpoint(self, checkpoint: dict) -> None:
+        """Continue counters, position and incremental state from a saved checkpoint."""
+        if "partitions" in checkpoint:
+            self.partition([tuple(partition["window"]) for partition in checkpoint["partitions"]])
+            for cursor, partition in zip(self.cursors, checkpoint["partitions"]):
+                cursor.restore(partition)
+        else:
+            self.cursors[0].restore(checkpoint)
+            self.page_count = checkpoint["page"]  # keep page numbers continuous with the interrupted run
+        self.modified_since = checkpoint.get("modified_since")
+        self.high_water = _newer_timestamp(checkpoint.get("high_water"), self.modified_since)
+        self.inserted_count = checkpoint.get("inserted", 0)
+        self.updated_count = checkpoint.get("updated", 0)
+        self.skipped_count = checkpoint.get("skipped", 0)
+        self.unchanged_count = checkpoint.get("unchanged", 0)
+        self.deleted_count = checkpoint.get("deleted", 0)
+        self.error_count = checkpoint.get("errors", 0)
+        self.total_inserted = self.reserved = checkpoint.get("processed", 0)
+
+    def limit_reached(self) -> bool:
+        return self.limit is not None and self.reserved >= self.limit
+
+    def iter_pages(self, batch_size: int):
+        """Yield (page_num, page_properties, next_url) following @odata.nextLink until the feed or limit ends."""
+        if self.partitioned:
+            yield from self._iter_partitions(batch_size)
+            return
+        cursor = self.cursors[0]
+        next_url = cursor.start_next_url
+        cursor_page = cursor.checkpoint_page
+        if cursor.exhausted:
+            print("  Checkpoint is at the last page; nothing left to fetch.")
+            self.feed_exhausted = True
+            return
+        while not self.limit_reached():
+            cursor_page += 1
+            if self.replay_pages is not None:
+                print(f"\n2. Reading batch {cursor_page} from {self.replay_label}...")
+                # Replay runs to the end of the source: a partitioned crawl archives a null next_link
+                # at the end of every partition, so next_link doesn't mark the last page
+                replayed = next(self.replay_pages, None)
+                if replayed is None:
+                    print(f"  End of {self.replay_label}.")
+                    self.feed_exhausted = True
+                    return
+                page_properties, next_url = replayed
+                if not page_properties:
+                    cursor_page -= 1
+                    continue
+                page_num = self._register_page(cursor, cursor_page, next_url)
+                yield page_num, page_properties, next_url
+                continue
+            print(f"\n2. Fetching batch {cursor_page} (up to {batch_size} from API)...")
+            page_properties, next_url = fetch_next_page(next_url, cursor_page, batch_size, self.modified_since)
+            if self.archive is not None and page_properties:
+                self.archive.write_page(cursor_page, page_properties, next_url)
+            if not page_properties:
+                print(f"  No more data.")
+                self.feed_exhausted = True
+                return
+            page_num = self._register_page(cursor, cursor_page, next_url)
+            yield page_num, page_properties, next_url
+            if not next_url:
+                print("  No more pages (@odata.nextLink empty).")
+                self.feed_exhausted = True
+                return
+        print(f"  Reached limit {self.limit}.")
+
+    def _iter_partitions(self, batch_size: int):
+        """Crawl every unfinished partition on its own thread and yield their pages as they arrive.
+        All threads share the API client, so its quota limiter paces the crawl as a whole."""
+        active = [cursor for cursor in self.cursors if not cursor.exhausted]
+        pages: queue.Queue = queue.Queue(maxsize=2 * max(1, len(active)))
+        stop = threading.Event()
+
+        def _put(item) -> None:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+
+        def _crawl(cursor: _Cursor) -> None:
+            next_url = cursor.start_next_url
+            cursor_page = cursor.checkpoint_page
+            try:
+                while not stop.is_set():
+                    cursor_page += 1
+                    page_properties, next_url = fetch_next_page(
+                        next_url, cursor_page, batch_size, self.modified_since, window=cursor.window
+                    )
+                    _put((cursor, cursor_page, page_properties, next_url, None))
+                    if not page_properties or not next_url:
+                        break
+                _put((cursor, None, None, None, None))  # partition finished (or stopped)
+            except Exception as e:
+                _put((cursor, None, None, None, e))
+
+        print(f"\n2. Crawling {len(active)} of {len(self.cursors)} partitions concurrently (up to {batch_size} per page)...")
+        threads = [
+            threading.Thread(target=_crawl, args=(cursor,), name=f"partition-{index}", daemon=True)
+            for index, cursor in enumerate(active, 1)
+        ]
+        for thread in threads:
+            thread.start()
+        running = len(threads)
+        try:
+            while running and not self.limit_reached():
+                cursor, cursor_page, page_properties, next_url, error = pages.get()
+                if error is not None:
+                    raise error
+                if cursor_page is None:
+                    running -= 1
+                    continue
+                if not page_properties:
+                    cursor.exhausted = True
+                    continue
+                page_num = self._register_page(cursor, cursor_page, next_url)
+                print(f"\n2. Partition {cursor.label()} page {cursor_page} (batch {page_num}, {len(page_properties)} records)")
+                if self.archive is not None:
+                    self.archive.write_page(page_num, page_properties, next_url)
+                if not next_url:
+                    cursor.exhausted = True
+                yield page_num, page_properties, next_url
+            if running:
+                print(f"  Reached limit {self.limit}.")
+        finally:
+            stop.set()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    pages.get(timeout=0.1)  # unblock crawlers waiting on a full queue
+                except queue.Empty:
+                    pass
+            for thread in threads:
+                thread.join()
+        self.feed_exhausted = all(cursor.exhausted for cursor in self.cursors)
+        if self.feed_exhausted:
+            print("  All partitions read to the end.")
+
+    def select(self, page_num: int, page_properties: List[Dict[str, Any]]) -> Optional[dict]:
+        """Apply limit, existing-ID skipping and incremental deletions to a fetched page.
+        Returns a batch, or None when nothing in the page needs writing."""
+        with self.lock:
+            # A page cut short by the limit isn't finished, so a resumed run fetches it again
+            complete = self.limit is None or len(page_properties) <= self.limit - self.reserved
+        batch = self._select(page_num, page_properties)
+        if batch is None:
+            if complete:
+                self.page_finished(page_num)
+            return None
+        batch["complete"] = complete
+        return batch
+
+    def _existing(self, property_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Look up which of property_ids are stored (with their fingerprints) in a short-lived session,
+        so select() can run on pipeline threads while the write stage owns the main session."""
+        lookup_session = get_session(self.engine)
+        try:
+            return _lookup_existing(lookup_session, property_ids)
+        finally:
+            lookup_session.close()
+
+    def _select(self, page_num: int, page_properties: List[Dict[str, Any]]) -> Optional[dict]:
+        stored = self._existing([_id_from_raw(p) for p in page_properties])
+        with self.lock:
+            to_process = page_properties
+            if self.limit is not None:
+                remaining = self.limit - self.reserved
+                to_process = page_properties[:remaining]
+
+            # Incremental: off-market / MlgCanView=false records are deletions, the rest are upserts
+            removed_ids: List[str] = []
+            if self.incremental:
+                for raw_prop in page_properties:
+                    self.high_water = _newer_timestamp(self.high_water, raw_prop.get("ModificationTimestamp"))
+                removed_ids = [
+                    _id_from_raw(p) for p in to_process
+                    if is_listing_removed(p) and _id_from_raw(p) in stored
+                ]
+                orig_len = len(to_process)
+                to_process = [p for p in to_process if not is_listing_removed(p)]
+                self.skipped_count += orig_len - len(to_process) - len(removed_ids)
+
+            # Remove properties already in DB or in an uncommitted batch (unless refresh) to save time
+            if not self.refresh:
+                orig_len = len(to_process)
+                to_process = [
+                    p for p in to_process
+                    if _id_from_raw(p) not in stored and _id_from_raw(p) not in self.in_flight
+                ]
+                self.skipped_count += orig_len - len(to_process)
+                if not to_process:
+                    print(f"  Fetched {len(page_properties)} properties; all {orig_len} already in DB, skipping batch.")
+                    return None
+
+            # Refresh-only: only process properties that already exist in DB (never insert new)
+            if self.refresh_only:
+                orig_len = len(to_process)
+                to_process = [p for p in to_process if _id_from_raw(p) in stored]
+                self.skipped_count += orig_len - len(to_process)
+                if not to_process:
+                    print(f"  Fetched {len(page_properties)} properties; none in this batch exist in DB, skipping.")
+                    return None
+
+            # Refresh: skip listings whose source fingerprint matches what was last written
+            if self.skip_unchanged:
+                orig_len = len(to_process)
+                to_process = [
+                    p for p in to_process
+                    if stored.get(_id_from_raw(p)) != source_fingerprint(p)
+                ]
+                self.unchanged_count += orig_len - len(to_process)
+
+            if not to_process and not removed_ids:
+                if self.skip_unchanged:
+                    print(f"  Fetched {len(page_properties)} properties; none changed since last ingest, skipping batch.")
+                return None
+            self.reserved += len(to_process)
+            self.in_flight.update(_id_from_raw(p) for p in to_process)
+
+        print(f"  Fetched {len(page_properties)} properties; processing {len(to_process)} (total so far: {self.total_inserted})")
+        return {
+            "page_num": page_num,
+            "fetched": len(page_properties),
+            "raw": to_process,
+            "removed_ids": removed_ids,
+            "stored_ids": {_id_from_raw(p) for p in to_process if _id_from_raw(p) in stored},
+        }
+
+    def _record_error(self, idx: int, total: int, raw_prop: Dict[str, Any], error, stage: str) -> None:
+        """Count and log a failed record and queue its raw payload for the dead-letter table."""
+        listing_id = raw_prop.get("ListingId") or raw_prop.get("ListingKey", "unknown")
+        print(f"\n  [{idx}/{total}] ✗ Error {'transforming' if stage == 'transform' else 'writing'} property {listing_id}: {error}")
+        with self.lock:
+            self.error_count += 1
+            show_traceback = isinstance(error, Exception) and self.error_count <= 3
+        if show_traceback:
+            import traceback
+            traceback.print_exception(error)
+
+    def transform(self, batch: dict) -> dict:
+        """Transform a batch's raw records (pure CPU, no DB access). Transforms are deterministic, so a
+        failing record isn't retried; it goes to batch["dead_letters"] as (raw, stage, error).
+        With a transform pool, chunks of the batch are transformed in worker processes instead."""
+        records: List[Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]] = []
+        dead_letters: List[Tuple[Dict[str, Any], str, Any]] = []
+        raw_list = batch["raw"]
+        if self.transform_pool is not None:
+            results = self.transform_pool.transform(raw_list)
+        else:
+            results = []
+            for raw_prop in raw_list:
+                try:
+                    results.append((transform_property(raw_prop), transform_media(raw_prop), None))
+                except Exception as e:
+                    results.append((None, None, e))
+        for idx, (raw_prop, (property_data, media_list, error)) in enumerate(zip(raw_list, results), 1):
+            if error:
+                self._record_error(idx, len(raw_list), raw_prop, error, "transform")
+                dead_letters.append((raw_prop, "transform", error))
+            else:
+                records.append((raw_prop, property_data, media_list))
+        batch["records"] = records
+        batch["dead_letters"] = dead_letters
+        return batch
+
+    def _upsert_records(self, session, records, stored_ids: set) -> Tuple[List[str], List[str], int, int]:
+        """Upsert a batch in a handful of statements, diffing media against what is stored.
+        Returns (ids, ids with images to upload, inserted, updated)."""
+        property_list = [property_data for _, property_data, _ in records]
+        media_rows = [media_data for _, _, media_list in records for media_data in media_list]
+        batch_ids = [property_data["id"] for property_data in property_list]
+        media_counts, needs_upload = reconcile_media(session, property_list, media_rows)
+        statements = upsert_properties(session, property_list)
+        refresh_media_json(session, batch_ids)
+        inserted = sum(1 for property_id in batch_ids if property_id not in stored_ids)
+        print(
+            f"  Upserted {len(batch_ids)} properties in {statements} statements; media: "
+            f"{media_counts['unchanged']} unchanged, {media_counts['updated']} reordered/updated, "
+            f"{media_counts['changed']} changed, {media_counts['added']} new, {media_counts['removed']} removed."
+        )
+        upload_ids = [property_id for property_id in batch_ids if property_id in needs_upload]
+        return batch_ids, upload_ids, inserted, len(batch_ids) - inserted
+
+    def _write_one(self, session, property_data: dict, media_list: List[dict], stored_ids: set) -> Optional[Tuple[bool, bool]]:
+        """Write a single transformed record with the run's write path.
+        Returns (inserted, needs image upload), or None when refresh_only skips a listing not in the DB."""
+        property_id = property_data["id"]
+        if self.refresh and self.use_upsert:
+            _, needs_upload = reconcile_media(session, [property_data], media_list)
+            upsert_properties(session, [property_data])
+            refresh_media_json(session, [property_id])
+            return property_id not in stored_ids, property_id in needs_upload
+        if self.refresh:
+            existing = session.query(Property).filter_by(id=property_id).first()
+            if existing:
+                _, needs_upload = reconcile_media(session, [property_data], media_list)
+                _apply_property_data(existing, property_data)
+                refresh_media_json(session, [property_id])
+                return False, property_id in needs_upload
+            if self.refresh_only:
+                return None
+        insert_properties(session, [property_data], media_list)
+        return True, True
+
+    def _write_records_individually(self, session, records, stored_ids: set, dead_letters: list) -> Tuple[List[str], List[str], int, int]:
+        """Write each record inside its own savepoint, so a bad record is rolled back alone and the rest of
+        the batch still commits. Failed records are appended to dead_letters.
+        When refresh_only is True, records are already filtered to stored ids, so we never insert.
+        Returns (ids, ids with images to upload, inserted, updated)."""
+        batch_ids: List[str] = []
+        upload_ids: List[str] = []
+        inserted = updated = 0
+        _begin_savepoint_transaction(session)
+        for idx, (raw_prop, property_data, media_list) in enumerate(records, 1):
+            try:
+                with session.begin_nested():
+                    written = self._write_one(session, property_data, media_list, stored_ids)
+            except Exception as e:
+                self._record_error(idx, len(records), raw_prop, e, "write")
+                dead_letters.append((raw_prop, "write", e))
+                continue
+            if written is None:
+                continue
+            is_insert, needs_upload = written
+            batch_ids.append(property_data["id"])
+            if needs_upload:
+                upload_ids.append(property_data["id"])
+            if is_insert:
+                inserted += 1
+            else:
+                updated += 1
+                if self.refresh and (self.updated_count + updated <= 5 or (self.updated_count + updated) % 50 == 0):
+                    print(f"  [{idx}/{len(records)}] Refreshed {property_data['id']}")
+        return batch_ids, upload_ids, inserted, updated
+
+    def _write_batch(self, session, batch: dict) -> Tuple[List[str], List[str], int, int]:
+        """Stage a whole batch with the fastest write path for the run (caller commits)."""
+        records = batch["records"]
+        if self.refresh and self.use_upsert:
+            # Refresh path, set-based: multi-row INSERT ... ON CONFLICT DO UPDATE, then replace media in bulk
+            return self._upsert_records(session, records, batch["stored_ids"])
+        if self.refresh:
+            return self._write_records_individually(session, records, batch["stored_ids"], batch["dead_letters"])
+        # Insert-only path: no per-row existing check; bulk insert the whole batch
+        property_list = [property_data for _, property_data, _ in records]
+        media_rows = [media_data for _, _, media_list in records for media_data in media_list]
+        if property_list and self.use_copy:
+            # COPY into a staging table, then one INSERT ... SELECT per table (ids already present are skipped)
+            counts = copy_insert(session, property_list, media_rows)
+            print(f"  Copied {counts['properties']} properties and {counts['property_media']} media rows.")
+        elif property_list:
+            insert_properties(session, property_list, media_rows)
+        batch_ids = [property_data["id"] for property_data in property_list]
+        return batch_ids, batch_ids, len(property_list), 0
+
+    def _settle_dead_letters(self, session, batch_ids: List[str], dead_letters: list) -> None:
+        """Stage dead-letter rows for this batch's failures and drop those of listings now written."""
+        for start in range(0, len(batch_ids), 500):
+            session.query(IngestDeadLetter).filter(
+                IngestDeadLetter.listing_id.in_(batch_ids[start:start + 500])
+            ).delete(synchronize_session=False)
+        for raw_prop, stage, error in dead_letters:
+            _save_dead_letter(session, raw_prop, stage, error)
+
+    def _dead_letter_batch(self, batch: dict, error: Exception) -> None:
+        """Save every raw record of a batch that could not be committed at all (fresh session, best effort)."""
+        failed = {id(raw_prop) for raw_prop, _, _ in batch["dead_letters"]}
+        dead_letters = list(batch["dead_letters"])
+        dead_letters += [(raw_prop, "write", error) for raw_prop in batch["raw"] if id(raw_prop) not in failed]
+        dead_letter_session = get_session(self.engine)
+        try:
+            for raw_prop, stage, record_error in dead_letters:
+                _save_dead_letter(dead_letter_session, raw_prop, stage, record_error)
+            dead_letter_session.commit()
+            with self.lock:
+                self.dead_letter_count += len(dead_letters)
+        except Exception as dead_letter_error:
+            dead_letter_session.rollback()
+            print(f"  ✗ Could not save dead letters: {dead_letter_error}")
+        finally:
+            dead_letter_session.close()
+
+    def write(self, session, batch: dict) -> Optional[List[str]]:
+        """Write and commit one transformed batch. If the set-based write or its commit fails, the batch
+        is rolled back and rewritten one savepoint per record, so only the bad records are lost (to the
+        dead-letter table). Returns the committed property IDs with images to upload, or None if even the
+        per-record commit failed."""
+        records = batch["records"]
+        removed_ids = batch["removed_ids"]
+        dead_letters = batch["dead_letters"]
+        if removed_ids:
+            print(f"  Deleting {len(removed_ids)} off-market / MlgCanView=false properties.")
+
+        try:
+            _delete_properties(session, removed_ids)
+            batch_ids, upload_ids, inserted, updated = self._write_batch(session, batch)
+            self._settle_dead_letters(session, batch_ids, dead_letters)
+            session.commit()
+        except Exception as batch_error:
+            session.rollback()
+            print(f"  ⚠ Batch write failed, isolating bad records with per-row savepoints: {batch_error}")
+            dead_letters = [entry for entry in dead_letters if entry[1] == "transform"]
+            try:
+                _delete_properties(session, removed_ids)
+                batch_ids, upload_ids, inserted, updated = self._write_records_individually(
+                    session, records, batch["stored_ids"], dead_letters
+                )
+                self._settle_dead_letters(session, batch_ids, dead_letters)
+                session.commit()
+            except Exception as commit_error:
+                session.rollback()
+                print(f"  ✗ Commit error, batch not written: {commit_error}")
+                import traceback
+                traceback.print_exc()
+                batch["dead_letters"] = dead_letters
+                self._dead_letter_batch(batch, commit_error)
+                session.expunge_all()
+                with self.lock:
+                    self.error_count += len(records)
+                    self.total_inserted += len(batch["raw"])
+                    self.in_flight.difference_update(_id_from_raw(p) for p in batch["raw"])
+                return None
+
+        # Committed rows are re-read from the database when needed; drop them from the identity map
+        session.expunge_all()
+        raw_count = len(batch["raw"])
+        with self.lock:
+            self.in_flight.difference_update(_id_from_raw(p) for p in batch["raw"])
+            self.inserted_count += inserted
+            self.updated_count += updated
+            self.deleted_count += len(removed_ids)
+            self.dead_letter_count += len(dead_letters)
+            self.total_inserted += raw_count
+        print(f"  ✓ Committed batch of {raw_count} properties.")
+
+        if batch.get("complete", True):
+            self.page_finished(batch["page_num"])
+        if self.checkpointing:
+            try:
+                self.save_checkpoint(session)
+                session.commit()
+            except Exception as checkpoint_error:
+                # A stale checkpoint only means a resumed run re-reads a page or two
+                session.rollback()
+                print(f"  ⚠ Could not save checkpoint: {checkpoint_error}")
+        return upload_ids
+
+    def save_checkpoint(self, session) -> None:
+        """Stage the current checkpoint in session (caller commits)."""
+        checkpoint = self.checkpoint_state()
+        if checkpoint is not None:
+            _write_metadata(session, CHECKPOINT_KEY, json.dumps(checkpoint))
+
+    def migrate_images(self, batch_ids: List[str]) -> None:
+        """Upload a committed batch's images to R2; errors are logged and the run continues."""
+        if not batch_ids:
+            return
+        print(f"  3. Migrating images to R2 for {len(batch_ids)} properties...")
+        try:
+            _migrate_batch_to_r2(batch_ids, self.database_url)
+        except Exception as migrate_err:
+            print(f"  ✗ R2 migration error (batch continues): {migrate_err}")
+            import traceback
+            traceback.print_exc()
+
+    def print_progress(self, has_more: bool) -> None:
+        elapsed = time.perf_counter() - self.start_time
+        print(f"  ⏱ Elapsed: {_format_elapsed(elapsed)}")
+        if self.limit is not None and has_more and 0 < self.total_inserted < self.limit:
+            remaining_props = self.limit - self.total_inserted
+            est_remaining_sec = (elapsed / self.total_inserted) * remaining_props
+            print(f"  ⏱ Est. remaining: {_format_elapsed(est_remaining_sec)}")
+        if _client is not None:
+            print(f"  🌐 Quota: {_client.rate_limiter.summary()}")
+
+
+def _run_sequential(run: _PopulateRun, session, batch_size: int, skip_r2: bool) -> None:
+    """Fetch -> transform -> write/commit -> migrate images, one page at a time."""
+    for page_num, page_properties, next_url in run.iter_pages(batch_size):
+        batch = run.select(page_num, page_properties)
+        if batch is None:
+            continue
+        upload_ids = run.write(session, run.transform(batch))
+        if upload_ids is None:
+            continue
+        if not skip_r2:
+            run.migrate_images(upload_ids)
+        run.print_progress(has_more=next_url is not None)
+
+
+def _run_pipelined(
+    run: _PopulateRun,
+    session,
+    batch_size: int,
+    skip_r2: bool,
+    transform_workers: int,
+    prefetch_pages: int,
+) -> None:
+    """Overlap fetch, transform, DB write and R2 upload with bounded queues between the stages.
+    The fetcher follows @odata.nextLink up to prefetch_pages ahead of the slowest stage."""
+
+    def _transform_stage(item):
+        page_num, page_properties, _ = item
+        batch = run.select(page_num, page_properties)
+        return run.transform(batch) if batch is not None else None
+
+    def _write_stage(batch):
+        upload_ids = run.write(session, batch)
+        run.print_progress(has_more=not run.feed_exhausted)
+        return upload_ids or None
+
+    pipeline = Pipeline(queue_size=prefetch_pages)
+    pipeline.add_stage("transform", _transform_stage, workers=transform_workers, count=lambda item: len(item[1]))
+    pipeline.add_stage("write", _write_stage, workers=1, count=lambda batch: len(batch["raw"]))
+    if not skip_r2:
+        pipeline.add_stage("images", run.migrate_images, workers=1, count=len)
+    stats = pipeline.run(run.iter_pages(batch_size), source_count=lambda item: len(item[1]))
+
+    print("\n  Pipeline stages (busy = time doing work, starved = waiting on upstream, blocked = backpressure):")
+    for stage_stats in stats.values():
+        print(f"    {stage_stats.summary()}")
+    if pipeline.failed:
+        stage_name, error = pipeline.errors[0]
+        raise RuntimeError(f"Pipeline stage '{stage_name}' failed: {error}") from error
+
+
 def populate_database(
     database_url: str = None,
     limit: int | None = None,
@@ -154,12 +1036,73 @@ def populate_database(
     refresh_only: bool = False,
     batch_size: int = API_BATCH_SIZE,
     skip_r2: bool = False,
+    incremental: bool = False,
+    pipeline: bool = False,
+    transform_workers: int = 2,
+    prefetch_pages: int = 2,
+    copy: bool = False,
+    skip_unchanged: bool = True,
+    transform_processes: int = 0,
+    archive_dir: str | None = None,
+    archive_keep: int = 10,
+    replay: str | None = None,
+    resume: bool = False,
+    retry_dead_letters: bool = False,
+    partitions: int = 0,
+    partition_since: str | None = None,
+    select_fields: bool = False,
+    stream_parse: bool = False,
 ):
     """Populate database with properties. No limit applied when limit is None.
     When refresh=True, existing properties are updated (primary_image_url, media, and other API fields).
     When refresh_only=True (implies refresh), only update existing records—never insert new ones.
     When skip_r2=True, images are not uploaded to R2 (database and API data only).
+    When incremental=True, only records modified since the stored high-water mark are requested and upserted;
+    off-market and MlgCanView=false records are deleted. The mark advances only after the feed is fully read.
+    When pipeline=True, API fetch, transform (transform_workers threads), DB write and R2 upload run as
+    overlapping stages with bounded queues (prefetch_pages) instead of strictly one after another.
+    When copy=True (PostgreSQL, insert-only runs), new rows are loaded with COPY through a staging table.
+    When skip_unchanged=True (the default), refresh skips listings whose source fingerprint matches the stored one,
+    so their stored signed media URLs are not renewed; pass skip_unchanged=False to rewrite every listing.
+    When transform_processes > 0, records are transformed in that many worker processes.
+    When archive_dir is set, every fetched page is written to a gzip JSONL archive (one file per run,
+    newest archive_keep runs kept). When replay is an archive file (or a directory: newest archive),
+    pages are read from it instead of the API and R2 upload is skipped.
+    After every committed batch the next page URL and counters are checkpointed to AppMetadata; with
+    resume=True a run continues from the checkpoint of an unfinished run (using that run's mode and batch size).
+    Existing ids and fingerprints are looked up per page and the session is cleared after every batch,
+    so memory stays flat regardless of how many listings the database or feed holds.
+    A batch whose bulk write fails is rewritten one savepoint per record; records that fail to transform
+    or write are saved to the ingest_dead_letters table. With retry_dead_letters=True those records are
+    re-ingested (as a refresh) instead of calling the API, and each one written is removed from the table.
+    When partitions > 1, the feed is split into that many ModificationTimestamp windows between
+    partition_since (default: the high-water mark when incremental, else PARTITION_DEFAULT_YEARS back) and
+    now; they are crawled concurrently (sharing the API quota) into the same transform/write stages and
+    checkpointed per partition.
+    When select_fields=True, API requests $select only the fields the transformers read (and the Media/UnitTypes
+    fields inside $expand), checked against the server's $metadata.
+    When stream_parse=True, API pages are parsed element by element as they download rather than read whole
+    and decoded at once, so a page's raw body and text are never held in full (useful with a large batch_size).
     """
+    global _client, _stream_pages
+    if replay and incremental:
+        raise ValueError("replay and incremental can't be combined (the high-water mark comes from the live feed)")
+    if replay and resume:
+        raise ValueError("replay and resume can't be combined (checkpoints hold live-feed page URLs)")
+    if retry_dead_letters and (replay or incremental or resume):
+        raise ValueError("retry_dead_letters can't be combined with replay, incremental or resume")
+    if partitions > 1 and (replay or retry_dead_letters):
+        raise ValueError("partitions apply to live API crawls, not replay or retry_dead_letters")
+    if retry_dead_letters:
+        refresh, refresh_only, skip_unchanged = True, False, False
+        archive_dir = None
+    if replay:
+        skip_r2 = True
+        archive_dir = None
+    if replay or retry_dead_letters:
+        select_fields = False
+        stream_parse = False
+    _stream_pages = stream_parse
     database_url = get_database_url(database_url)
 
     _pacific = ZoneInfo("America/Los_Angeles")
@@ -167,200 +1110,125 @@ def populate_database(
     print("=" * 60)
     print("Populating Database with Properties")
     print(f"Run started: {run_started_at}")
-    if refresh_only:
+    if incremental:
+        # Upsert changed records; deletions come through as MlgCanView=false / off-market records
+        refresh = True
+        refresh_only = False
+        print("Mode: INCREMENTAL (only records modified since the last completed sync)")
+    elif refresh_only:
         refresh = True
         print("Mode: REFRESH ONLY (update existing properties only, no new inserts)")
     elif refresh:
         print("Mode: REFRESH (update existing properties with fresh API data)")
+    if replay:
+        print(f"Mode: REPLAY from {replay} (no API calls)")
+    if retry_dead_letters:
+        print("Mode: RETRY DEAD LETTERS (re-ingest records that previously failed; no API calls)")
+    if archive_dir:
+        print(f"Mode: ARCHIVE raw pages to {archive_dir}")
     if skip_r2:
         print("Mode: SKIP R2 (images will not be uploaded to R2)")
+    if copy:
+        print("Mode: COPY (bulk load through a staging table)")
+    if transform_processes:
+        print(f"Mode: MULTI-PROCESS TRANSFORM ({transform_processes} processes)")
+    if partitions > 1:
+        print(f"Mode: PARTITIONED CRAWL ({partitions} ModificationTimestamp windows fetched concurrently)")
+    if select_fields:
+        print("Mode: SELECT (request only the fields ingest reads)")
+    if stream_parse:
+        print("Mode: STREAM PARSE (decode API pages element by element as they download)")
+    if pipeline:
+        print(f"Mode: PIPELINED ({transform_workers} transform workers, prefetch {prefetch_pages} pages)")
     print("=" * 60)
 
     # Initialize database
     print(f"\n1. Initializing database at: {database_url}")
     engine = init_database(database_url)
     session = get_session(engine)
-
-    # Load existing property IDs so we can skip them (unless refresh) and avoid redundant work
-    existing_ids: set = set(row[0] for row in session.query(Property.id).all())
-    print(f"  Loaded {len(existing_ids)} existing property IDs from database.")
+    # MLS Grid quota usage is recorded in this run's database, shared with other runs against it
+    get_shared_limiter(database_url)
 
     try:
-        inserted_count = 0
-        updated_count = 0
-        skipped_count = 0
-        error_count = 0
-        total_inserted = 0
-        next_url: str | None = None
-        page_num = 0
-        start_time = time.perf_counter()
-
-        while True:
-            if limit is not None and total_inserted >= limit:
-                break
-            page_num += 1
-            print(f"\n2. Fetching batch {page_num} (up to {batch_size} from API)...")
-            page_properties, next_url = fetch_next_page(next_url, page_num, batch_size)
-            if not page_properties:
-                print(f"  No more data.")
-                break
-
-            to_process = page_properties
-            if limit is not None:
-                remaining = limit - total_inserted
-                to_process = page_properties[:remaining]
-
-            # Remove properties already in DB (unless refresh) to save time
-            if not refresh:
-                orig_len = len(to_process)
-                to_process = [p for p in to_process if _id_from_raw(p) not in existing_ids]
-                skipped_count += orig_len - len(to_process)
-                if not to_process:
-                    print(f"  Fetched {len(page_properties)} properties; all {orig_len} already in DB, skipping batch.")
-                    if not next_url:
-                        break
-                    if limit is not None and total_inserted >= limit:
-                        break
-                    continue
-
-            # Refresh-only: only process properties that already exist in DB (never insert new)
-            if refresh_only:
-                orig_len = len(to_process)
-                to_process = [p for p in to_process if _id_from_raw(p) in existing_ids]
-                skipped_count += orig_len - len(to_process)
-                if not to_process:
-                    print(f"  Fetched {len(page_properties)} properties; none in this batch exist in DB, skipping.")
-                    if not next_url:
-                        break
-                    if limit is not None and total_inserted >= limit:
-                        break
-                    continue
-
-            print(f"  Fetched {len(page_properties)} properties; processing {len(to_process)} (total so far: {total_inserted})")
-            batch_ids: List[str] = []
-
-            if refresh:
-                # Refresh path: update existing or insert; per-row existing check required; retry transform/insert up to MAX_INSERT_RETRIES
-                # When refresh_only is True, to_process already filtered to existing_ids only, so we never insert
-                for idx, raw_prop in enumerate(to_process, 1):
-                    last_error: Optional[Exception] = None
-                    for attempt in range(1, MAX_INSERT_RETRIES + 1):
-                        try:
-                            property_data = transform_property(raw_prop)
-                            existing = session.query(Property).filter_by(id=property_data["id"]).first()
-                            if existing:
-                                _apply_property_data(existing, property_data)
-                                session.query(PropertyMedia).filter_by(property_id=property_data["id"]).delete()
-                                media_list = transform_media(raw_prop)
-                                for media_data in media_list:
-                                    session.add(PropertyMedia(**media_data))
-                                updated_count += 1
-                                batch_ids.append(property_data["id"])
-                                if updated_count <= 5 or updated_count % 50 == 0:
-                                    print(f"  [{idx}/{len(to_process)}] Refreshed {property_data['id']}")
-                            elif not refresh_only:
-                                property_obj = Property(**property_data)
-                                session.add(property_obj)
-                                for media_data in transform_media(raw_prop):
-                                    session.add(PropertyMedia(**media_data))
-                                inserted_count += 1
-                                batch_ids.append(property_data["id"])
-                            break  # success
-                        except Exception as e:
-                            last_error = e
-                            session.rollback()
-                            if attempt < MAX_INSERT_RETRIES:
-                                time.sleep(1)
-                                continue
-                            listing_id = raw_prop.get("ListingId") or raw_prop.get("ListingKey", "unknown")
-                            print(f"\n  [{idx}/{len(to_process)}] ✗ Error processing property {listing_id} (after {MAX_INSERT_RETRIES} retries): {e}")
-                            error_count += 1
-                            if error_count <= 3:
-                                import traceback
-                                traceback.print_exc()
-                            break
+        checkpoint = None
+        if resume:
+            saved = _read_metadata(session, CHECKPOINT_KEY)
+            checkpoint = json.loads(saved) if saved else None
+            if checkpoint:
+                refresh, refresh_only, incremental = checkpoint["refresh"], checkpoint["refresh_only"], checkpoint["incremental"]
+                batch_size = checkpoint.get("batch_size", batch_size)
+                if "partitions" in checkpoint:
+                    position = f"{len(checkpoint['partitions'])} partitions"
+                else:
+                    position = f"page {checkpoint['page']}"
+                print(
+                    f"  Resuming from checkpoint after {position} "
+                    f"({checkpoint['processed']} records processed, saved {checkpoint['saved_at']} UTC)"
+                )
             else:
-                # Insert-only path: no per-row existing check; collect then bulk insert; retry transform up to MAX_INSERT_RETRIES per property
-                property_list: List[Dict[str, Any]] = []
-                media_list: List[Dict[str, Any]] = []
-                for idx, raw_prop in enumerate(to_process, 1):
-                    last_err: Optional[Exception] = None
-                    for attempt in range(1, MAX_INSERT_RETRIES + 1):
-                        try:
-                            property_data = transform_property(raw_prop)
-                            property_list.append(property_data)
-                            for media_data in transform_media(raw_prop):
-                                media_list.append(media_data)
-                            batch_ids.append(property_data["id"])
-                            inserted_count += 1
-                            break  # success
-                        except Exception as e:
-                            last_err = e
-                            if attempt < MAX_INSERT_RETRIES:
-                                time.sleep(1)
-                                continue
-                            listing_id = raw_prop.get("ListingId") or raw_prop.get("ListingKey", "unknown")
-                            print(f"\n  [{idx}/{len(to_process)}] ✗ Error processing property {listing_id} (after {MAX_INSERT_RETRIES} retries): {e}")
-                            error_count += 1
-                            if error_count <= 3:
-                                import traceback
-                                traceback.print_exc()
-                            break
-                if property_list:
-                    session.bulk_insert_mappings(Property, property_list)
-                    session.bulk_insert_mappings(PropertyMedia, media_list)
-
-            # Retry flush/commit up to MAX_INSERT_RETRIES times
-            commit_ok = False
-            for commit_attempt in range(1, MAX_INSERT_RETRIES + 1):
-                try:
-                    session.flush()
-                    session.commit()
-                    existing_ids.update(batch_ids)
-                    print(f"  ✓ Committed batch of {len(to_process)} properties.")
-                    commit_ok = True
-                    break
-                except Exception as commit_error:
-                    session.rollback()
-                    if commit_attempt < MAX_INSERT_RETRIES:
-                        print(f"  ⚠ Commit attempt {commit_attempt}/{MAX_INSERT_RETRIES} failed, retrying: {commit_error}")
-                        time.sleep(1)
-                        continue
-                    print(f"  ✗ Commit error (after {MAX_INSERT_RETRIES} retries): {commit_error}")
-                    import traceback
-                    traceback.print_exc()
-                    error_count += len(to_process)
-                    total_inserted += len(to_process)
-                    break
-            if not commit_ok:
-                if not next_url:
-                    break
-                continue
+                print("  No checkpoint found; starting from the first page.")
 
-            total_inserted += len(to_process)
+        run = _PopulateRun(session, database_url, limit, refresh, refresh_only, incremental, copy=copy, skip_unchanged=skip_unchanged)
+        run.batch_size = batch_size
+        if checkpoint:
+            run.restore_checkpoint(checkpoint)
+            if partitions > 1 and not run.partitioned:
+                print("  ⚠ Checkpoint is from a single-cursor crawl; resuming it without partitions.")
+        elif partitions > 1:
+            run.partition(_partition_windows(partitions, _partition_start(partition_since, run.modified_since), datetime.utcnow()))
+        if run.partitioned:
+            for cursor in run.cursors:
+                print(f"  Partition {cursor.label()}{' (done)' if cursor.exhausted else ''}")
+            if _client is None:
+                _client = MLSGridClient.from_env(pool_size=len(run.cursors))
+        if select_fields:
+            _enable_select()
+        if transform_processes > 0:
+            run.transform_pool = TransformPool(processes=transform_processes)
+        if replay:
+            run.replay_pages = iter_archive_pages(replay)
+            run.checkpointing = False
+        if retry_dead_letters:
+            run.replay_pages = _dead_letter_pages(engine, batch_size)
+            run.replay_label = "dead-letter table"
+            run.checkpointing = False
+        if archive_dir:
+            run.archive = PageArchiveWriter(archive_dir, keep=archive_keep)
+        try:
+            if pipeline:
+                _run_pipelined(run, session, batch_size, skip_r2, transform_workers, prefetch_pages)
+            else:
+                _run_sequential(run, session, batch_size, skip_r2)
+        finally:
+            if run.transform_pool is not None:
+                run.transform_pool.close()
+            if run.archive is not None:
+                run.archive.close()
+                print(
+                    f"\n  📦 Archived {run.archive.pages} pages ({run.archive.records} records, "
+                    f"{run.archive.size_bytes() / 1_048_576:.1f} MB) to {run.archive.path}"
+                )
 
-            if batch_ids and not skip_r2:
-                print(f"  3. Migrating images to R2 for {len(batch_ids)} properties...")
-                try:
-                    _migrate_batch_to_r2(batch_ids, database_url)
-                except Exception as migrate_err:
-                    print(f"  ✗ R2 migration error (batch continues): {migrate_err}")
-                    import traceback
-                    traceback.print_exc()
-
-            elapsed = time.perf_counter() - start_time
-            print(f"  ⏱ Elapsed: {_format_elapsed(elapsed)}")
-            if limit is not None and next_url and total_inserted > 0 and total_inserted < limit:
-                remaining_props = limit - total_inserted
-                est_remaining_sec = (elapsed / total_inserted) * remaining_props
-                print(f"  ⏱ Est. remaining: {_format_elapsed(est_remaining_sec)}")
+        if run.checkpointing and run.feed_exhausted:
+            # Finished: nothing to resume
+            session.query(AppMetadata).filter_by(key=CHECKPOINT_KEY).delete()
+            session.commit()
+        elif run.checkpointing:
+            run.save_checkpoint(session)  # include trailing pages that needed no writes
+            session.commit()
+            if run.partitioned:
+                done = sum(1 for cursor in run.cursors if cursor.exhausted)
+                print(f"\n  ⏸ Stopped with {done}/{len(run.cursors)} partitions read to the end; continue with --resume")
+            else:
+                print(f"\n  ⏸ Stopped after page {run.cursors[0].checkpoint_page}; continue with --resume")
 
-            if not next_url:
-                print("  No more pages (@odata.nextLink empty).")
-                break
-            if limit is not None and total_inserted >= limit:
-                print(f"  Reached limit {limit}.")
-                break
+        if incremental and run.high_water and run.feed_exhausted and run.error_count == 0:
+            # Only advance once every page was read and written, so nothing before the mark is skipped
+            _write_metadata(session, HIGH_WATER_MARK_KEY, run.high_water)
+            session.commit()
+            print(f"\n  ✓ High-water mark advanced to {run.high_water}")
+        elif incremental:
+            print(f"\n  ⚠ High-water mark not advanced (feed not fully read or errors); next sync resumes from {run.modified_since or 'a full sync'}")
 
         session.close()
         new_session = get_session(engine)
@@ -370,7 +1238,7 @@ def populate_database(
         finally:
             new_session.close()
 
-        total_elapsed = time.perf_counter() - start_time
+        total_elapsed = time.perf_counter() - run.start_time
         run_ended_at = datetime.now(_pacific).isoformat()
         print("\n" + "=" * 60)
         print("Database Population Complete!")
@@ -378,16 +1246,25 @@ def populate_database(
         print(f"Run started: {run_started_at}")
         print(f"Run ended:   {run_ended_at}")
         print(f"⏱ Total time: {_format_elapsed(total_elapsed)}")
-        print(f"✓ Inserted: {inserted_count} properties")
+        print(f"✓ Inserted: {run.inserted_count} properties")
         if refresh:
-            print(f"✓ Refreshed: {updated_count} properties (primary_image_url, media, and other API fields)")
-        print(f"✓ Skipped: {skipped_count} properties (already exist, no refresh)")
-        print(f"✗ Errors: {error_count} properties")
+            print(f"✓ Refreshed: {run.updated_count} properties (primary_image_url, media, and other API fields)")
+        print(f"✓ Skipped: {run.skipped_count} properties (already exist, no refresh)")
+        if refresh and skip_unchanged:
+            print(f"✓ Unchanged: {run.unchanged_count} properties (source fingerprint matched, not rewritten)")
+        if incremental:
+            print(f"✓ Deleted: {run.deleted_count} properties (off-market or MlgCanView=false)")
+        print(f"✗ Errors: {run.error_count} properties")
+        if run.dead_letter_count:
+            print(f"  ↳ {run.dead_letter_count} raw records saved to ingest_dead_letters; retry with --retry-dead-letters")
+        if _client is not None:
+            print(f"🌐 API: {_client.metrics.summary()}")
+            print(f"🌐 Quota: {_client.rate_limiter.summary()}")
         print(f"\n📊 Actual Database Counts:")
         print(f"✓ Total properties in database: {actual_property_count}")
         print(f"✓ Total media items in database: {actual_media_count}")
 
-        if actual_property_count == 0 and inserted_count > 0:
+        if actual_property_count == 0 and run.inserted_count > 0:
             print("\n⚠️  WARNING: No properties were actually inserted despite attempts!")
             print("   This suggests commit failures. Check error messages above.")
 
@@ -403,11 +1280,7 @@ def populate_database(
         ts = datetime.now(_pacific).isoformat()
         meta_session = get_session(engine)
         try:
-            row = meta_session.query(AppMetadata).filter_by(key="last_populate_run").first()
-            if row:
-                row.value = ts
-            else:
-                meta_session.add(AppMetadata(key="last_populate_run", value=ts))
+            _write_metadata(meta_session, "last_populate_run", ts)
             meta_session.commit()
         except Exception as e:
             print(f"  (Could not write last populate timestamp to DB: {e})")
@@ -430,7 +1303,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--refresh",
         action="store_true",
-        help="Refresh existing properties: update primary_image_url, media URLs, and other API fields (for re-running migrate_images_to_r2 with fresh signed URLs)",
+        help="Refresh existing properties: update primary_image_url, media URLs, and other API fields. Listings whose "
+             "source fingerprint is unchanged are skipped and keep their stored signed media URLs; add "
+             "--rewrite-unchanged to refresh every listing (e.g. fresh signed URLs for migrate_images_to_r2)",
     )
     parser.add_argument(
         "--refresh-only",
@@ -449,6 +1324,110 @@ if __name__ == "__main__":
         action="store_true",
         help="Skip uploading images to R2; only insert/update database and API data",
     )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Overlap API fetch, transform, DB write and R2 upload as concurrent stages with bounded queues",
+    )
+    parser.add_argument(
+        "--transform-workers",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Transform threads in --pipeline mode (default: 2)",
+    )
+    parser.add_argument(
+        "--prefetch-pages",
+        type=int,
+        default=2,
+        metavar="N",
+        help="Max pages queued between pipeline stages in --pipeline mode (default: 2)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch records modified since the last completed sync (ModificationTimestamp high-water mark); "
+             "upserts changes and deletes off-market / MlgCanView=false listings",
+    )
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help="PostgreSQL initial load: COPY each batch into a staging table and merge it "
+             "(faster than row inserts; pair with a larger --batch-size, e.g. 1000)",
+    )
+    parser.add_argument(
+        "--rewrite-unchanged",
+        action="store_true",
+        help="With --refresh, rewrite every listing even if its source fingerprint is unchanged "
+             "(e.g. after a transformer change, or to store fresh signed media URLs)",
+    )
+    parser.add_argument(
+        "--transform-processes",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Transform records in N worker processes (default: 0 = in-process); "
+             "combine with --pipeline --transform-workers to keep several batches in flight",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=None,
+        metavar="DIR",
+        help="Write every raw API page to a gzip JSONL archive in DIR (one file per run)",
+    )
+    parser.add_argument(
+        "--archive-keep",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Keep the newest N run archives in --archive-dir (default: 10, 0 = keep all)",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        metavar="PATH",
+        help="Ingest from an archive file (or the newest archive in a directory) instead of the API; "
+             "skips R2. Use with --refresh --rewrite-unchanged to re-transform existing rows",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from its last checkpoint (next page URL and counters in AppMetadata); "
+             "the checkpointed run's refresh/incremental mode and batch size are used",
+    )
+    parser.add_argument(
+        "--partitions",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Split the feed into N ModificationTimestamp windows and crawl them concurrently (shared API quota), "
+             "each with its own checkpoint",
+    )
+    parser.add_argument(
+        "--partition-since",
+        default=None,
+        metavar="TIMESTAMP",
+        help=f"Start of the partition windows, e.g. 2022-01-01T00:00:00Z (default: high-water mark with "
+             f"--incremental, else {PARTITION_DEFAULT_YEARS} years ago; earlier records go to the first window)",
+    )
+    parser.add_argument(
+        "--retry-dead-letters",
+        action="store_true",
+        help="Re-ingest records saved to the ingest_dead_letters table by earlier runs (failed transform or write) "
+             "instead of calling the API; records written successfully are removed from the table",
+    )
+    parser.add_argument(
+        "--select",
+        action="store_true",
+        help="Request only the fields the transformers read ($select, plus $select inside $expand=Media); "
+             "unknown names are dropped using the server's $metadata",
+    )
+    parser.add_argument(
+        "--stream-parse",
+        action="store_true",
+        help="Parse each API page incrementally as it downloads instead of reading the whole body first "
+             "(lower peak memory with a large --batch-size and big Media arrays)",
+    )
     args = parser.parse_args()
 
     database_url = get_database_url(args.database)
@@ -459,5 +1438,21 @@ if __name__ == "__main__":
         refresh_only=args.refresh_only,
         batch_size=args.batch_size,
         skip_r2=args.no_r2,
+        incremental=args.incremental,
+        pipeline=args.pipeline,
+        transform_workers=args.transform_workers,
+        prefetch_pages=args.prefetch_pages,
+        copy=args.copy,
+        skip_unchanged=not args.rewrite_unchanged,
+        transform_processes=args.transform_processes,
+        archive_dir=args.archive_dir,
+        archive_keep=args.archive_keep,
+        replay=args.replay,
+        resume=args.resume,
+        retry_dead_letters=args.retry_dead_letters,
+        partitions=args.partitions,
+        partition_since=args.partition_since,
+        select_fields=args.select,
+        stream_parse=args.stream_parse,
     )
 
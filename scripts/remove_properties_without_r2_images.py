@@ -25,7 +25,7 @@ else:
 
 from sqlalchemy import or_, and_
 from sqlalchemy.sql import exists
-from database.models import get_engine, get_session, Property, PropertyMedia
+from database.models import get_engine, get_session, Property, PropertyDetail, PropertyMedia
 
 
 def get_database_url() -> str:
@@ -42,7 +42,7 @@ def get_database_url() -> str:
 def remove_properties_without_r2_images(dry_run: bool = True) -> int:
     """
     Find properties with no images in R2 (no primary_image_r2_key and no media with r2_key),
-    delete their PropertyMedia then Property rows. Returns number of properties removed.
+    delete their PropertyMedia and PropertyDetail then Property rows. Returns number of properties removed.
     """
     database_url = get_database_url()
     engine = get_engine(database_url)
@@ -75,10 +75,13 @@ def remove_properties_without_r2_images(dry_run: bool = True) -> int:
         session.close()
         return 0
 
-    # Delete PropertyMedia first (referenced by property_id), then Property
+    # Delete PropertyMedia and PropertyDetail first (referenced by property_id), then Property
     deleted_media = session.query(PropertyMedia).filter(
         PropertyMedia.property_id.in_(property_ids)
     ).delete(synchronize_session=False)
+    session.query(PropertyDetail).filter(
+        PropertyDetail.property_id.in_(property_ids)
+    ).delete(synchronize_session=False)
     deleted_properties = session.query(Property).filter(
         Property.id.in_(property_ids)
     ).delete(synchronize_session=False)
@@ -9,12 +9,12 @@ import sys
 from typing import Generator, List
 
 from dotenv import load_dotenv
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.engine import Engine
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.models import get_engine  # noqa: E402
+from database.models import LISTING_STATE_KEYS, get_engine  # noqa: E402
 from services.r2_storage import R2Storage  # noqa: E402
 
 
@@ -54,18 +54,31 @@ def confirm_or_abort(force: bool) -> None:
         sys.exit(1)
 
 
+def clear_listing_metadata(conn) -> None:
+    """Delete sync state (incremental high-water mark, populate checkpoint) that only holds for the wiped listings."""
+    conn.execute(
+        text("DELETE FROM app_metadata WHERE key IN :keys").bindparams(bindparam("keys", expanding=True)),
+        {"keys": list(LISTING_STATE_KEYS)},
+    )
+
+
 def wipe_database(engine: Engine) -> None:
     """Clear properties tables for SQLite or Postgres."""
     db_url = str(engine.url)
     if db_url.startswith("sqlite:///"):
         with engine.begin() as conn:
             conn.execute(text("DELETE FROM property_media"))
+            conn.execute(text("DELETE FROM property_details"))
             conn.execute(text("DELETE FROM properties"))
+            clear_listing_metadata(conn)
+        # VACUUM can't run inside the transaction above
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
             conn.execute(text("VACUUM"))
         print("✓ SQLite tables cleared.")
         return
     with engine.begin() as conn:
-        conn.execute(text("TRUNCATE TABLE property_media, properties RESTART IDENTITY CASCADE"))
+        conn.execute(text("TRUNCATE TABLE property_media, property_details, properties RESTART IDENTITY CASCADE"))
+        clear_listing_metadata(conn)
     print("✓ Postgres tables truncated.")
 
 
@@ -7,14 +7,19 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import Session
 from services.r2_storage import R2Storage
+from services.rate_limiter import QuotaRateLimiter, get_shared_limiter
+from services.mlsgrid_client import _retry_after_seconds
 from database.models import Property, PropertyMedia
+from database.bulk import refresh_media_json
 
 
 class ImageProcessor:
     """Process and store property images"""
     
-    def __init__(self, rate_limiter=None):
+    def __init__(self, rate_limiter=None, quota_limiter: Optional[QuotaRateLimiter] = None):
         self.rate_limiter = rate_limiter
+        # MLS Grid quota shared with API paging; resolved on first download (get_shared_limiter)
+        self.quota_limiter = quota_limiter
         try:
             self.r2_storage = R2Storage()
         except ValueError as e:
@@ -108,9 +113,16 @@ class ImageProcessor:
             property_id=property_id
         ).order_by(PropertyMedia.order).all()
         
-        # Use a separate counter that only increments when images are actually processed
+        # Use a separate counter that only increments when images are actually processed,
+        # skipping indexes already used by stored images (refresh keeps unchanged photos' R2 objects)
+        used_indexes = {
+            self._r2_key_index(item.r2_key) for item in media_items if item.r2_key
+        }
         media_image_index = 1  # Start from 1 (0 is primary)
+        while media_image_index in used_indexes:
+            media_image_index += 1
         
+        media_uploaded = False
         for idx, media_item in enumerate(media_items):
             if not media_item.media_url:
                 continue
@@ -132,10 +144,15 @@ class ImageProcessor:
                 if media_item.media_url == property_obj.primary_image_url:
                     continue
                 
+                # Re-uploads overwrite the row's own key so the previous object isn't orphaned in R2;
+                # only rows without a key take the next free index
+                existing_index = self._r2_key_index(media_item.r2_key) if media_item.r2_key else None
+                image_index = existing_index if existing_index is not None else media_image_index
+                
                 result = self._download_and_store(
                     media_item.media_url,
                     property_id,
-                    media_image_index  # Use counter that only increments when processed
+                    image_index
                 )
                 
                 if result:
@@ -146,22 +163,36 @@ class ImageProcessor:
                     media_item.file_size = result["file_size"]
                     media_item.content_type = result["content_type"]
                     db.commit()
+                    media_uploaded = True
                     
                     results["media_images"].append({
                         **result,
                         "order": media_item.order
                     })
                     
-                    # Increment counter only after successfully processing an image
-                    media_image_index += 1
+                    # Increment counter only after successfully processing an image into a new slot
+                    used_indexes.add(image_index)
+                    while media_image_index in used_indexes:
+                        media_image_index += 1
                     
             except Exception as e:
                 error_msg = f"Failed to process media image {idx}: {str(e)}"
                 results["errors"].append(error_msg)
                 print(error_msg)
         
+        if media_uploaded:
+            # Detail pages read the R2 URLs from the listing's media_json copy
+            refresh_media_json(db, [property_id])
+            db.commit()
+        
         return results
     
+    @staticmethod
+    def _r2_key_index(r2_key: str) -> Optional[int]:
+        """Image index from an R2 key like "properties/NWM123/4.webp"."""
+        stem = r2_key.rsplit("/", 1)[-1].split(".", 1)[0]
+        return int(stem) if stem.isdigit() else None
+
     def _download_and_store(
         self,
         source_url: str,
@@ -179,24 +210,34 @@ class ImageProcessor:
             try:
                 if self.rate_limiter:
                     self.rate_limiter.wait()
+                quota_limiter = self.quota_limiter or get_shared_limiter()
+                quota_limiter.acquire()
 
                 # Download from NWMLS
-                response = requests.get(
-                    source_url,
-                    timeout=(10, 30),  # 10s connect, 30s read
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (compatible; Allode/1.0)'
-                    },
-                    stream=True
+                try:
+                    response = requests.get(
+                        source_url,
+                        timeout=(10, 30),  # 10s connect, 30s read
+                        headers={
+                            'User-Agent': 'Mozilla/5.0 (compatible; Allode/1.0)'
+                        },
+                        stream=True
+                    )
+                    # Read image data
+                    image_data = response.content
+                except requests.exceptions.RequestException:
+                    quota_limiter.record_response(None)
+                    raise
+                quota_limiter.record_response(
+                    response.status_code,
+                    len(image_data),
+                    _retry_after_seconds(response.headers.get("Retry-After")),
                 )
                 response.raise_for_status()
 
                 # Get content type
                 content_type = response.headers.get('Content-Type', 'image/jpeg')
 
-                # Read image data
-                image_data = response.content
-
                 # Upload to R2
                 result = self.r2_storage.upload_image(
                     image_data=image_data,
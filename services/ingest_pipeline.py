@@ -0,0 +1,182 @@
+"""
+Bounded-queue staged pipeline used by populate_database to overlap API fetch, transform,
+DB write and R2 upload.
+
+A source iterable (e.g. the page prefetcher following @odata.nextLink) runs in its own thread;
+each stage runs one or more worker threads that take an item from the previous stage's queue,
+call the stage function and pass the result on. Queues are bounded, so a slow stage applies
+backpressure upstream instead of letting fetched pages pile up in memory.
+If the source fails, pages already fetched still drain through the stages; if a stage fails,
+in-flight items are dropped.
+"""
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_DONE = object()
+
+
+class StageStats:
+    """Throughput counters for one stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.records = 0
+        self.busy_seconds = 0.0  # time spent in the stage function (summed over workers)
+        self.starved_seconds = 0.0  # waiting for input from upstream
+        self.blocked_seconds = 0.0  # waiting for room in the downstream queue (backpressure)
+        self._lock = threading.Lock()
+
+    def record(self, records: int, busy: float, starved: float, blocked: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.records += records
+            self.busy_seconds += busy
+            self.starved_seconds += starved
+            self.blocked_seconds += blocked
+
+    def summary(self) -> str:
+        per_worker_busy = self.busy_seconds / max(1, self.workers)
+        rate = self.records / per_worker_busy if per_worker_busy > 0 else 0.0
+        return (
+            f"{self.name:<10} x{self.workers}: {self.items} batches, {self.records} records, "
+            f"busy {per_worker_busy:.1f}s ({rate:.1f} rec/s), "
+            f"starved {self.starved_seconds / max(1, self.workers):.1f}s, "
+            f"blocked {self.blocked_seconds / max(1, self.workers):.1f}s"
+        )
+
+
+class _Stage:
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int, count: Optional[Callable[[Any], int]]):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.count = count
+        self.stats = StageStats(name, self.workers)
+        self.finished_workers = 0
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """Source thread -> stage 1 workers -> ... -> last stage workers, with bounded queues in between."""
+
+    def __init__(self, queue_size: int = 2):
+        self.queue_size = max(1, queue_size)
+        self.stages: List[_Stage] = []
+        self.stop_event = threading.Event()
+        self.errors: List[tuple] = []  # (stage name, exception)
+        self._stage_failed = False  # a stage (not the source) failed: drop in-flight items
+        self.source_stats = StageStats("fetch", 1)
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        count: Optional[Callable[[Any], int]] = None,
+    ) -> "Pipeline":
+        """Append a stage. func(item) returns the item for the next stage, or None to drop it.
+        count(item) gives the number of records in an input item, for throughput stats."""
+        self.stages.append(_Stage(name, func, workers, count))
+        return self
+
+    def stop(self) -> None:
+        """Ask the source to stop producing; items already in flight still drain through the stages."""
+        self.stop_event.set()
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.errors)
+
+    def _put(self, q: queue.Queue, item: Any) -> float:
+        """Blocking put; returns seconds spent waiting for room."""
+        start = time.perf_counter()
+        q.put(item)
+        return time.perf_counter() - start
+
+    def _run_source(self, source: Iterable, out_q: queue.Queue, consumers: int, count) -> None:
+        iterator = iter(source)
+        try:
+            while not self.stop_event.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                busy = time.perf_counter() - start
+                blocked = self._put(out_q, item)
+                self.source_stats.record(count(item) if count else 1, busy, 0.0, blocked)
+        except Exception as e:
+            self.errors.append(("fetch", e))
+            traceback.print_exc()
+            self.stop_event.set()
+        finally:
+            for _ in range(consumers):
+                out_q.put(_DONE)
+
+    def _run_worker(self, stage: _Stage, in_q: queue.Queue, out_q: Optional[queue.Queue], consumers: int) -> None:
+        while True:
+            wait_start = time.perf_counter()
+            item = in_q.get()
+            starved = time.perf_counter() - wait_start
+            if item is _DONE:
+                break
+            if self._stage_failed:
+                continue  # a stage failed: drain without doing more work
+            records = stage.count(item) if stage.count else 1
+            start = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                self.errors.append((stage.name, e))
+                traceback.print_exc()
+                self._stage_failed = True
+                self.stop_event.set()
+                continue
+            busy = time.perf_counter() - start
+            blocked = 0.0
+            if out_q is not None and result is not None:
+                blocked = self._put(out_q, result)
+            stage.stats.record(records, busy, starved, blocked)
+
+        with stage.lock:
+            stage.finished_workers += 1
+            last = stage.finished_workers == stage.workers
+        if last and out_q is not None:
+            for _ in range(consumers):
+                out_q.put(_DONE)
+
+    def run(self, source: Iterable, source_count: Optional[Callable[[Any], int]] = None) -> Dict[str, StageStats]:
+        """Run until the source is exhausted (or stop()/an error) and every stage has drained."""
+        if not self.stages:
+            raise ValueError("Pipeline has no stages")
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(source, queues[0], self.stages[0].workers, source_count),
+                name="pipeline-fetch",
+                daemon=True,
+            )
+        ]
+        for idx, stage in enumerate(self.stages):
+            out_q = queues[idx + 1] if idx + 1 < len(self.stages) else None
+            consumers = self.stages[idx + 1].workers if idx + 1 < len(self.stages) else 0
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._run_worker,
+                    args=(stage, queues[idx], out_q, consumers),
+                    name=f"pipeline-{stage.name}-{worker}",
+                    daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = {"fetch": self.source_stats}
+        stats.update({stage.name: stage.stats for stage in self.stages})
+        return stats
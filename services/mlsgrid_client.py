@@ -0,0 +1,283 @@
+"""
+MLS Grid OData API client.
+
+One requests.Session per client, so paging reuses keep-alive connections from a pool instead of
+opening a new TLS connection per page. Responses are requested gzip/deflate compressed, every
+request has a connect/read timeout, and 429/5xx responses or dropped connections are retried with
+exponential backoff (honoring Retry-After). Every request first waits on the process-wide
+QuotaRateLimiter (services/rate_limiter.py). Per-request metrics are kept for run summaries.
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.odata_stream import ODataPageStream
+from services.rate_limiter import QuotaRateLimiter, get_shared_limiter
+
+# Statuses worth retrying: rate limited or a transient server/gateway failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Decoded bytes handed to the streaming page parser per read
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class MLSGridAPIError(Exception):
+    """Non-retryable API failure, or a retryable one that ran out of attempts."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RequestMetrics:
+    """Counters for the requests made by one client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.status_counts: Dict[int, int] = {}
+        self.wire_bytes = 0  # Content-Length as sent (compressed when the server gzips)
+        self.decoded_bytes = 0  # body size after decompression
+        self.request_seconds = 0.0
+        self.backoff_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, response: Optional[requests.Response], elapsed: float, body: bool = True) -> int:
+        """Count a request; returns its on-the-wire size in bytes. With body=False (a streamed response)
+        the body isn't read here; record_body() counts it once it has been consumed."""
+        with self._lock:
+            self.requests += 1
+            self.request_seconds += elapsed
+            if response is None:
+                return 0
+            self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+            if not body:
+                return 0
+            decoded = len(response.content)
+            wire = int(response.headers.get("Content-Length") or decoded)
+            self.decoded_bytes += decoded
+            self.wire_bytes += wire
+            return wire
+
+    def record_body(self, decoded: int, wire: int) -> None:
+        with self._lock:
+            self.decoded_bytes += decoded
+            self.wire_bytes += wire
+
+    def record_retry(self, delay: float) -> None:
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "status_counts": dict(self.status_counts),
+                "wire_bytes": self.wire_bytes,
+                "decoded_bytes": self.decoded_bytes,
+                "avg_request_ms": round(self.request_seconds / self.requests * 1000, 1) if self.requests else 0.0,
+                "backoff_seconds": round(self.backoff_seconds, 1),
+            }
+
+    def summary(self) -> str:
+        stats = self.as_dict()
+        ratio = stats["decoded_bytes"] / stats["wire_bytes"] if stats["wire_bytes"] else 1.0
+        return (
+            f"{stats['requests']} requests, {stats['retries']} retries, {stats['failures']} failures, "
+            f"avg {stats['avg_request_ms']:.0f} ms, {stats['wire_bytes'] / 1_048_576:.1f} MB on the wire "
+            f"({ratio:.1f}x compression), {stats['backoff_seconds']:.0f}s backing off"
+        )
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class MLSGridClient:
+    """Pooled, retrying client for the MLS Grid Property resource."""
+
+    def __init__(
+        self,
+        bearer_token: Optional[str] = None,
+        api_url: Optional[str] = None,
+        timeout: Tuple[float, float] = (10.0, 120.0),
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 120.0,
+        pool_size: int = 4,
+        rate_limiter: Optional[QuotaRateLimiter] = None,
+    ):
+        self.bearer_token = bearer_token or os.getenv("MLSGRID_BEARER_TOKEN")
+        self.api_url = api_url or os.getenv("MLSGRID_API_URL")
+        if not self.bearer_token or not self.api_url:
+            raise ValueError(
+                "MLS Grid API config missing. Set MLSGRID_BEARER_TOKEN and MLSGRID_API_URL in backend/.env"
+            )
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = RequestMetrics()
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+
+        self.session = requests.Session()
+        # Retries are handled in _get so Retry-After and metrics apply; the adapter only pools
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.bearer_token}",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+    @classmethod
+    def from_env(cls, pool_size: int = 4) -> "MLSGridClient":
+        """Client configured from MLSGRID_* environment variables; pool_size should cover concurrent callers."""
+        return cls(
+            pool_size=pool_size,
+            timeout=(
+                float(os.getenv("MLSGRID_CONNECT_TIMEOUT_SECONDS", "10")),
+                float(os.getenv("MLSGRID_READ_TIMEOUT_SECONDS", "120")),
+            ),
+            max_retries=int(os.getenv("MLSGRID_MAX_RETRIES", "5")),
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "MLSGridClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return delay + random.uniform(0, self.backoff_base)  # jitter so parallel workers don't retry in lockstep
+
+    def _get(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """GET url and return the 200 response, retrying transient failures.
+        With stream=True the body is left unread for the caller (who must close the response)."""
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.record(None, time.perf_counter() - start)
+                self.rate_limiter.record_response(None)
+                if attempt > self.max_retries:
+                    self.metrics.record_failure()
+                    raise MLSGridAPIError(f"API request failed after {attempt} attempts: {e}") from e
+                delay = self._backoff_delay(attempt, None)
+                print(f"  ⚠ API connection error ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self.metrics.record_retry(delay)
+                time.sleep(delay)
+                continue
+
+            wire_bytes = self.metrics.record(response, time.perf_counter() - start, body=not stream)
+            retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
+            self.rate_limiter.record_response(response.status_code, wire_bytes, retry_after)
+            if response.status_code == 200:
+                return response
+            if response.status_code not in RETRY_STATUSES or attempt > self.max_retries:
+                self.metrics.record_failure()
+                raise MLSGridAPIError(
+                    f"API request failed: {response.status_code} - {response.text[:500]}",
+                    status_code=response.status_code,
+                )
+            delay = self._backoff_delay(attempt, retry_after)
+            print(f"  ⚠ API returned {response.status_code}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            self.metrics.record_retry(delay)
+            time.sleep(delay)
+
+    def get_json(self, url: str, params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """GET url and return the decoded JSON body, retrying transient failures."""
+        return self._get(url, params).json()
+
+    def get_page(self, url: str, stream: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch one OData page. Returns (records, @odata.nextLink or None).
+        With stream=True the body is parsed as it downloads (services/odata_stream), so the raw body and its
+        decoded text are never held whole; a connection dropped mid-body refetches the page."""
+        if not stream:
+            data = self.get_json(url)
+            return data.get("value", []), data.get("@odata.nextLink")
+        attempt = 0
+        while True:
+            attempt += 1
+            response = self._get(url, stream=True)
+            page = ODataPageStream(response.iter_content(STREAM_CHUNK_BYTES))
+            try:
+                records = list(page)
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt > self.max_retries:
+                    self.metrics.record_failure()
+                    raise MLSGridAPIError(f"API response body failed after {attempt} attempts: {e}") from e
+                delay = self._backoff_delay(attempt, None)
+                print(f"  ⚠ API response cut off ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                self.metrics.record_retry(delay)
+                time.sleep(delay)
+                continue
+            finally:
+                wire_bytes = response.raw.tell()  # bytes read off the socket (compressed)
+                response.close()
+                self.metrics.record_body(page.body_bytes, wire_bytes)
+                self.rate_limiter.record_response(None, wire_bytes)
+            return records, page.next_link
+
+    def resource_url(self) -> str:
+        """The configured resource URL without its query (e.g. https://api.mlsgrid.com/v2/Property)."""
+        return urlunparse(urlparse(self.api_url)._replace(query=""))
+
+    def get_metadata(self) -> str:
+        """The service's OData $metadata (EDMX XML) document, served next to the resource."""
+        service_root = self.resource_url().rstrip("/").rsplit("/", 1)[0]
+        return self._get(f"{service_root}/$metadata", headers={"Accept": "application/xml"}).text
+
+    def get_listing(self, listing_id: str, expand_media: bool = True) -> Optional[Dict[str, Any]]:
+        """Fetch a single Property by ListingId, or None if the feed doesn't have it."""
+        query = {"$filter": f"ListingId eq '{listing_id.replace(chr(39), chr(39) * 2)}'", "$top": "1"}
+        if expand_media:
+            query["$expand"] = "Media"
+        records, _ = self.get_page(f"{self.resource_url()}?{urlencode(query)}")
+        return records[0] if records else None
@@ -0,0 +1,131 @@
+"""
+OData $select projection for MLS Grid Property requests.
+
+The Property payload carries hundreds of fields but the transformers read only the ones mapped into
+the database. transformer_fields() finds those by running the ingest transformers on probe records
+that log every key read, so the projection follows the transformer without a hand-kept list.
+select_params() turns them into $select plus $expand=Media($select=...) (and UnitTypes when expanded),
+keeping only names the server's $metadata declares: MLS Grid rejects unknown fields in $select, and
+the transformer also reads a few fallback names the feed doesn't have.
+"""
+from typing import Dict, List, Optional, Set
+from xml.etree import ElementTree
+
+from services.property_transformer import transform_property, transform_media, is_listing_removed, source_fingerprint
+
+# Expanded collections on Property that the transformers read (Property key -> probe field set name)
+EXPANDABLE = ("Media", "UnitTypes")
+
+
+class _KeyRecorder(dict):
+    """dict that records every key looked up through get(), [] or `in`."""
+
+    def __init__(self, reads: Set[str], data: Optional[dict] = None):
+        super().__init__(data or {})
+        self.reads = reads
+
+    def get(self, key, default=None):
+        self.reads.add(key)
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self.reads.add(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self.reads.add(key)
+        return super().__contains__(key)
+
+
+def transformer_fields() -> Dict[str, Set[str]]:
+    """API field names read by ingest: {"Property": {...}, "Media": {...}, "UnitTypes": {...}}.
+
+    Probes run once with every field missing (so both sides of `a or b` fallbacks are read) and once
+    with ModificationTimestamp set (source_fingerprint then reads PhotosChangeTimestamp)."""
+    fields: Dict[str, Set[str]] = {"Property": set(), "Media": set(), "UnitTypes": set()}
+    for extra in ({}, {"ModificationTimestamp": "2024-01-01T00:00:00.000Z"}):
+        raw = _KeyRecorder(fields["Property"], {
+            "ListingKey": "PROBE",
+            "Media": [_KeyRecorder(fields["Media"])],
+            "UnitTypes": [_KeyRecorder(fields["UnitTypes"])],
+            **extra,
+        })
+        transform_property(raw)
+        transform_media(raw)
+        is_listing_removed(raw)
+        source_fingerprint(raw)
+    fields["Property"].difference_update(EXPANDABLE)
+    return fields
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def metadata_fields(metadata_xml: str) -> Dict[str, Dict]:
+    """Parse an OData $metadata (EDMX) document into
+    {EntityType name: {"properties": {names}, "navigation": {name: target EntityType name}}}."""
+    entity_types: Dict[str, Dict] = {}
+    for element in ElementTree.fromstring(metadata_xml).iter():
+        if _local_name(element.tag) != "EntityType":
+            continue
+        properties: Set[str] = set()
+        navigation: Dict[str, str] = {}
+        for child in element:
+            kind = _local_name(child.tag)
+            if kind == "Property":
+                properties.add(child.get("Name"))
+            elif kind == "NavigationProperty":
+                target = child.get("Type", "")
+                if target.startswith("Collection(") and target.endswith(")"):
+                    target = target[len("Collection("):-1]
+                navigation[child.get("Name")] = target.rsplit(".", 1)[-1]
+        entity_types[element.get("Name")] = {"properties": properties, "navigation": navigation}
+    return entity_types
+
+
+def split_expand(expand: str) -> List[str]:
+    """Top-level items of an $expand value ("Media($select=A,B),UnitTypes" -> ["Media($select=A,B)", "UnitTypes"])."""
+    items, depth, current = [], 0, ""
+    for char in expand:
+        if char == "," and depth == 0:
+            items.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        items.append(current.strip())
+    return items
+
+
+def select_params(
+    expand: str,
+    metadata: Optional[Dict[str, Dict]] = None,
+    fields: Optional[Dict[str, Set[str]]] = None,
+    entity: str = "Property",
+) -> Dict[str, str]:
+    """$select and $expand query values projecting Property (and its expanded collections) onto the
+    fields ingest reads. expand is the configured $expand; only collections already expanded are kept.
+    With metadata (from metadata_fields), names the server doesn't declare are left out."""
+    fields = fields or transformer_fields()
+    declared = metadata.get(entity) if metadata else None
+
+    def _names(wanted: Set[str], entity_type: Optional[str]) -> str:
+        if metadata is not None and entity_type in metadata:
+            wanted = wanted & metadata[entity_type]["properties"]
+        return ",".join(sorted(wanted))
+
+    expand_items = []
+    for item in split_expand(expand):
+        name = item.split("(", 1)[0].strip()
+        if name in fields:
+            target = declared["navigation"].get(name, name) if declared else name
+            expand_items.append(f"{name}($select={_names(fields[name], target)})")
+        else:
+            expand_items.append(item)
+    params = {"$select": _names(fields["Property"], entity)}
+    if expand_items:
+        params["$expand"] = ",".join(expand_items)
+    return params
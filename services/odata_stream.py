@@ -0,0 +1,150 @@
+"""
+Incremental parser for OData JSON pages ({"@odata.context": ..., "value": [...], "@odata.nextLink": ...}).
+
+response.json() holds the whole body, its decoded text and the full object graph at once. ODataPageParser
+is fed the body in chunks as it arrives and decodes each value[] element as soon as it is complete, so
+only the element being read is buffered. Elements are decoded with the json module's C scanner
+(JSONDecoder.raw_decode), which finds where an element ends and builds it in one pass. The other top-level
+members (including @odata.nextLink, which MLS Grid sends after value[]) are collected as metadata.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Parser states: before the page object, at a member name, after a member value, in value[], after an element
+_START, _MEMBER, _AFTER_MEMBER, _ITEMS, _AFTER_ITEM, _DONE = range(6)
+
+
+class ODataPageParser:
+    """Push parser: feed() body chunks and get back the value[] elements each one completes, then finish().
+    metadata holds the page's other top-level members (e.g. {"@odata.nextLink": ...})."""
+
+    def __init__(self, key: str = "value"):
+        self.key = key
+        self.metadata: Dict[str, Any] = {}
+        self.items = 0
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        self._position = 0
+        self._state = _START
+        # An incomplete element is re-decoded from its start, so wait for the buffer to double before retrying
+        self._retry_at = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        self._text = self._text[self._position:] + self._utf8.decode(chunk, final)
+        self._retry_at -= self._position
+        self._position = 0
+        items: List[Any] = []
+        while self._step(items, final):
+            pass
+        return items
+
+    def finish(self) -> List[Any]:
+        """Signal the end of the body; returns any elements still pending and checks the page object is complete."""
+        self._retry_at = 0
+        items = self.feed(b"", final=True)
+        if self._state != _DONE:
+            raise ValueError("OData page body ended early")
+        return items
+
+    def _decode(self, start: int, final: bool) -> Optional[Tuple[Any, int]]:
+        """(value, end) of the JSON value at start, or None if more of the body is needed."""
+        text = self._text
+        if not final and len(text) < self._retry_at:
+            return None
+        try:
+            value, end = self._decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            if final:
+                raise ValueError(f"Invalid OData page body: {e}") from e
+            self._retry_at = start + 2 * (len(text) - start)
+            return None
+        if end >= len(text) and not final and text[start] not in '{["':
+            return None  # a number or literal may continue in the next chunk
+        self._retry_at = 0
+        return value, end
+
+    def _step(self, items: List[Any], final: bool) -> bool:
+        """Advance past one token or value; returns False when more of the body is needed."""
+        text = self._text
+        position = _WHITESPACE.match(text, self._position).end()
+        if position >= len(text):
+            return False
+        char = text[position]
+        state = self._state
+
+        if state == _START:
+            if char != "{":
+                raise ValueError(f"OData page body doesn't start with an object: {text[position:position + 40]!r}")
+            self._state, self._position = _MEMBER, position + 1
+        elif state == _MEMBER:
+            if char == "}":
+                self._state, self._position = _DONE, position + 1
+                return True
+            decoded = self._decode(position, final)
+            if decoded is None:
+                return False
+            name, end = decoded
+            colon = _WHITESPACE.match(text, end).end()
+            value_start = _WHITESPACE.match(text, colon + 1).end()
+            if value_start >= len(text):
+                return False
+            if text[colon] != ":":
+                raise ValueError(f"Expected ':' after {name!r} in OData page body")
+            if name == self.key and text[value_start] == "[":
+                self._state, self._position = _ITEMS, value_start + 1
+                return True
+            decoded = self._decode(value_start, final)
+            if decoded is None:
+                return False
+            self.metadata[name], self._position = decoded
+            self._state = _AFTER_MEMBER
+        elif state in (_AFTER_MEMBER, _AFTER_ITEM):
+            separator, closing = (",", "}") if state == _AFTER_MEMBER else (",", "]")
+            if char == separator:
+                self._state = _MEMBER if state == _AFTER_MEMBER else _ITEMS
+            elif char == closing:
+                self._state = _DONE if state == _AFTER_MEMBER else _AFTER_MEMBER
+            else:
+                raise ValueError(f"Unexpected {char!r} in OData page body")
+            self._position = position + 1
+        elif state == _ITEMS:
+            if char == "]":
+                self._state, self._position = _AFTER_MEMBER, position + 1
+                return True
+            decoded = self._decode(position, final)
+            if decoded is None:
+                return False
+            item, self._position = decoded
+            items.append(item)
+            self.items += 1
+            self._state = _AFTER_ITEM
+        else:
+            raise ValueError(f"Unexpected content after the OData page object: {text[position:position + 40]!r}")
+        return True
+
+
+class ODataPageStream:
+    """Iterate the value[] elements of a page body given as byte chunks. After iteration, next_link and
+    metadata hold the page's @odata.nextLink and other top-level members."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = chunks
+        self._parser = ODataPageParser()
+        self.metadata: Optional[Dict[str, Any]] = None
+        self.body_bytes = 0
+
+    @property
+    def next_link(self) -> Optional[str]:
+        return (self.metadata or {}).get("@odata.nextLink")
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self._chunks:
+            self.body_bytes += len(chunk)
+            yield from self._parser.feed(chunk)
+        yield from self._parser.finish()
+        self.metadata = self._parser.metadata
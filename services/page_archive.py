@@ -0,0 +1,87 @@
+"""
+Compressed archive of raw MLS Grid OData pages.
+
+populate_database --archive-dir writes every fetched page to one gzip JSONL file per run
+(populate-<UTC timestamp>.jsonl.gz), one line per page: {"page", "fetched_at", "next_link", "value"}.
+--replay reads an archive back in page order, so the database can be rebuilt or re-transformed
+without calling the API, and ingest benchmarks get a fixed input.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_PREFIX = "populate-"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+
+
+def list_archives(archive_dir: str) -> List[str]:
+    """Archive files in archive_dir, oldest first (names sort by run start time)."""
+    if not os.path.isdir(archive_dir):
+        return []
+    names = sorted(
+        name for name in os.listdir(archive_dir)
+        if name.startswith(ARCHIVE_PREFIX) and name.endswith(ARCHIVE_SUFFIX)
+    )
+    return [os.path.join(archive_dir, name) for name in names]
+
+
+class PageArchiveWriter:
+    """Appends raw pages for one run to a new gzip JSONL file; keeps the newest `keep` runs."""
+
+    def __init__(self, archive_dir: str, keep: int = 10, compresslevel: int = 6):
+        os.makedirs(archive_dir, exist_ok=True)
+        run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        self.path = os.path.join(archive_dir, f"{ARCHIVE_PREFIX}{run_id}{ARCHIVE_SUFFIX}")
+        self._file = gzip.open(self.path, "wt", encoding="utf-8", compresslevel=compresslevel)
+        self.pages = 0
+        self.records = 0
+        if keep > 0:
+            for old_path in list_archives(archive_dir)[:-keep]:
+                if old_path != self.path:
+                    os.remove(old_path)
+
+    def write_page(self, page_num: int, records: List[Dict[str, Any]], next_link: Optional[str]) -> None:
+        line = {
+            "page": page_num,
+            "fetched_at": datetime.utcnow().isoformat(),
+            "next_link": next_link,
+            "value": records,
+        }
+        self._file.write(json.dumps(line, separators=(",", ":")))
+        self._file.write("\n")
+        self._file.flush()  # a crashed run still leaves every completed page readable
+        self.pages += 1
+        self.records += len(records)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.path)
+
+
+def resolve_archive(path: str) -> str:
+    """An archive file path, or the newest archive when path is a directory."""
+    if os.path.isdir(path):
+        archives = list_archives(path)
+        if not archives:
+            raise FileNotFoundError(f"No {ARCHIVE_PREFIX}*{ARCHIVE_SUFFIX} archives in {path}")
+        return archives[-1]
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Archive not found: {path}")
+    return path
+
+
+def iter_archive_pages(path: str) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+    """Yield (records, next_link) for each archived page, in fetch order."""
+    with gzip.open(resolve_archive(path), "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                page = json.loads(line)
+            except json.JSONDecodeError:
+                break  # truncated last line from an interrupted run
+            yield page.get("value", []), page.get("next_link")
@@ -0,0 +1,170 @@
+"""
+Declarative map of Property columns: API field -> database column -> frontend propertyDetails key.
+
+services/property_transformer compiles transform_property's field conversions and transform_for_frontend's
+propertyDetails from PROPERTY_FIELDS once at import, so adding a mapped column means adding the model
+Column and one Field here. Order is the propertyDetails order (ingest rows don't depend on key order).
+
+convert names the conversion applied at ingest (see property_transformer._INGEST_TEMPLATES):
+  None         value as the API sends it
+  "str"        safe_convert (lists joined, dicts as JSON)
+  "list"       convert_to_string (lists joined, empty -> None)
+  "bool"       convert_boolean
+  "date"       parse_date; the frontend gets .isoformat()
+  "bath"       bathroom count as float
+  "address"    safe_convert, then spaces around commas normalized
+  "status"     MlsStatus -> For Sale / Pending / Sold
+  "home_type"  PropertySubType (plus PropertyType for Land) -> Single Family, Condo, ...
+"""
+from typing import NamedTuple, Optional, Tuple, Union
+
+
+class Field(NamedTuple):
+    column: str
+    api: Union[str, Tuple[str, ...], None] = None  # a tuple means the first truthy of those fields; None: not ingested
+    convert: Optional[str] = None
+    frontend: Optional[str] = None  # propertyDetails key; None: not in propertyDetails
+    frontend_from: Tuple[str, ...] = ()  # columns whose first truthy value is served instead of column
+
+
+PROPERTY_FIELDS: Tuple[Field, ...] = (
+    # Identifiers, price, address, location, remarks, agent (served outside propertyDetails)
+    Field("listing_key", "ListingKey", "str"),
+    Field("list_price", "ListPrice"),
+    Field("street_number", "StreetNumber", "str"),
+    Field("street_name", "StreetName", "str"),
+    Field("city", "City", "str"),
+    Field("state_or_province", "StateOrProvince", "str"),
+    Field("postal_code", "PostalCode", "str"),
+    Field("unparsed_address", "UnparsedAddress", "address"),
+    Field("standard_status", "StandardStatus", "str"),
+    Field("latitude", "Latitude"),
+    Field("longitude", "Longitude"),
+    Field("public_remarks", "PublicRemarks", "str"),
+    Field("private_remarks", "PrivateRemarks", "str"),
+    Field("list_agent_full_name", "ListAgentFullName", "str"),
+    Field("list_agent_email", "ListAgentEmail", "str"),
+    Field("list_agent_phone", "ListAgentPhone", "str"),
+    Field("list_date", "ListDate", "date"),
+    # Property details
+    Field("property_type", "PropertyType", "str", "type"),
+    Field("property_sub_type", "PropertySubType", "str", "subType"),
+    Field("home_type", "PropertySubType", "home_type", "homeType"),
+    Field("bedrooms_total", "BedroomsTotal", None, "bedrooms"),
+    Field("bathrooms_total_integer", "NWM_Bathrooms", "bath", "bathrooms"),
+    Field("bathrooms_full", "BathroomsFull"),
+    Field("bathrooms_half", "BathroomsHalf"),
+    Field("living_area", ("NWM_CalculatedSquareFootage", "LivingArea"), None, "squareFeet"),
+    Field("lot_size_square_feet", "LotSizeSquareFeet", None, "lotSize"),
+    Field("year_built", "YearBuilt", None, "yearBuilt"),
+    Field("status", "MlsStatus", "status", "status", ("status", "standard_status")),
+    Field("appliances", "Appliances", "list", "appliances"),
+    Field("architectural_style", "ArchitecturalStyle", "list", "architecturalStyle"),
+    Field("attached_garage_yn", "AttachedGarageYN", "bool", "attachedGarageYN"),
+    Field("building_name", "BuildingName", "str", "buildingName"),
+    Field("buyer_agent_full_name", "BuyerAgentFullName", "str", "buyerAgentFullName"),
+    Field("buyer_office_name", "BuyerOfficeName", "str", "buyerOfficeName"),
+    Field("carport_yn", "CarportYN", "bool", "carportYN"),
+    Field("close_date", "CloseDate", "date", "closeDate"),
+    Field("close_price", "ClosePrice", None, "closePrice"),
+    Field("covered_spaces", "CoveredSpaces", None, "coveredSpaces"),
+    Field("cumulate_days_on_market", ("CumulateDaysOnMarket", "CumulativeDaysOnMarket"), None, "cumulateDaysOnMarket"),
+    Field("elementary_school", "ElementarySchool", "str", "elementarySchool"),
+    Field("exterior_features", "ExteriorFeatures", "list", "exteriorFeatures"),
+    Field("fireplace_features", "FireplaceFeatures", "list", "fireplaceFeatures"),
+    Field("fireplace_yn", "FireplaceYN", "bool", "fireplaceYN"),
+    Field("fireplaces_total", "FireplacesTotal", None, "fireplacesTotal"),
+    Field("flooring", "Flooring", "list", "flooring"),
+    Field("foundation_details", "FoundationDetails", "list", "foundationDetails"),
+    Field("furnished", "Furnished", "str", "furnished"),
+    Field("garage_spaces", "GarageSpaces", None, "garageSpaces"),
+    Field("garage_yn", "GarageYN", "bool", "garageYN"),
+    Field("high_school", "HighSchool", "str", "highSchool"),
+    Field("high_school_district", "HighSchoolDistrict", "str", "highSchoolDistrict"),
+    Field("inclusions", "Inclusions", "list", "inclusions"),
+    Field("interior_features", "InteriorFeatures", "list", "interiorFeatures"),
+    Field("internet_address_display_yn", "InternetAddressDisplayYN", "bool", "internetAddressDisplayYN"),
+    Field("levels", "Levels", "str", "levels"),
+    Field(
+        "listing_agent_full_name", "ListingAgentFullName", "str", "listingAgentFullName",
+        ("list_agent_full_name", "listing_agent_full_name"),
+    ),
+    Field("list_office_name", "ListOfficeName", "str", "listOfficeName"),
+    Field("list_office_phone", "ListOfficePhone", "str", "listOfficePhone"),
+    Field("list_contract_date", "ListContractDate", "date", "listContractDate"),
+    Field("listing_terms", "ListingTerms", "list", "listingTerms"),
+    Field("lot_features", "LotFeatures", "list", "lotFeatures"),
+    Field("lot_size_acres", "LotSizeAcres", None, "lotSizeAcres"),
+    Field("lost_size_square_feet", "LostSizeSquareFeet", None, "lostSizeSquareFeet"),
+    Field("mls_status", "MlsStatus", "str", "mlsStatus"),
+    Field("new_construction_yn", "NewConstructionYN", "bool", "newConstructionYN"),
+    Field("off_market_date", "OffMarketDate", "date", "offMarketDate"),
+    Field("on_market_date", "OnMarketDate", "date", "onMarketDate"),
+    Field("original_list_price", "OriginalListPrice", None, "originalListPrice"),
+    Field("parcel_number", "ParcelNumber", "str", "parcelNumber"),
+    Field("association_fee", "AssociationFee", None, "associationFee"),
+    Field("association_yn", "AssociationYN", "bool", "associationYN"),
+    Field("buyer_brokerage_compensation", "BuyerBrokerageCompensation", "str", "buyerBrokerageCompensation"),
+    Field("buyer_brokerage_compensation_type", "BuyerBrokerageCompensationType", "str", "buyerBrokerageCompensationType"),
+    Field("cooling_yn", "CoolingYN", "bool", "coolingYN"),
+    Field("cooling", "Cooling", "list", "cooling"),
+    Field("heating_yn", "HeatingYN", "bool", "heatingYN"),
+    Field("heating", "Heating", "list", "heating"),
+    Field("cumulate_days_on_market", None, None, "cumulativeDaysOnMarket"),  # second key for the same column
+    Field("internet_entire_listing_display_yn", "InternetEntireListingDisplayYN", "bool", "internetEntireListingDisplayYN"),
+    Field(
+        "internet_automated_valuation_display_yn", "InternetAutomatedValuationDisplayYN", "bool",
+        "internetAutomatedValuationDisplayYN",
+    ),
+    Field(
+        "originating_system_modification_timestamp", "OriginatingSystemModificationTimestamp", "date",
+        "originatingSystemModificationTimestamp",
+    ),
+    Field("modification_timestamp", "ModificationTimestamp", "date", "modificationTimestamp"),
+    Field("status_change_timestamp", "StatusChangeTimestamp", "date", "statusChangeTimestamp"),
+    Field("parking_features", "ParkingFeatures", "list", "parkingFeatures"),
+    Field("parking_total", "ParkingTotal", None, "parkingTotal"),
+    Field("possession", "Possession", "str", "possession"),
+    Field("power_production_type", "PowerProductionType", "str", "powerProductionType"),
+    Field("property_condition", "PropertyCondition", "str", "propertyCondition"),
+    Field("purchase_contract_date", "PurchaseContractDate", "date", "purchaseContractDate"),
+    Field("roof", "Roof", "list", "roof"),
+    Field("security_features", "SecurityFeatures", "list", "securityFeatures"),
+    Field("sewer", "Sewer", "str", "sewer"),
+    Field("source_system_name", "SourceSystemName", "str", "sourceSystemName"),
+    Field("special_listing_conditions", "SpecialListingConditions", "list", "specialListingConditions"),
+    Field("subdivision_name", "SubdivisionName", "str", "subdivisionName"),
+    Field("tax_annual_amount", "TaxAnnualAmount", None, "taxAnnualAmount"),
+    Field("tax_year", "TaxYear", None, "taxYear"),
+    Field("topography", "Topography", "list", "topography"),
+    Field("utilities", "Utilities", "list", "utilities"),
+    Field("vegetation", "Vegetation", "list", "vegetation"),
+    Field("view", "View", "list", "view"),
+    Field("water_source", "WaterSource", "str", "waterSource"),
+    Field("waterfront_yn", "WaterfrontYN", "bool", "waterfrontYN"),
+    Field("zoning_description", "ZoningDescription", "str", "zoningDescription"),
+    # NWM specific fields
+    Field("nwm_offers", "NWM_Offers", "str", "nwmOffers"),
+    Field("nwm_offers_review_date", "NWM_OffersReviewDate", "date", "nwmOffersReviewDate"),
+    Field("nwm_soc_comments", "NWM_SOCComments", "str", "nwmSocComments"),
+    Field("nwm_power_company", "NWM_PowerCompany", "str", "nwmPowerCompany"),
+    Field("nwm_preliminary_title_ordered", "NWM_PreliminaryTitleOrdered", "str", "nwmPreliminaryTitleOrdered"),
+    Field("nwm_seller_disclosure", "NWM_SellerDisclosure", "str", "nwmSellerDisclosure"),
+    Field("nwm_senior_exemption", "NWM_SeniorExemption", "str", "nwmSeniorExemption"),
+    Field("nwm_sewer_company", "NWM_SewerCompany", "str", "nwmSewerCompany"),
+    Field("nwm_style_code", "NWM_StyleCode", "str", "nwmStyleCode"),
+    Field("nwm_water_company", "NWM_WaterCompany", "str", "nwmWaterCompany"),
+    Field("nwm_water_heater_location", "NWM_WaterHeaterLocation", "str", "nwmWaterHeaterLocation"),
+    Field("nwm_water_heater_type", "NWM_WaterHeaterType", "str", "nwmWaterHeaterType"),
+    Field("nwm_appliances_included", "NWM_AppliancesIncluded", "list", "nwmAppliancesIncluded"),
+    Field("nwm_building_information", "NWM_BuildingInformation", "list", "nwmBuildingInformation"),
+    Field("nwm_site_features", "NWM_SiteFeatures", "list", "nwmSiteFeatures"),
+    Field("nwm_zoning_jurisdiction", "NWM_ZoningJurisdiction", "str", "nwmZoningJurisdiction"),
+    Field("nwm_energy_source", "NWM_EnergySource", "str", "nwmEnergySource"),
+    # Additional system fields
+    Field("concessions_comments", "ConcessionsComments", "str", "concessionsComments"),
+    Field("concessions", "Concessions", "list", "concessions"),
+    Field("originating_system_name", "OriginatingSystemName", "str", "originatingSystemName"),
+    Field("mlg_can_view", ("MlgCanVeiw", "MlgCanView"), "bool", "mlgCanView"),
+    Field("mlg_can_use", "MlgCanUse", "bool", "mlgCanUse"),
+)
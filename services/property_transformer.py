@@ -1,10 +1,15 @@
 """
 Transform NWMLS API data to normalized format
 """
+import hashlib
 import json
 import re
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Tuple
 from datetime import datetime
+from functools import lru_cache
+
+from database.models import PropertyDetail, PROPERTY_DETAIL_COLUMNS, media_entries
+from services.property_fields import PROPERTY_FIELDS, Field
 
 
 def _normalize_address(s: Optional[str]) -> str:
@@ -192,6 +197,11 @@ _MLS_STATUS_TO_STATUS: dict[str, str] = {
 }
 
 
+# Case-insensitive lookups, lower-cased once at import
+_STATUS_BY_MLS_STATUS = {key.lower(): status for key, status in _MLS_STATUS_TO_STATUS.items()}
+_HOME_TYPE_BY_SUBTYPE = {key.lower(): home_type for key, home_type in HOME_TYPE_BY_SUBTYPE.items()}
+
+
 def get_status_from_mls_status(mls_status: Optional[str]) -> Optional[str]:
     """
     Derive Status from MlsStatus.
@@ -199,13 +209,49 @@ def get_status_from_mls_status(mls_status: Optional[str]) -> Optional[str]:
     """
     if not mls_status or not isinstance(mls_status, str):
         return None
-    normalized = mls_status.strip()
-    if not normalized:
-        return None
-    for key, status in _MLS_STATUS_TO_STATUS.items():
-        if key.lower() == normalized.lower():
-            return status
-    return None
+    return _STATUS_BY_MLS_STATUS.get(mls_status.strip().lower())
+
+
+# StandardStatus values that mean the listing left the market; replication treats them as deletions
+OFF_MARKET_STANDARD_STATUSES = {"canceled", "cancelled", "expired", "withdrawn", "delete"}
+
+
+def is_listing_removed(raw_property: Dict[str, Any]) -> bool:
+    """
+    True if a replicated API record should be removed from the database:
+    MlgCanView is false (MLS Grid's delete signal) or StandardStatus is off-market.
+    """
+    can_view = raw_property.get("MlgCanView")
+    if can_view is not None and convert_boolean(can_view) is False:
+        return True
+    standard_status = raw_property.get("StandardStatus")
+    if isinstance(standard_status, str) and standard_status.strip().lower() in OFF_MARKET_STANDARD_STATUSES:
+        return True
+    return False
+
+
+def source_fingerprint(raw_property: Dict[str, Any]) -> str:
+    """
+    Change-detection hash of a raw API record, stored as properties.source_fingerprint so refresh can
+    skip listings that haven't changed. MLS Grid bumps ModificationTimestamp on any listing change and
+    PhotosChangeTimestamp on photo changes, so when present those are hashed instead of the whole
+    record (hashing a record with ~40 Media entries costs more than transforming it).
+    """
+    modified = raw_property.get("ModificationTimestamp")
+    if modified:
+        encoded = f"{modified}|{raw_property.get('PhotosChangeTimestamp') or ''}".encode("utf-8")
+    else:
+        # No timestamps: hash the content, ignoring media URL query strings (signatures)
+        payload = raw_property
+        media = raw_property.get("Media")
+        if media:
+            payload = dict(raw_property)
+            payload["Media"] = [
+                {**item, "MediaURL": item["MediaURL"].split("?", 1)[0]} if item.get("MediaURL") else item
+                for item in media
+            ]
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
 
 
 def _is_land_type(value: Optional[str]) -> bool:
@@ -227,10 +273,7 @@ def get_home_type_from_subtype(subtype: Optional[str]) -> Optional[str]:
     if not normalized:
         return None
     # Case-insensitive lookup so API variations still map correctly
-    for key, home_type in HOME_TYPE_BY_SUBTYPE.items():
-        if key.lower() == normalized.lower():
-            return home_type
-    return "Other"
+    return _HOME_TYPE_BY_SUBTYPE.get(normalized.lower(), "Other")
 
 
 def get_home_type_from_property(property_type: Optional[str], property_sub_type: Optional[str]) -> Optional[str]:
@@ -329,6 +372,135 @@ def transform_unit_types(unit_types_list: List[Dict[str, Any]]) -> List[Dict[str
     return result
 
 
+# Ingest conversion per Field.convert, as source lines. {get} reads the API value, {column} is the output key.
+# Common value types take an inline fast path; everything else goes through the helper the hand-written
+# transformer used, so converted values are identical. None results are left out of the row.
+_INGEST_TEMPLATES = {
+    None: """
+    v = {get}
+    if v is not None:
+        out[{column}] = v""",
+    "str": """
+    v = {get}
+    if v is not None:
+        if v.__class__ is not str:
+            v = safe_convert(v)
+        if v is not None:
+            out[{column}] = v""",
+    "list": """
+    v = {get}
+    if v:
+        if v.__class__ is not str:
+            v = convert_to_string(v)
+        if v is not None:
+            out[{column}] = v""",
+    "bool": """
+    v = {get}
+    if v is not None:
+        if v.__class__ is not bool:
+            v = convert_boolean(v)
+        if v is not None:
+            out[{column}] = v""",
+    "date": """
+    v = {get}
+    if v:
+        v = parse_date(v)
+        if v is not None:
+            out[{column}] = v""",
+    "bath": """
+    v = {get}
+    if v is not None:
+        v = _to_bathroom_float(v)
+        if v is not None:
+            out[{column}] = v""",
+    "address": """
+    v = {get}
+    if v:
+        v = _normalize_address(safe_convert(v))
+        if v:
+            out[{column}] = v""",
+    "status": """
+    v = {get}
+    if v.__class__ is str:
+        v = _STATUS_BY_MLS_STATUS.get(v.strip().lower())
+        if v is not None:
+            out[{column}] = v""",
+    "home_type": """
+    v = get_home_type_from_property(get("PropertyType"), {get})
+    if v is not None:
+        out[{column}] = v""",
+}
+
+
+def _api_read(api) -> str:
+    if isinstance(api, tuple):
+        return "(" + " or ".join(f"get({name!r})" for name in api) + ")"
+    return f"get({api!r})"
+
+
+def _compile(name: str, source: str, scope: Optional[Dict[str, Any]] = None) -> Callable:
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<{name}>", "exec"), {**globals(), **(scope or {})}, namespace)
+    return namespace[name]
+
+
+def compile_ingest(fields: Tuple[Field, ...]) -> Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]:
+    """Build fn(raw_property, out) that adds every ingested field's converted, non-None value to out."""
+    lines = ["def _ingest_fields(raw, out):", "    get = raw.get"]
+    for field in fields:
+        if field.api is not None:
+            lines.append(_INGEST_TEMPLATES[field.convert].format(get=_api_read(field.api), column=repr(field.column)))
+    lines.append("    return out")
+    return _compile("_ingest_fields", "\n".join(lines))
+
+
+def compile_details(fields: Tuple[Field, ...], from_dict: bool = False) -> Callable[..., Dict[str, Any]]:
+    """Build fn(property_obj) returning the frontend propertyDetails dict (dates as ISO strings).
+    With from_dict=True, fn takes the Property's and its PropertyDetail's instance __dict__ instead;
+    every column must be loaded in them."""
+    lines = ["def _property_details(p, d):" if from_dict else "def _property_details(p):", "    return {"]
+
+    def _read(column: str) -> str:
+        if not from_dict:
+            return f"p.{column}"
+        return f"d[{column!r}]" if column in PROPERTY_DETAIL_COLUMNS else f"p[{column!r}]"
+
+    for field in fields:
+        if field.frontend is None:
+            continue
+        reads = (_read(column) for column in field.frontend_from or (field.column,))
+        value = " or ".join(reads)
+        if field.convert == "date":
+            value = f"(v.isoformat() if (v := {value}) else None)"
+        lines.append(f"        {field.frontend!r}: {value},")
+    lines.append("    }")
+    return _compile("_property_details", "\n".join(lines))
+
+
+_ingest_fields = compile_ingest(PROPERTY_FIELDS)
+# Loaded ORM instances keep column values in __dict__; reading it skips instrumented attribute access
+_property_details_loaded = compile_details(PROPERTY_FIELDS, from_dict=True)
+_property_details_attributes = compile_details(PROPERTY_FIELDS)
+_DETAIL_COLUMNS = frozenset(
+    column for field in PROPERTY_FIELDS if field.frontend for column in field.frontend_from or (field.column,)
+)
+# propertyDetails columns on properties / on property_details
+_DETAIL_HOT = _DETAIL_COLUMNS - set(PROPERTY_DETAIL_COLUMNS)
+_DETAIL_COLD = _DETAIL_COLUMNS & set(PROPERTY_DETAIL_COLUMNS)
+
+
+def _property_details(property_obj) -> Dict[str, Any]:
+    """propertyDetails for a Property; attribute access (which loads deferred/expired columns and the
+    details row) unless all are loaded."""
+    loaded = property_obj.__dict__
+    details = loaded.get("details")
+    if details is not None and loaded.keys() >= _DETAIL_HOT:
+        details_loaded = details.__dict__
+        if details_loaded.keys() >= _DETAIL_COLD:
+            return _property_details_loaded(loaded, details_loaded)
+    return _property_details_attributes(property_obj)
+
+
 def transform_property(raw_property: Dict[str, Any]) -> Dict[str, Any]:
     """
     Transform NWMLS API property data to normalized database format
@@ -353,165 +525,14 @@ def transform_property(raw_property: Dict[str, Any]) -> Dict[str, Any]:
         preferred = next((m for m in media_list if m.get("PreferredPhotoYN")), None)
         primary_image = (preferred or media_list[0]).get("MediaURL")
     
-    # Build transformed property
-    # Always include required fields even if they might be filtered later
-    transformed = {
-        "id": listing_id,
-        "listing_id": listing_id,  # Required field - must always be present
-        "listing_key": safe_convert(raw_property.get("ListingKey")),
-        "list_price": raw_property.get("ListPrice"),
-        "street_number": safe_convert(raw_property.get("StreetNumber")),
-        "street_name": safe_convert(raw_property.get("StreetName")),
-        "city": safe_convert(raw_property.get("City")),
-        "state_or_province": safe_convert(raw_property.get("StateOrProvince")),
-        "postal_code": safe_convert(raw_property.get("PostalCode")),
-        "unparsed_address": (_normalize_address(safe_convert(raw_property.get("UnparsedAddress"))) or None),
-        "property_type": safe_convert(raw_property.get("PropertyType")),
-        "property_sub_type": safe_convert(raw_property.get("PropertySubType")),
-        "home_type": get_home_type_from_property(raw_property.get("PropertyType"), raw_property.get("PropertySubType")),
-        "bedrooms_total": raw_property.get("BedroomsTotal"),
-        "bathrooms_total_integer": _to_bathroom_float(raw_property.get("NWM_Bathrooms")),
-        "bathrooms_full": raw_property.get("BathroomsFull"),
-        "bathrooms_half": raw_property.get("BathroomsHalf"),
-        "living_area": raw_property.get("NWM_CalculatedSquareFootage") or raw_property.get("LivingArea"),
-        "lot_size_square_feet": raw_property.get("LotSizeSquareFeet"),
-        "year_built": raw_property.get("YearBuilt"),
-        "standard_status": safe_convert(raw_property.get("StandardStatus")),
-        "status": get_status_from_mls_status(raw_property.get("MlsStatus")),
-        "latitude": raw_property.get("Latitude"),
-        "longitude": raw_property.get("Longitude"),
-        "public_remarks": safe_convert(raw_property.get("PublicRemarks")),
-        "private_remarks": safe_convert(raw_property.get("PrivateRemarks")),
-        "list_agent_full_name": safe_convert(raw_property.get("ListAgentFullName")),
-        "list_agent_email": safe_convert(raw_property.get("ListAgentEmail")),
-        "list_agent_phone": safe_convert(raw_property.get("ListAgentPhone")),
-        "list_date": parse_date(raw_property.get("ListDate")),
-        "modification_timestamp": parse_date(raw_property.get("ModificationTimestamp")),
-        "originating_system_modification_timestamp": parse_date(
-            raw_property.get("OriginatingSystemModificationTimestamp")
-        ),
-        "media_count": len(media_list),
-        "primary_image_url": primary_image,
-        # Property Features
-        "appliances": convert_to_string(raw_property.get("Appliances")),
-        "architectural_style": convert_to_string(raw_property.get("ArchitecturalStyle")),
-        "attached_garage_yn": convert_boolean(raw_property.get("AttachedGarageYN")),
-        "building_name": safe_convert(raw_property.get("BuildingName")),
-        "buyer_agent_full_name": safe_convert(raw_property.get("BuyerAgentFullName")),
-        "buyer_office_name": safe_convert(raw_property.get("BuyerOfficeName")),
-        "carport_yn": convert_boolean(raw_property.get("CarportYN")),
-        "close_date": parse_date(raw_property.get("CloseDate")),
-        "close_price": raw_property.get("ClosePrice"),
-        "covered_spaces": raw_property.get("CoveredSpaces"),
-        "cumulate_days_on_market": raw_property.get("CumulateDaysOnMarket") or raw_property.get("CumulativeDaysOnMarket"),
-        "elementary_school": safe_convert(raw_property.get("ElementarySchool")),
-        "exterior_features": convert_to_string(raw_property.get("ExteriorFeatures")),
-        "fireplace_features": convert_to_string(raw_property.get("FireplaceFeatures")),
-        "fireplace_yn": convert_boolean(raw_property.get("FireplaceYN")),
-        "fireplaces_total": raw_property.get("FireplacesTotal"),
-        "flooring": convert_to_string(raw_property.get("Flooring")),
-        "foundation_details": convert_to_string(raw_property.get("FoundationDetails")),
-        "furnished": safe_convert(raw_property.get("Furnished")),
-        "garage_spaces": raw_property.get("GarageSpaces"),
-        "garage_yn": convert_boolean(raw_property.get("GarageYN")),
-        "high_school": safe_convert(raw_property.get("HighSchool")),
-        "high_school_district": safe_convert(raw_property.get("HighSchoolDistrict")),
-        "inclusions": convert_to_string(raw_property.get("Inclusions")),
-        "interior_features": convert_to_string(raw_property.get("InteriorFeatures")),
-        "internet_address_display_yn": convert_boolean(raw_property.get("InternetAddressDisplayYN")),
-        "levels": safe_convert(raw_property.get("Levels")),
-        "listing_agent_full_name": safe_convert(raw_property.get("ListingAgentFullName")),
-        "list_office_name": safe_convert(raw_property.get("ListOfficeName")),
-        "list_office_phone": safe_convert(raw_property.get("ListOfficePhone")),
-        "list_contract_date": parse_date(raw_property.get("ListContractDate")),
-        "listing_terms": convert_to_string(raw_property.get("ListingTerms")),
-        "lot_features": convert_to_string(raw_property.get("LotFeatures")),
-        "lot_size_acres": raw_property.get("LotSizeAcres"),
-        "lost_size_square_feet": raw_property.get("LostSizeSquareFeet"),
-        "mls_status": safe_convert(raw_property.get("MlsStatus")),
-        "new_construction_yn": convert_boolean(raw_property.get("NewConstructionYN")),
-        "off_market_date": parse_date(raw_property.get("OffMarketDate")),
-        "on_market_date": parse_date(raw_property.get("OnMarketDate")),
-        "original_list_price": raw_property.get("OriginalListPrice"),
-        "parcel_number": safe_convert(raw_property.get("ParcelNumber")),
-        "association_fee": raw_property.get("AssociationFee"),
-        "association_yn": convert_boolean(raw_property.get("AssociationYN")),
-        "buyer_brokerage_compensation": safe_convert(raw_property.get("BuyerBrokerageCompensation")),
-        "buyer_brokerage_compensation_type": safe_convert(raw_property.get("BuyerBrokerageCompensationType")),
-        "cooling_yn": convert_boolean(raw_property.get("CoolingYN")),
-        "cooling": convert_to_string(raw_property.get("Cooling")),
-        "heating_yn": convert_boolean(raw_property.get("HeatingYN")),
-        "heating": convert_to_string(raw_property.get("Heating")),
-        "internet_entire_listing_display_yn": convert_boolean(raw_property.get("InternetEntireListingDisplayYN")),
-        "internet_automated_valuation_display_yn": convert_boolean(raw_property.get("InternetAutomatedValuationDisplayYN")),
-        "status_change_timestamp": parse_date(raw_property.get("StatusChangeTimestamp")),
-        "parking_features": convert_to_string(raw_property.get("ParkingFeatures")),
-        "parking_total": raw_property.get("ParkingTotal"),
-        "possession": safe_convert(raw_property.get("Possession")),
-        "power_production_type": safe_convert(raw_property.get("PowerProductionType")),
-        "property_condition": safe_convert(raw_property.get("PropertyCondition")),
-        "purchase_contract_date": parse_date(raw_property.get("PurchaseContractDate")),
-        "roof": convert_to_string(raw_property.get("Roof")),
-        "security_features": convert_to_string(raw_property.get("SecurityFeatures")),
-        "sewer": safe_convert(raw_property.get("Sewer")),
-        "source_system_name": safe_convert(raw_property.get("SourceSystemName")),
-        "special_listing_conditions": convert_to_string(raw_property.get("SpecialListingConditions")),
-        "subdivision_name": safe_convert(raw_property.get("SubdivisionName")),
-        "tax_annual_amount": raw_property.get("TaxAnnualAmount"),
-        "tax_year": raw_property.get("TaxYear"),
-        "topography": convert_to_string(raw_property.get("Topography")),
-        "utilities": convert_to_string(raw_property.get("Utilities")),
-        "vegetation": convert_to_string(raw_property.get("Vegetation")),
-        "view": convert_to_string(raw_property.get("View")),
-        "water_source": safe_convert(raw_property.get("WaterSource")),
-        "waterfront_yn": convert_boolean(raw_property.get("WaterfrontYN")),
-        "zoning_description": safe_convert(raw_property.get("ZoningDescription")),
-        # NWM specific fields
-        "nwm_offers": safe_convert(raw_property.get("NWM_Offers")),
-        "nwm_offers_review_date": parse_date(raw_property.get("NWM_OffersReviewDate")),
-        "nwm_soc_comments": safe_convert(raw_property.get("NWM_SOCComments")),
-        "nwm_power_company": safe_convert(raw_property.get("NWM_PowerCompany")),
-        "nwm_preliminary_title_ordered": safe_convert(raw_property.get("NWM_PreliminaryTitleOrdered")),
-        "nwm_seller_disclosure": safe_convert(raw_property.get("NWM_SellerDisclosure")),
-        "nwm_senior_exemption": safe_convert(raw_property.get("NWM_SeniorExemption")),
-        "nwm_sewer_company": safe_convert(raw_property.get("NWM_SewerCompany")),
-        "nwm_style_code": safe_convert(raw_property.get("NWM_StyleCode")),
-        "nwm_water_company": safe_convert(raw_property.get("NWM_WaterCompany")),
-        "nwm_water_heater_location": safe_convert(raw_property.get("NWM_WaterHeaterLocation")),
-        "nwm_water_heater_type": safe_convert(raw_property.get("NWM_WaterHeaterType")),
-        "nwm_appliances_included": convert_to_string(raw_property.get("NWM_AppliancesIncluded")),
-        "nwm_building_information": convert_to_string(raw_property.get("NWM_BuildingInformation")),
-        "nwm_site_features": convert_to_string(raw_property.get("NWM_SiteFeatures")),
-        "nwm_zoning_jurisdiction": safe_convert(raw_property.get("NWM_ZoningJurisdiction")),
-        "nwm_energy_source": safe_convert(raw_property.get("NWM_EnergySource")),
-        # Additional system fields
-        "concessions_comments": safe_convert(raw_property.get("ConcessionsComments")),
-        "concessions": convert_to_string(raw_property.get("Concessions")),
-        "originating_system_name": safe_convert(raw_property.get("OriginatingSystemName")),
-        "mlg_can_view": convert_boolean(raw_property.get("MlgCanVeiw") or raw_property.get("MlgCanView")),
-        "mlg_can_use": convert_boolean(raw_property.get("MlgCanUse")),
-        "unit_types": json.dumps(transform_unit_types(raw_property.get("UnitTypes") or [])),
-    }
-    
-    # Remove None values to avoid database issues, but always keep required fields
-    required_fields = {"id", "listing_id"}  # These must always be present
-    filtered = {}
-    
-    for k, v in transformed.items():
-        # Always include required fields, even if None
-        if k in required_fields:
-            filtered[k] = v if v is not None else listing_id  # Fallback to listing_id for required fields
-        # For other fields, only include if not None
-        elif v is not None:
-            filtered[k] = v
-    
-    # Final validation: ensure required fields are present and not empty
-    if "listing_id" not in filtered or not filtered["listing_id"]:
-        raise ValueError(f"listing_id is required but missing or empty. Got: {filtered.get('listing_id')}")
-    if "id" not in filtered or not filtered["id"]:
-        raise ValueError(f"id is required but missing or empty. Got: {filtered.get('id')}")
-    
-    return filtered
+    # id/listing_id first (required), then every PROPERTY_FIELDS column with a value, then derived columns
+    transformed = _ingest_fields(raw_property, {"id": listing_id, "listing_id": listing_id})
+    transformed["media_count"] = len(media_list)
+    if primary_image is not None:
+        transformed["primary_image_url"] = primary_image
+    transformed["unit_types"] = json.dumps(transform_unit_types(raw_property.get("UnitTypes") or []))
+    transformed["source_fingerprint"] = source_fingerprint(raw_property)
+    return transformed
 
 
 def transform_media(raw_property: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -546,33 +567,24 @@ def transform_media(raw_property: Dict[str, Any]) -> List[Dict[str, Any]]:
     return transformed_media
 
 
-def transform_for_frontend(property_obj, media_items: Optional[List] = None) -> Dict[str, Any]:
-    """
-    Transform database property object to frontend-friendly format
-    
-    Args:
-        property_obj: SQLAlchemy Property object
-        media_items: Optional list of PropertyMedia objects (if None, will need to be queried separately)
-        
-    Returns:
-        Dictionary formatted for frontend consumption
-    """
-    # Build images array from PropertyMedia if available, otherwise use primary_image_url
+def _frontend_images(property_obj, media_items: Optional[List]) -> List[Dict[str, Any]]:
+    """images array from the media list (media_json entries or PropertyMedia rows) if available,
+    otherwise from primary_image_url."""
     images = []
     if media_items:
-        # Sort by order to ensure correct sequence
-        sorted_media = sorted(media_items, key=lambda m: m.order if m.order is not None else 999)
-        for idx, media in enumerate(sorted_media):
-            if media.media_url:
+        # Ordered compact entries (see database.models.media_entries)
+        entries = media_items if isinstance(media_items[0], dict) else media_entries(media_items)
+        for idx, media in enumerate(entries):
+            if media.get("url"):
                 # Prioritize R2 URL, fallback to backend image endpoint (Railway)
-                image_url = media.r2_url if media.r2_url else f"/api/images/{property_obj.id}/{idx + 1}"
+                image_url = media.get("r2Url") or f"/api/images/{property_obj.id}/{idx + 1}"
                 images.append({
                     "url": image_url,
-                    "order": media.order if media.order is not None else len(images),
-                    "type": media.media_category or "photo",
-                    "width": media.image_width,
-                    "height": media.image_height,
-                    "isPreferred": media.preferred_photo_yn or False
+                    "order": media.get("order", len(images)),
+                    "type": media.get("category") or "photo",
+                    "width": media.get("width"),
+                    "height": media.get("height"),
+                    "isPreferred": media.get("preferred", False)
                 })
     
     # Always include primary_image_url if available (either as fallback or as first image)
@@ -603,150 +615,185 @@ def transform_for_frontend(property_obj, media_items: Optional[List] = None) ->
             "type": "photo",
             "isPreferred": True
         })
+    return images
+
+
+def _format_date(dt) -> Optional[str]:
+    return dt.isoformat() if dt else None
+
+
+def _street(p) -> str:
+    return f"{p.street_number or ''} {p.street_name or ''}".strip()
+
+
+def _full_address(p) -> str:
+    return _normalize_address(
+        p.unparsed_address
+        or f"{p.street_number or ''} {p.street_name or ''}, {p.city or ''}, {p.state_or_province or ''} {p.postal_code or ''}".strip()
+    )
+
+
+def _pick(values: List[Any], indexes: Tuple[int, ...]) -> List[Any]:
+    return [values[index] for index in indexes if index < len(values)]
+
+
+# address key -> (columns read, expression over p)
+_ADDRESS_PARTS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "street": (("street_number", "street_name"), "_street(p)"),
+    "city": (("city",), '(p.city or "").strip() if p.city else ""'),
+    "state": (("state_or_province",), "p.state_or_province"),
+    "zipCode": (("postal_code",), "p.postal_code"),
+    "full": (
+        ("unparsed_address", "street_number", "street_name", "city", "state_or_province", "postal_code"),
+        "_full_address(p)",
+    ),
+}
+
+# Top-level frontend key -> (columns read, expression over p and media), in response order. address is
+# built from _ADDRESS_PARTS; c is the property's PropertyDetail row (property_details columns). compile_frontend
+# turns these into the serializer; for a sparse fieldset it emits only the selected parts, and
+# columns_for_fields lists the columns they read.
+_FRONTEND_PARTS: Dict[str, Tuple[Tuple[str, ...], Optional[str]]] = {
+    "id": (("id",), "p.id"),
+    "mlsNumber": (("listing_id",), "p.listing_id"),
+    "price": (("list_price",), "p.list_price"),
+    "address": (tuple(dict.fromkeys(column for columns, _ in _ADDRESS_PARTS.values() for column in columns)), None),
+    "propertyDetails": (tuple(sorted(_DETAIL_COLUMNS)), "_property_details(p)"),
+    "unitTypes": (("unit_types",), "_parse_unit_types_json(c.unit_types)"),
+    "images": (("id", "primary_image_url", "primary_image_r2_url"), "_frontend_images(p, media)"),
+    "description": (("public_remarks",), "c.public_remarks"),
+    "coordinates": (
+        ("latitude", "longitude"),
+        '{"lat": p.latitude, "lng": p.longitude} if p.latitude and p.longitude else None',
+    ),
+    "agent": (
+        ("list_agent_full_name", "list_agent_email", "list_agent_phone"),
+        '{"name": c.list_agent_full_name, "email": c.list_agent_email, "phone": c.list_agent_phone}'
+        " if c.list_agent_full_name else None",
+    ),
+    "listingDate": (("list_date",), "_format_date(p.list_date)"),
+    "lastUpdated": (("modification_timestamp",), "_format_date(p.modification_timestamp)"),
+}
+_DETAIL_FIELDS = {field.frontend: field for field in PROPERTY_FIELDS if field.frontend}
+_LIST_PARTS = ("images", "unitTypes")  # parts that take an index: images[0]
+_FIELD_TOKEN = re.compile(r"^([A-Za-z]+)(?:\.([A-Za-z]+)|\[(\d+)\])?$")
+
+# Parsed fields= value, in response order: (top-level key, None for the whole part, or the selected
+# address/propertyDetails keys or list indexes). Hashable, so compiled serializers can be cached per selection.
+FieldSelection = Tuple[Tuple[str, Optional[frozenset]], ...]
+
+
+def parse_fields(spec: str, extra: Tuple[str, ...] = ()) -> FieldSelection:
+    """
+    Parse a sparse fieldset ("id,price,address.city,propertyDetails.bedrooms,images[0]")
     
-    # Helper function to format dates
-    def format_date(dt):
-        return dt.isoformat() if dt else None
-    
-    return {
-        "id": property_obj.id,
-        "mlsNumber": property_obj.listing_id,
-        "price": property_obj.list_price,
-        "address": {
-            "street": f"{property_obj.street_number or ''} {property_obj.street_name or ''}".strip(),
-            "city": (property_obj.city or "").strip() if property_obj.city else "",
-            "state": property_obj.state_or_province,
-            "zipCode": property_obj.postal_code,
-            "full": _normalize_address(
-                property_obj.unparsed_address
-                or f"{property_obj.street_number or ''} {property_obj.street_name or ''}, {property_obj.city or ''}, {property_obj.state_or_province or ''} {property_obj.postal_code or ''}".strip()
-            ),
-        },
-        "propertyDetails": {
-            "type": property_obj.property_type,
-            "subType": property_obj.property_sub_type,
-            "homeType": getattr(property_obj, "home_type", None),
-            "bedrooms": property_obj.bedrooms_total,
-            "bathrooms": property_obj.bathrooms_total_integer,
-            "squareFeet": property_obj.living_area,
-            "lotSize": property_obj.lot_size_square_feet,
-            "yearBuilt": property_obj.year_built,
-            "status": getattr(property_obj, "status", None) or property_obj.standard_status,
-            # All additional property details
-            "appliances": getattr(property_obj, 'appliances', None),
-            "architecturalStyle": getattr(property_obj, 'architectural_style', None),
-            "attachedGarageYN": getattr(property_obj, 'attached_garage_yn', None),
-            "buildingName": getattr(property_obj, 'building_name', None),
-            "buyerAgentFullName": getattr(property_obj, 'buyer_agent_full_name', None),
-            "buyerOfficeName": getattr(property_obj, 'buyer_office_name', None),
-            "carportYN": getattr(property_obj, 'carport_yn', None),
-            "closeDate": format_date(getattr(property_obj, 'close_date', None)),
-            "closePrice": getattr(property_obj, 'close_price', None),
-            "coveredSpaces": getattr(property_obj, 'covered_spaces', None),
-            "cumulateDaysOnMarket": getattr(property_obj, 'cumulate_days_on_market', None),
-            "elementarySchool": getattr(property_obj, 'elementary_school', None),
-            "exteriorFeatures": getattr(property_obj, 'exterior_features', None),
-            "fireplaceFeatures": getattr(property_obj, 'fireplace_features', None),
-            "fireplaceYN": getattr(property_obj, 'fireplace_yn', None),
-            "fireplacesTotal": getattr(property_obj, 'fireplaces_total', None),
-            "flooring": getattr(property_obj, 'flooring', None),
-            "foundationDetails": getattr(property_obj, 'foundation_details', None),
-            "furnished": getattr(property_obj, 'furnished', None),
-            "garageSpaces": getattr(property_obj, 'garage_spaces', None),
-            "garageYN": getattr(property_obj, 'garage_yn', None),
-            "highSchool": getattr(property_obj, 'high_school', None),
-            "highSchoolDistrict": getattr(property_obj, 'high_school_district', None),
-            "inclusions": getattr(property_obj, 'inclusions', None),
-            "interiorFeatures": getattr(property_obj, 'interior_features', None),
-            "internetAddressDisplayYN": getattr(property_obj, 'internet_address_display_yn', None),
-            "levels": getattr(property_obj, 'levels', None),
-            "listingAgentFullName": getattr(property_obj, 'list_agent_full_name', None) or getattr(property_obj, 'listing_agent_full_name', None),
-            "listOfficeName": getattr(property_obj, 'list_office_name', None),
-            "listOfficePhone": getattr(property_obj, 'list_office_phone', None),
-            "listContractDate": format_date(getattr(property_obj, 'list_contract_date', None)),
-            "listingTerms": getattr(property_obj, 'listing_terms', None),
-            "lotFeatures": getattr(property_obj, 'lot_features', None),
-            "lotSizeAcres": getattr(property_obj, 'lot_size_acres', None),
-            "lostSizeSquareFeet": getattr(property_obj, 'lost_size_square_feet', None),
-            "mlsStatus": getattr(property_obj, 'mls_status', None),
-            "newConstructionYN": getattr(property_obj, 'new_construction_yn', None),
-            "offMarketDate": format_date(getattr(property_obj, 'off_market_date', None)),
-            "onMarketDate": format_date(getattr(property_obj, 'on_market_date', None)),
-            "originalListPrice": getattr(property_obj, 'original_list_price', None),
-            "parcelNumber": getattr(property_obj, 'parcel_number', None),
-            "associationFee": getattr(property_obj, 'association_fee', None),
-            "associationYN": getattr(property_obj, 'association_yn', None),
-            "buyerBrokerageCompensation": getattr(property_obj, 'buyer_brokerage_compensation', None),
-            "buyerBrokerageCompensationType": getattr(property_obj, 'buyer_brokerage_compensation_type', None),
-            "coolingYN": getattr(property_obj, 'cooling_yn', None),
-            "cooling": getattr(property_obj, 'cooling', None),
-            "heatingYN": getattr(property_obj, 'heating_yn', None),
-            "heating": getattr(property_obj, 'heating', None),
-            "cumulativeDaysOnMarket": getattr(property_obj, 'cumulate_days_on_market', None),
-            "internetEntireListingDisplayYN": getattr(property_obj, 'internet_entire_listing_display_yn', None),
-            "internetAutomatedValuationDisplayYN": getattr(property_obj, 'internet_automated_valuation_display_yn', None),
-            "originatingSystemModificationTimestamp": format_date(getattr(property_obj, 'originating_system_modification_timestamp', None)),
-            "modificationTimestamp": format_date(getattr(property_obj, 'modification_timestamp', None)),
-            "statusChangeTimestamp": format_date(getattr(property_obj, 'status_change_timestamp', None)),
-            "parkingFeatures": getattr(property_obj, 'parking_features', None),
-            "parkingTotal": getattr(property_obj, 'parking_total', None),
-            "possession": getattr(property_obj, 'possession', None),
-            "powerProductionType": getattr(property_obj, 'power_production_type', None),
-            "propertyCondition": getattr(property_obj, 'property_condition', None),
-            "purchaseContractDate": format_date(getattr(property_obj, 'purchase_contract_date', None)),
-            "roof": getattr(property_obj, 'roof', None),
-            "securityFeatures": getattr(property_obj, 'security_features', None),
-            "sewer": getattr(property_obj, 'sewer', None),
-            "sourceSystemName": getattr(property_obj, 'source_system_name', None),
-            "specialListingConditions": getattr(property_obj, 'special_listing_conditions', None),
-            "subdivisionName": getattr(property_obj, 'subdivision_name', None),
-            "taxAnnualAmount": getattr(property_obj, 'tax_annual_amount', None),
-            "taxYear": getattr(property_obj, 'tax_year', None),
-            "topography": getattr(property_obj, 'topography', None),
-            "utilities": getattr(property_obj, 'utilities', None),
-            "vegetation": getattr(property_obj, 'vegetation', None),
-            "view": getattr(property_obj, 'view', None),
-            "waterSource": getattr(property_obj, 'water_source', None),
-            "waterfrontYN": getattr(property_obj, 'waterfront_yn', None),
-            "zoningDescription": getattr(property_obj, 'zoning_description', None),
-            # NWM specific fields
-            "nwmOffers": getattr(property_obj, 'nwm_offers', None),
-            "nwmOffersReviewDate": format_date(getattr(property_obj, 'nwm_offers_review_date', None)),
-            "nwmSocComments": getattr(property_obj, 'nwm_soc_comments', None),
-            "nwmPowerCompany": getattr(property_obj, 'nwm_power_company', None),
-            "nwmPreliminaryTitleOrdered": getattr(property_obj, 'nwm_preliminary_title_ordered', None),
-            "nwmSellerDisclosure": getattr(property_obj, 'nwm_seller_disclosure', None),
-            "nwmSeniorExemption": getattr(property_obj, 'nwm_senior_exemption', None),
-            "nwmSewerCompany": getattr(property_obj, 'nwm_sewer_company', None),
-            "nwmStyleCode": getattr(property_obj, 'nwm_style_code', None),
-            "nwmWaterCompany": getattr(property_obj, 'nwm_water_company', None),
-            "nwmWaterHeaterLocation": getattr(property_obj, 'nwm_water_heater_location', None),
-            "nwmWaterHeaterType": getattr(property_obj, 'nwm_water_heater_type', None),
-            "nwmAppliancesIncluded": getattr(property_obj, 'nwm_appliances_included', None),
-            "nwmBuildingInformation": getattr(property_obj, 'nwm_building_information', None),
-            "nwmSiteFeatures": getattr(property_obj, 'nwm_site_features', None),
-            "nwmZoningJurisdiction": getattr(property_obj, 'nwm_zoning_jurisdiction', None),
-            "nwmEnergySource": getattr(property_obj, 'nwm_energy_source', None),
-            # Additional system fields
-            "concessionsComments": getattr(property_obj, 'concessions_comments', None),
-            "concessions": getattr(property_obj, 'concessions', None),
-            "originatingSystemName": getattr(property_obj, 'originating_system_name', None),
-            "mlgCanView": getattr(property_obj, 'mlg_can_view', None),
-            "mlgCanUse": getattr(property_obj, 'mlg_can_use', None),
-        },
-        "unitTypes": _parse_unit_types_json(getattr(property_obj, 'unit_types', None)),
-        "images": images,
-        "description": property_obj.public_remarks,
-        "coordinates": {
-            "lat": property_obj.latitude,
-            "lng": property_obj.longitude
-        } if property_obj.latitude and property_obj.longitude else None,
-        "agent": {
-            "name": property_obj.list_agent_full_name,
-            "email": property_obj.list_agent_email,
-            "phone": property_obj.list_agent_phone
-        } if property_obj.list_agent_full_name else None,
-        "listingDate": format_date(property_obj.list_date),
-        "lastUpdated": format_date(property_obj.modification_timestamp)
-    }
+    Args:
+        spec: Comma-separated top-level keys of transform_for_frontend's output, address.<key> or
+            propertyDetails.<key> for single nested keys, images[N] / unitTypes[N] for single elements
+        extra: Additional top-level keys the endpoint adds itself (e.g. lastPopulateRun)
+        
+    Returns:
+        FieldSelection for transform_for_frontend and columns_for_fields
+        
+    Raises:
+        ValueError: On an empty spec or unknown field
+    """
+    selected: Dict[str, Optional[set]] = {}
+    for token in (part.strip() for part in spec.split(",")):
+        if not token:
+            continue
+        match = _FIELD_TOKEN.match(token)
+        name, key, index = match.groups() if match else (token, None, None)
+        if name not in _FRONTEND_PARTS and name not in extra:
+            raise ValueError(f"Unknown field: {token}")
+        if key is not None and not (
+            (name == "address" and key in _ADDRESS_PARTS) or (name == "propertyDetails" and key in _DETAIL_FIELDS)
+        ):
+            raise ValueError(f"Unknown field: {token}")
+        if index is not None and name not in _LIST_PARTS:
+            raise ValueError(f"Field is not a list: {token}")
+        sub = key if key is not None else (int(index) if index is not None else None)
+        if sub is None:
+            selected[name] = None
+        elif name not in selected:
+            selected[name] = {sub}
+        elif selected[name] is not None:
+            selected[name].add(sub)
+    if not selected:
+        raise ValueError("No fields selected")
+    order = list(_FRONTEND_PARTS) + list(extra)
+    return tuple(
+        (name, None if selected[name] is None else frozenset(selected[name]))
+        for name in sorted(selected, key=order.index)
+    )
 
+
+def columns_for_fields(fields: FieldSelection) -> List[str]:
+    """Property columns transform_for_frontend reads to build fields (always including id)."""
+    columns = {"id"}
+    for name, sub in fields:
+        if name not in _FRONTEND_PARTS:
+            continue
+        if sub is None or name not in ("address", "propertyDetails"):
+            columns.update(_FRONTEND_PARTS[name][0])
+        elif name == "address":
+            columns.update(column for key in sub for column in _ADDRESS_PARTS[key][0])
+        else:
+            columns.update(
+                column for key in sub for column in _DETAIL_FIELDS[key].frontend_from or (_DETAIL_FIELDS[key].column,)
+            )
+    return sorted(columns)
+
+
+@lru_cache(maxsize=256)
+def compile_frontend(fields: Optional[FieldSelection] = None) -> Callable[[Any, Optional[List]], Dict[str, Any]]:
+    """Build fn(property_obj, media_items) returning the frontend dict, or only the parts in fields."""
+    scope: Dict[str, Any] = {}
+    lines = ["def _frontend(p, media):", "", "    return {"]
+    for name, sub in fields if fields is not None else ((name, None) for name in _FRONTEND_PARTS):
+        if name not in _FRONTEND_PARTS:
+            continue
+        if not set(_FRONTEND_PARTS[name][0]).isdisjoint(PROPERTY_DETAIL_COLUMNS):
+            # Read the details row once (a listing without one serializes as if every detail column is None)
+            lines[1] = "    c = p.details or _NO_DETAILS"
+        value = _FRONTEND_PARTS[name][1]
+        if name == "address":
+            value = "{" + ", ".join(
+                f"{key!r}: {expression}" for key, (_, expression) in _ADDRESS_PARTS.items() if sub is None or key in sub
+            ) + "}"
+        elif sub is not None and name == "propertyDetails":
+            # attribute access: a sparse selection is loaded with load_only, so __dict__ holds only its columns
+            scope["_details_subset"] = compile_details(tuple(field for field in PROPERTY_FIELDS if field.frontend in sub))
+            value = "_details_subset(p)"
+        elif sub is not None:
+            value = f"_pick({value}, {tuple(sorted(sub))!r})"
+        lines.append(f"        {name!r}: {value},")
+    lines.append("    }")
+    return _compile("_frontend", "\n".join(lines), scope)
+
+
+_NO_DETAILS = PropertyDetail()
+_frontend_all = compile_frontend()
+
+
+def transform_for_frontend(
+    property_obj,
+    media_items: Optional[List] = None,
+    fields: Optional[FieldSelection] = None,
+) -> Dict[str, Any]:
+    """
+    Transform database property object to frontend-friendly format
+    
+    Args:
+        property_obj: SQLAlchemy Property object
+        media_items: Optional media list: entries decoded from media_json, or PropertyMedia objects
+            (if None, images come from the primary image only)
+        fields: Optional sparse fieldset from parse_fields; only those parts are built, reading only
+            the columns columns_for_fields lists
+        
+    Returns:
+        Dictionary formatted for frontend consumption
+    """
+    if fields is None:
+        return _frontend_all(property_obj, media_items)
+    return compile_frontend(fields)(property_obj, media_items)
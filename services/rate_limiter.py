@@ -0,0 +1,322 @@
+"""
+Quota-aware rate limiter for the MLS Grid API.
+
+Token buckets cap requests per second, per hour and per day, and bytes downloaded per hour and per
+day. Byte sizes aren't known until a response arrives, so bytes are charged afterwards and an
+overdrawn bucket delays the next request. On a 429 the per-second rate is halved and all requests
+pause for Retry-After; successful requests raise it again step by step (AIMD).
+
+One limiter per process is shared by every MLS Grid caller (get_shared_limiter): API paging through
+MLSGridClient and media downloads in ImageProcessor draw from the same quota. Hourly and daily usage is
+also written to a per-minute ledger in AppMetadata (QuotaUsageStore) of the run's database: a limiter
+seeds its buckets from the last hour/day recorded there, and running limiters merge their usage every
+QUOTA_SYNC_SECONDS, so separate CLI runs (e.g. hourly incremental cron jobs) and the API process share
+one quota.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from database.models import AppMetadata, get_engine, get_session
+
+# AppMetadata key holding {minute epoch: [requests, bytes]} for the last day of MLS Grid usage
+QUOTA_USAGE_KEY = "mlsgrid_quota_usage"
+# How often a limiter writes its usage to the ledger and picks up other processes' usage
+QUOTA_SYNC_SECONDS = float(os.getenv("MLSGRID_QUOTA_SYNC_SECONDS", "30"))
+
+
+class _TokenBucket:
+    """capacity tokens, refilled continuously at capacity / period seconds. Balance may go negative."""
+
+    def __init__(self, capacity: float, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class QuotaUsageStore:
+    """Per-minute request and byte counts for the last day, shared through the AppMetadata table."""
+
+    def __init__(self, database_url: str):
+        self.database_url = database_url
+        self.engine = get_engine(database_url)
+        AppMetadata.__table__.create(self.engine, checkfirst=True)
+
+    def sync(self, pending: Dict[int, List[int]]) -> Dict[int, List[int]]:
+        """Add pending {minute: [requests, bytes]} to the ledger; returns the pruned ledger."""
+        session = get_session(self.engine)
+        try:
+            # Row lock (PostgreSQL) so concurrent processes don't overwrite each other's counts
+            row = session.query(AppMetadata).filter_by(key=QUOTA_USAGE_KEY).with_for_update().first()
+            ledger = {int(minute): counts for minute, counts in json.loads(row.value).items()} if row else {}
+            for minute, (requests, byte_count) in pending.items():
+                counts = ledger.setdefault(minute, [0, 0])
+                counts[0] += requests
+                counts[1] += byte_count
+            oldest = int(time.time() // 60) - 24 * 60
+            ledger = {minute: counts for minute, counts in ledger.items() if minute >= oldest}
+            if pending:
+                value = json.dumps({str(minute): counts for minute, counts in ledger.items()})
+                if row:
+                    row.value = value
+                else:
+                    session.add(AppMetadata(key=QUOTA_USAGE_KEY, value=value))
+            session.commit()
+            return ledger
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class QuotaRateLimiter:
+    """Blocking limiter: call acquire() before a request, then record_response() with its outcome."""
+
+    def __init__(
+        self,
+        requests_per_second: float = 2.0,
+        requests_per_hour: int = 7200,
+        requests_per_day: int = 40000,
+        bytes_per_hour: int = 4 * 1024 ** 3,
+        bytes_per_day: int = 0,
+        min_requests_per_second: float = 0.1,
+        recovery_step: float = 0.05,
+        usage_store: Optional[QuotaUsageStore] = None,
+    ):
+        """Zero disables a limit. recovery_step is the fraction of the configured rate regained per success.
+        Without a usage_store the hourly and daily limits only apply within this process."""
+        self.max_rate = requests_per_second
+        self.current_rate = requests_per_second
+        self.min_rate = min(min_requests_per_second, requests_per_second) if requests_per_second else 0.0
+        self.recovery_step = recovery_step
+        self._per_second = None
+        if requests_per_second:
+            burst = max(1.0, requests_per_second)
+            self._per_second = _TokenBucket(burst, burst / requests_per_second)
+        self._request_buckets = {
+            name: _TokenBucket(limit, period)
+            for name, limit, period in (("hourly", requests_per_hour, 3600), ("daily", requests_per_day, 86400))
+            if limit
+        }
+        self._byte_buckets = {
+            name: _TokenBucket(limit, period)
+            for name, limit, period in (("hourly", bytes_per_hour, 3600), ("daily", bytes_per_day, 86400))
+            if limit
+        }
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._usage_store = usage_store
+        self._pending_usage: Dict[int, List[int]] = {}  # minute epoch -> [requests, bytes] not yet synced
+        self._next_sync = 0.0
+        if usage_store is not None:
+            self.sync_usage()
+
+    @classmethod
+    def from_env(cls, database_url: Optional[str] = None) -> "QuotaRateLimiter":
+        """Limits from MLSGRID_MAX_REQUESTS_PER_SECOND/_HOUR/_DAY and MLSGRID_MAX_MB_PER_HOUR/_DAY.
+
+        Usage is persisted in database_url (default DATABASE_PUBLIC_URL / DATABASE_URL). Without either,
+        or if that database can't be opened, the hourly and daily limits apply to this process only.
+        """
+        database_url = database_url or _env_database_url()
+        return cls(
+            requests_per_second=float(os.getenv("MLSGRID_MAX_REQUESTS_PER_SECOND", "2")),
+            requests_per_hour=int(os.getenv("MLSGRID_MAX_REQUESTS_PER_HOUR", "7200")),
+            requests_per_day=int(os.getenv("MLSGRID_MAX_REQUESTS_PER_DAY", "40000")),
+            bytes_per_hour=int(float(os.getenv("MLSGRID_MAX_MB_PER_HOUR", "4096")) * 1024 ** 2),
+            bytes_per_day=int(float(os.getenv("MLSGRID_MAX_MB_PER_DAY", "0")) * 1024 ** 2),
+            usage_store=_open_usage_store(database_url) if database_url else None,
+        )
+
+    def use_database(self, database_url: str) -> None:
+        """Keep the usage ledger in database_url from now on (pending usage is flushed to the previous one)."""
+        if self._usage_store is not None and self._usage_store.database_url == database_url:
+            return
+        usage_store = _open_usage_store(database_url)
+        if usage_store is None:
+            return
+        self.sync_usage()
+        with self._lock:
+            self._usage_store = usage_store
+            self._pending_usage = {}
+        self.sync_usage()
+
+    def _record_usage(self, requests: int, byte_count: int) -> bool:
+        """Add usage for the ledger (caller holds the lock); True when a sync is due."""
+        if self._usage_store is None:
+            return False
+        counts = self._pending_usage.setdefault(int(time.time() // 60), [0, 0])
+        counts[0] += requests
+        counts[1] += byte_count
+        return time.monotonic() >= self._next_sync
+
+    def sync_usage(self) -> None:
+        """Write pending usage to the shared ledger and tighten the hourly/daily buckets to what every
+        process has used in those windows. Failures keep the usage pending for the next sync."""
+        if self._usage_store is None:
+            return
+        with self._lock:
+            pending, self._pending_usage = self._pending_usage, {}
+            self._next_sync = time.monotonic() + QUOTA_SYNC_SECONDS
+        try:
+            ledger = self._usage_store.sync(pending)
+        except Exception as e:
+            print(f"Warning: could not sync MLS Grid quota usage: {e}")
+            with self._lock:
+                for minute, (requests, byte_count) in pending.items():
+                    counts = self._pending_usage.setdefault(minute, [0, 0])
+                    counts[0] += requests
+                    counts[1] += byte_count
+            return
+        now_minute = int(time.time() // 60)
+        with self._lock:
+            now = time.monotonic()
+            for buckets, column in ((self._request_buckets, 0), (self._byte_buckets, 1)):
+                for bucket in buckets.values():
+                    window_start = now_minute - int(bucket.period // 60) + 1
+                    used = sum(counts[column] for minute, counts in ledger.items() if minute >= window_start)
+                    # Plus usage recorded while the ledger was being written
+                    used += sum(counts[column] for minute, counts in self._pending_usage.items() if minute >= window_start)
+                    bucket.refill(now)
+                    bucket.tokens = min(bucket.tokens, bucket.capacity - used)
+
+    def _buckets(self):
+        if self._per_second is not None:
+            yield self._per_second, 1
+        for bucket in self._request_buckets.values():
+            yield bucket, 1
+        for bucket in self._byte_buckets.values():
+            yield bucket, 0  # bytes are charged after the response; only wait while overdrawn
+
+    def acquire(self) -> float:
+        """Block until a request is allowed under every limit; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(0.0, self._paused_until - now)
+                for bucket, cost in self._buckets():
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time(cost))
+                if wait <= 0:
+                    for bucket, cost in self._buckets():
+                        bucket.tokens -= cost
+                    self.requests += 1
+                    self.wait_seconds += waited
+                    sync_due = self._record_usage(1, 0)
+            if wait <= 0:
+                if sync_due:
+                    self.sync_usage()
+                return waited
+            # Re-check at least every 5s: a 429 seen by another thread may extend the wait
+            time.sleep(min(wait, 5.0))
+            waited += min(wait, 5.0)
+
+    def record_response(self, status_code: Optional[int], byte_count: int = 0, retry_after: Optional[float] = None) -> None:
+        """Charge downloaded bytes and adapt the rate: back off on 429, recover on success."""
+        with self._lock:
+            self.bytes += byte_count
+            for bucket in self._byte_buckets.values():
+                bucket.tokens -= byte_count
+            sync_due = self._record_usage(0, byte_count) if byte_count else False
+            if status_code == 429:
+                self.throttled += 1
+                if self.max_rate:
+                    self._set_rate(max(self.min_rate, self.current_rate / 2))
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            elif status_code is not None and status_code < 400 and self.max_rate and self.current_rate < self.max_rate:
+                self._set_rate(min(self.max_rate, self.current_rate + self.max_rate * self.recovery_step))
+        if sync_due:
+            self.sync_usage()
+
+    def _set_rate(self, rate: float) -> None:
+        self.current_rate = rate
+        if self._per_second is not None:
+            self._per_second.period = self._per_second.capacity / rate
+
+    def headroom(self) -> Dict[str, Any]:
+        """Remaining quota per window (requests and MB) and the current adaptive rate."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket, _ in self._buckets():
+                bucket.refill(now)
+            return {
+                "requests_per_second": round(self.current_rate, 2) if self.max_rate else None,
+                "requests_remaining": {name: int(b.tokens) for name, b in self._request_buckets.items()},
+                "mb_remaining": {name: round(b.tokens / 1024 ** 2, 1) for name, b in self._byte_buckets.items()},
+                "requests": self.requests,
+                "mb_downloaded": round(self.bytes / 1024 ** 2, 1),
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 1),
+            }
+
+    def summary(self) -> str:
+        stats = self.headroom()
+        parts = [f"{stats['requests']} requests, {stats['mb_downloaded']} MB"]
+        if stats["requests_per_second"] is not None:
+            parts.append(f"rate {stats['requests_per_second']}/s")
+        parts += [f"{count} {name} requests left" for name, count in stats["requests_remaining"].items()]
+        parts += [f"{mb} {name} MB left" for name, mb in stats["mb_remaining"].items()]
+        parts.append(f"{stats['throttled']} throttled, waited {stats['wait_seconds']:.0f}s")
+        return ", ".join(parts)
+
+
+def _open_usage_store(database_url: str) -> Optional[QuotaUsageStore]:
+    try:
+        return QuotaUsageStore(database_url)
+    except Exception as e:
+        print(f"Warning: MLS Grid quota usage not persisted, limits apply to this process only: {e}")
+        return None
+
+
+def _env_database_url() -> Optional[str]:
+    """DATABASE_PUBLIC_URL / DATABASE_URL, or None (no local SQLite file is created for the ledger)."""
+    database_url = os.getenv("DATABASE_PUBLIC_URL") or os.getenv("DATABASE_URL")
+    if not database_url:
+        return None
+    # Railway/Heroku provide postgres:// but SQLAlchemy needs postgresql://
+    if database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+    return database_url
+
+
+_shared_limiter: Optional[QuotaRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter(database_url: Optional[str] = None) -> QuotaRateLimiter:
+    """The process-wide limiter used by every MLS Grid caller unless one is passed explicitly.
+    database_url (the run's database) holds the usage ledger; callers that know it should pass it."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = QuotaRateLimiter.from_env(database_url)
+            # Flush usage since the last sync so the next run starts from an accurate ledger
+            atexit.register(_shared_limiter.sync_usage)
+        elif database_url:
+            _shared_limiter.use_database(database_url)
+        return _shared_limiter
@@ -0,0 +1,218 @@
+"""
+Per-request timing (Server-Timing header) and slow-query capture with EXPLAIN snapshots.
+
+Every SQL statement executed through SQLAlchemy is timed by engine-level event listeners.
+Statement time is added to the current request's "db" bucket, and statements slower than
+SLOW_QUERY_THRESHOLD_MS are recorded (with truncated statement text and bound parameters
+and an EXPLAIN plan) in an in-memory ring buffer that the admin endpoint exposes.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements at or above this duration are captured with an EXPLAIN plan (0 disables capture)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "250"))
+# Number of slow statements kept in memory (oldest dropped first)
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "100"))
+# EXPLAIN ANALYZE re-executes the statement, so it is opt-in (PostgreSQL only)
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "").strip().lower() in ("1", "true", "yes")
+# Captured statement text and bound parameters are truncated so multi-row bulk INSERTs
+# (tens of thousands of parameters) don't pin large payloads in the buffer
+SLOW_QUERY_MAX_STATEMENT_CHARS = int(os.getenv("SLOW_QUERY_MAX_STATEMENT_CHARS", "4000"))
+SLOW_QUERY_MAX_PARAMS = int(os.getenv("SLOW_QUERY_MAX_PARAMS", "50"))
+
+
+class RequestTimings:
+    """Timing buckets for one HTTP request, rendered as a Server-Timing header."""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}  # phase name -> seconds, in first-seen order
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def header_value(self) -> str:
+        """Server-Timing header value, e.g. 'db;desc="3 queries";dur=4.2, count;dur=1.1, total;dur=9.8'."""
+        total_ms = (time.perf_counter() - self.started) * 1000
+        parts = [f'db;desc="{self.db_queries} queries";dur={self.db_seconds * 1000:.1f}']
+        for name, seconds in self.phases.items():
+            parts.append(f"{name};dur={seconds * 1000:.1f}")
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+_slow_queries: deque = deque(maxlen=max(1, SLOW_QUERY_BUFFER_SIZE))
+_slow_queries_lock = threading.Lock()
+_installed = False
+
+
+def start_request(path: str = ""):
+    """Begin timing a request. Returns (timings, token); pass token to finish_request."""
+    timings = RequestTimings(path)
+    token = _current_timings.set(timings)
+    return timings, token
+
+
+def finish_request(token) -> None:
+    """Stop attributing phases and statements to the request started with start_request."""
+    _current_timings.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being served on this context, or None outside a request."""
+    return _current_timings.get()
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block and add it to the current request's Server-Timing (no-op outside a request)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add(name, time.perf_counter() - start)
+
+
+def _truncate_statement(statement: str) -> str:
+    """Statement text capped at SLOW_QUERY_MAX_STATEMENT_CHARS with a marker for the dropped tail."""
+    if len(statement) <= SLOW_QUERY_MAX_STATEMENT_CHARS:
+        return statement
+    dropped = len(statement) - SLOW_QUERY_MAX_STATEMENT_CHARS
+    return f"{statement[:SLOW_QUERY_MAX_STATEMENT_CHARS]}…({dropped} more chars)"
+
+
+def _jsonable_params(parameters: Any) -> Any:
+    """Bound parameters in a JSON-friendly shape (tuple/list/dict of primitives or strings).
+
+    Only the first SLOW_QUERY_MAX_PARAMS values are kept; a "…(M more)" marker records the rest.
+    """
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        items = list(parameters.items())
+        kept = {str(k): _jsonable_params(v) for k, v in items[:SLOW_QUERY_MAX_PARAMS]}
+        if len(items) > SLOW_QUERY_MAX_PARAMS:
+            kept["…"] = f"({len(items) - SLOW_QUERY_MAX_PARAMS} more)"
+        return kept
+    if isinstance(parameters, (list, tuple)):
+        kept = [_jsonable_params(v) for v in parameters[:SLOW_QUERY_MAX_PARAMS]]
+        if len(parameters) > SLOW_QUERY_MAX_PARAMS:
+            kept.append(f"…({len(parameters) - SLOW_QUERY_MAX_PARAMS} more)")
+        return kept
+    if isinstance(parameters, (str, int, float, bool)):
+        return parameters
+    return str(parameters)
+
+
+def _explain(conn, statement: str, parameters: Any) -> Optional[str]:
+    """Return the query plan for a SELECT statement, or None if not supported for this dialect."""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if SLOW_QUERY_EXPLAIN_ANALYZE else "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    # Raw DBAPI cursor so the EXPLAIN itself doesn't go through (and re-trigger) the listeners
+    cursor = conn.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # A failed EXPLAIN must not abort the request's transaction
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters if parameters is not None else ())
+            rows = cursor.fetchall()
+        except Exception as e:
+            if dialect == "postgresql":
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"EXPLAIN failed: {e}"
+        finally:
+            if dialect == "postgresql":
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return "\n".join(str(row[-1]) for row in rows)
+    return "\n".join(str(row[0]) for row in rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context (not the pooled connection) so a statement that raises leaves nothing behind
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start_time", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.db_seconds += elapsed
+        timings.db_queries += 1
+
+    elapsed_ms = elapsed * 1000
+    if SLOW_QUERY_THRESHOLD_MS <= 0 or elapsed_ms < SLOW_QUERY_THRESHOLD_MS or executemany:
+        return
+    try:
+        plan = _explain(conn, statement, parameters)
+    except Exception as e:
+        plan = f"EXPLAIN failed: {e}"
+    entry = {
+        "captured_at": datetime.utcnow().isoformat(),
+        "duration_ms": round(elapsed_ms, 2),
+        "path": timings.path if timings is not None else None,
+        "dialect": conn.dialect.name,
+        "statement": _truncate_statement(statement),
+        "parameters": _jsonable_params(parameters),
+        "plan": plan,
+    }
+    with _slow_queries_lock:
+        _slow_queries.append(entry)
+
+
+def install_query_profiler() -> None:
+    """Attach timing listeners to every SQLAlchemy Engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
+
+
+def get_slow_queries() -> List[Dict[str, Any]]:
+    """Captured slow statements, newest first."""
+    with _slow_queries_lock:
+        return list(reversed(_slow_queries))
+
+
+def clear_slow_queries() -> int:
+    """Empty the ring buffer; returns how many entries were dropped."""
+    with _slow_queries_lock:
+        count = len(_slow_queries)
+        _slow_queries.clear()
+        return count
@@ -0,0 +1,57 @@
+"""
+Multi-process transform stage for ingest.
+
+transform_property/transform_media are pure-Python and CPU bound, so threads don't scale them.
+TransformPool ships chunks of raw API records to worker processes and returns insert-ready
+(property_data, media_list) pairs in input order. Workers are spawned rather than forked: the
+executor starts them on first use, from a pipeline thread while the fetch and write threads run,
+and forking a multi-threaded process can copy locks held by those threads (logging, urllib3 pools).
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.property_transformer import transform_property, transform_media
+
+# (property_data, media_list, error); error is set and the dicts are None when the record failed
+TransformResult = Tuple[Optional[Dict[str, Any]], Optional[List[Dict[str, Any]]], Optional[str]]
+
+
+def transform_records(raw_records: List[Dict[str, Any]]) -> List[TransformResult]:
+    """Transform a chunk of raw records; runs in a worker process (top-level so it pickles)."""
+    results: List[TransformResult] = []
+    for raw_prop in raw_records:
+        try:
+            results.append((transform_property(raw_prop), transform_media(raw_prop), None))
+        except Exception as e:
+            results.append((None, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class TransformPool:
+    """Process pool that transforms raw record lists chunk by chunk."""
+
+    def __init__(self, processes: Optional[int] = None, chunk_size: int = 50):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def transform(self, raw_records: List[Dict[str, Any]]) -> List[TransformResult]:
+        """Transform raw_records across the pool; results are in input order."""
+        if not raw_records:
+            return []
+        chunks = [raw_records[i:i + self.chunk_size] for i in range(0, len(raw_records), self.chunk_size)]
+        results: List[TransformResult] = []
+        for chunk_results in self._executor.map(transform_records, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "TransformPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()